@@ -0,0 +1,141 @@
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class Ahnentafel:
+    """Ancestor numbers for one root person, computed once.
+
+    The root is number 1, and the father and mother of number n are 2n and
+    2n + 1. Ancestors are stored in two flat lists sorted by number. An
+    ancestor who occupies several numbers (implex) is stored and expanded
+    only under the lowest one; the other numbers are kept as aliases, so
+    building the table costs O(distinct ancestors) and ``get`` still
+    answers for every number below a repeated ancestor.
+    """
+
+    def __init__(self, gedcom_processor, root_person, generations: Optional[int] = None,
+                 details: Optional[Dict[str, str]] = None):
+        self.generations = generations
+        self.numbers: List[int] = []
+        self.persons: List = []
+        self.aliases: Dict[int, int] = {}
+        self.implex: Dict[str, List[int]] = {}
+        self._labels: Dict[int, str] = {}  # Ancestor number -> formatted person label
+        self._located: Dict[int, int] = {}  # Ancestor number -> index in ``numbers``, -1 if unknown
+        # Xref -> name and dates shown after the number; may be shared by
+        # the ahnentafels of several roots over the same data
+        self._details: Dict[str, str] = {} if details is None else details
+
+        first_numbers: Dict[str, int] = {}
+        current = [(1, root_person)] if root_person else []
+        if root_person:
+            gedcom_processor.prefetch_ancestors(root_person, generations)
+        generation = 1
+        # Each generation is built from the previous one in ascending order,
+        # so the number list stays sorted without an explicit sort.
+        while current and (generations is None or generation <= generations):
+            next_generation = []
+            for number, person in current:
+                first = first_numbers.get(person.id)
+                if first is not None:
+                    self.aliases[number] = first
+                    self.implex.setdefault(person.id, [first]).append(number)
+                    continue
+
+                first_numbers[person.id] = number
+                self.numbers.append(number)
+                self.persons.append(person)
+
+                if generations is not None and generation == generations:
+                    # The last generation walked; its parents are not shown
+                    continue
+                father, mother = gedcom_processor.find_parents(person)
+                if father:
+                    next_generation.append((number * 2, father))
+                if mother:
+                    next_generation.append((number * 2 + 1, mother))
+            current = next_generation
+            generation += 1
+
+    def _position(self, number: int) -> int:
+        """Return the index of ``number`` in ``numbers``, or -1 if it is not stored."""
+        position = bisect_left(self.numbers, number)
+        return position if position < len(self.numbers) and self.numbers[position] == number else -1
+
+    def _locate(self, number: int) -> int:
+        """Return the index in ``numbers`` of the person at ancestor ``number``, or -1."""
+        if self.generations is not None and number.bit_length() > self.generations:
+            return -1
+
+        position = self._position(number)
+        if position != -1:
+            return position
+
+        # Below a repeated ancestor the line is stored under its first number
+        for shift in range(number.bit_length()):
+            first = self.aliases.get(number >> shift)
+            if first is not None:
+                return self._locate((first << shift) | (number & ((1 << shift) - 1)))
+        return -1
+
+    def get(self, number: int):
+        """Return the person at ancestor ``number``, or None if unknown."""
+        position = self._locate(number)
+        return self.persons[position] if position != -1 else None
+
+    def ancestors(self) -> Iterator[Tuple[int, object]]:
+        """Yield (number, person) for each distinct ancestor in number order."""
+        return zip(self.numbers, self.persons)
+
+    def generation_cells(self, number: int, generation: int) -> List:
+        """Return the persons ``generation`` steps above ``number``, left to right."""
+        first = number << generation
+        return [self.get(first + offset) for offset in range(1 << generation)]
+
+    def grid_labels(self, gedcom_processor, number: int, depth: int) -> List[str]:
+        """Return the person labels of the page grid for ``number``, row by row from the root down.
+
+        Each number appears on the pages of up to ``depth`` descendants, so
+        its label is looked up once and then reused, and a person's name
+        and dates are formatted once for all the numbers, and all the roots
+        sharing ``details``, that show them. Unknown ancestors are "".
+        """
+        labels, cache, located = [], self._labels, self._located
+        for generation in range(depth):
+            first = number << generation
+            row = [cache.get(cell) for cell in range(first, first + (1 << generation))]
+            if None in row:
+                for offset, label in enumerate(row):
+                    if label is None:
+                        cell = first + offset
+                        position = located[cell] = self._locate(cell) if generation == 0 else self._parent_position(cell)
+                        row[offset] = cache[cell] = (f"{cell}. {self._person_details(gedcom_processor, position)}"
+                                                     if position != -1 else "")
+            labels += row
+            if not any(row):
+                # Above a row of unknown ancestors every row is empty
+                labels += [""] * ((1 << depth) - (2 << generation))
+                break
+        return labels
+
+    def _person_details(self, gedcom_processor, position: int) -> str:
+        person = self.persons[position]
+        details = self._details.get(person.id)
+        if details is None:
+            details = self._details[person.id] = gedcom_processor.person_details(person)
+        return details
+
+    def _parent_position(self, cell: int) -> int:
+        # The child's cell was located in the row below. Its stored number is
+        # never below an alias, so the parent is stored at the matching
+        # number or under that number's alias, and an empty child has none.
+        child = self._located[cell >> 1]
+        if child == -1 or (self.generations is not None and cell.bit_length() > self.generations):
+            return -1
+        number = (self.numbers[child] << 1) | (cell & 1)
+        position = self._position(number)
+        if position == -1 and number in self.aliases:
+            position = self._position(self.aliases[number])
+        return position
+
+    def __len__(self) -> int:
+        return len(self.numbers)
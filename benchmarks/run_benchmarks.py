@@ -0,0 +1,160 @@
+"""Time parsing, traversal and rendering on synthetic GEDCOM files.
+
+Each size is generated once into the work directory and reused, with
+variants in other line endings and encodings for the file parse. Results
+are compared with ``baselines.json``; ``--save-baseline`` replaces the
+stored numbers for the sizes that were run.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARK_DIR))
+
+from ahnentafel import Ahnentafel
+from gedcom_processor import GedcomProcessor, scan_records
+from synthetic_gedcom import generate_gedcom
+from tree_processor import TreeProcessor, _save_page
+
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baselines.json")
+DEFAULT_SIZES = [1000, 100000, 1000000]
+# Line ending and encoding of each variant parsed from file, by name
+VARIANTS = {"lf": ("\n", "utf-8"), "crlf": ("\r\n", "utf-8"), "cr": ("\r", "utf-8"), "cp1252": ("\n", "cp1252")}
+STAGES = ["read_individuals", "link_families"] + [f"parse_{variant}" for variant in VARIANTS] + [
+    "traversal", "markdown_render", "word_render"]
+
+def _best_of(repeat: int, function):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 4), result
+
+def gedcom_for(size: int, work_dir: str, args, variant: str = "lf") -> str:
+    suffix = "" if variant == "lf" else f"-{variant}"
+    path = os.path.join(work_dir, f"synthetic-{size}-g{args.generations}-i{args.implex_rate}"
+                                  f"-h{args.heavy_blocks}-s{args.seed}{suffix}.ged")
+    if not os.path.exists(path):
+        line_ending, encoding = VARIANTS[variant]
+        generate_gedcom(path, size, args.generations, args.implex_rate, args.heavy_blocks, args.seed,
+                        line_ending, encoding)
+    return path
+
+def run_size(size: int, work_dir: str, args) -> dict:
+    """Return stage -> seconds for one synthetic file of ``size`` persons."""
+    path = gedcom_for(size, work_dir, args)
+    with open(path, encoding="utf-8") as gedcom:
+        text = gedcom.read()
+
+    processor = GedcomProcessor(path)
+    results = {}
+    results["read_individuals"], individuals = _best_of(args.repeat, lambda: processor.read_individuals(text))
+
+    # Only the linking is timed; the families are collected from the records beforehand.
+    # Linking sets the same parents again on each repeat, which costs the same as the first time.
+    _, families = processor._collect_records(
+        record for record in scan_records(text, processor.fields) if record[0] == "FAM")
+    del text
+    processor.individuals = individuals
+    results["link_families"], _ = _best_of(args.repeat, lambda: processor._resolve_family_links(families))
+    del families
+
+    for variant in args.variants:
+        variant_path = gedcom_for(size, work_dir, args, variant)
+        results[f"parse_{variant}"], _ = _best_of(
+            args.repeat, lambda: GedcomProcessor(variant_path)._parse_gedcom(variant_path))
+
+    root = processor.individuals["@I1@"]
+    results["traversal"], ahnentafel = _best_of(args.repeat, lambda: Ahnentafel(processor, root))
+
+    tree_processor = TreeProcessor(processor)
+    with tempfile.TemporaryDirectory() as output_dir:
+        for format, limit in (("markdown", args.markdown_pages), ("word", args.word_pages)):
+            def render():
+                jobs = tree_processor.page_jobs(ahnentafel, output_dir, format)[:limit]
+                for job in jobs:
+                    _save_page(job, tree_processor.generator(format))
+                return len(jobs)
+            seconds, pages = _best_of(args.repeat, render)
+            results[f"{format}_render"] = seconds
+            results[f"{format}_pages"] = pages
+
+    results["ancestors"] = len(ahnentafel)
+    return results
+
+def compare(results: dict, baselines: dict, tolerance: float) -> bool:
+    """Print each stage against its baseline; return True if any regressed."""
+    regressed = False
+    for size, stages in results.items():
+        baseline = baselines.get(size, {})
+        print(f"{size} persons:")
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            seconds = stages[stage]
+            line = f"  {stage:24} {seconds:10.4f}s"
+            if stage in baseline and baseline[stage] > 0:
+                ratio = seconds / baseline[stage]
+                line += f"  {ratio:6.2f}x baseline"
+                if ratio > 1 + tolerance:
+                    line += "  REGRESSION"
+                    regressed = True
+            print(line)
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing and rendering on synthetic GEDCOM files')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Numbers of individuals to benchmark (default: 1k, 100k and 1M)')
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--implex-rate', type=float, default=0.1)
+    parser.add_argument('--heavy-blocks', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--variants', nargs='*', choices=list(VARIANTS), default=list(VARIANTS),
+                        help='Line endings and encodings parsed from file (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the best is kept')
+    parser.add_argument('--markdown-pages', type=int, default=1000, help='Pages rendered per Markdown run')
+    parser.add_argument('--word-pages', type=int, default=50, help='Pages rendered per Word run')
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'gedcom-benchmarks'),
+                        help='Directory for the generated GEDCOM files')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Slowdown over baseline reported as a regression (default: 0.25)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 on a regression')
+    args = parser.parse_args()
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    results = {}
+    for size in args.sizes:
+        print(f"Benchmarking {size} persons...")
+        results[str(size)] = run_size(size, args.work_dir, args)
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as baseline_file:
+            baselines = json.load(baseline_file)
+
+    regressed = compare(results, baselines, args.tolerance)
+
+    if args.save_baseline:
+        baselines.update(results)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Saved baseline to {BASELINE_FILE}")
+
+    if regressed and args.check:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Seeded generator of synthetic GEDCOM files for benchmarks and tests.
+
+The population is layered by generation: every person in one generation
+is a child in a family of the next older generation. ``implex_rate`` is
+the share of children placed in an already used family, which makes
+siblings and, further down, ancestors that occur on several lines.
+"""
+import argparse
+import codecs
+import random
+from typing import Optional, TextIO
+
+FIRST_NAMES = ["Hans", "Jens", "Niels", "Peder", "Søren", "Christian", "Rasmus", "Anders", "Lars", "Jørgen",
+               "Ane", "Maren", "Karen", "Kirstine", "Mette", "Johanne", "Else", "Inger", "Birthe", "Dorthe"]
+SURNAMES = ["Jensen", "Nielsen", "Hansen", "Pedersen", "Andersen", "Christensen", "Larsen", "Sørensen",
+            "Rasmussen", "Jørgensen", "Petersen", "Madsen", "Kristensen", "Olsen", "Thomsen", "Thrane"]
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+# HEAD CHAR value declaring each codec a file can be written in, by codec name
+CHAR_VALUES = {"utf-8": "UTF-8", "utf-8-sig": "UTF-8", "utf-16": "UNICODE", "utf-16-le": "UNICODE",
+               "utf-16-be": "UNICODE", "cp1252": "ANSI", "cp850": "IBMPC", "mac-roman": "MACINTOSH",
+               "iso8859-1": "LATIN1"}
+
+def char_value(encoding: str) -> str:
+    """Return the HEAD CHAR value declaring ``encoding``, e.g. ANSI for cp1252."""
+    name = codecs.lookup(encoding).name
+    if name not in CHAR_VALUES:
+        raise ValueError(f"No GEDCOM CHAR value for encoding {encoding}")
+    return CHAR_VALUES[name]
+
+def _date(rng: random.Random, year: int) -> str:
+    day, month = rng.randint(1, 28), rng.randint(1, 12)
+    if rng.random() < 0.5:
+        return f"{day:02d}.{month:02d}.{year}"
+    return f"{day} {MONTHS[month - 1]} {year}"
+
+def _heavy_blocks(rng: random.Random, count: int, sources: int, media: int):
+    lines = []
+    for _ in range(count):
+        lines.append(f"2 SOUR @S{rng.randrange(sources)}@")
+        lines.append(f"3 PAGE https://www.sa.dk/ao-soegesider/billedviser?epid={rng.randrange(10 ** 8)}")
+        lines.append("3 QUAY 3")
+        lines.append("3 _QUAL")
+        lines.append("4 _SOUR O")
+        lines.append("4 _INFO P")
+        lines.append("4 _EVID D")
+        lines.append(f"2 OBJE @M{rng.randrange(media)}@")
+    return lines
+
+def write_gedcom(out: TextIO, individuals: int = 1000, generations: int = 10, implex_rate: float = 0.1,
+                 heavy_blocks: int = 0, seed: int = 1, line_ending: str = "\n", char: str = "UTF-8"):
+    """Write a synthetic GEDCOM with ``individuals`` persons to ``out``; ``char`` goes in the HEAD."""
+    rng = random.Random(seed)
+    sources = media = max(1, individuals // 100)
+    generations = max(1, min(generations, individuals))
+
+    # Generation 0 is the youngest; @I1@ is always in it
+    sizes = [individuals // generations] * generations
+    sizes[0] += individuals - sum(sizes)
+    first_ids = [1]
+    for size in sizes[:-1]:
+        first_ids.append(first_ids[-1] + size)
+
+    lines = ["0 HEAD", "1 SOUR synthetic_gedcom", "1 GEDC", "2 VERS 5.5.1", "2 FORM LINEAGE-LINKED",
+             f"1 CHAR {char}"]
+
+    def flush():
+        out.write(line_ending.join(lines) + line_ending)
+        lines.clear()
+
+    families = []
+    family_count = 0
+    for generation, (size, first_id) in enumerate(zip(sizes, first_ids)):
+        base_year = 1990 - 30 * generation
+        for person_id in range(first_id, first_id + size):
+            # Parents are paired from the start of their generation, husband first,
+            # so every other person from there is a woman
+            female = (person_id - first_id) % 2 == 1
+            first_name = rng.choice(FIRST_NAMES[10:] if female else FIRST_NAMES[:10])
+            surname = rng.choice(SURNAMES)
+            birth_year = base_year + rng.randint(-5, 5)
+            lines.append(f"0 @I{person_id}@ INDI")
+            lines.append(f"1 NAME {first_name} /{surname}/")
+            lines.append(f"2 GIVN {first_name}")
+            lines.append(f"2 SURN {surname}")
+            lines.append(f"1 SEX {'F' if female else 'M'}")
+            lines.append("1 BIRT")
+            lines.append(f"2 DATE {_date(rng, birth_year)}")
+            lines.append("2 PLAC Odense, Danmark")
+            lines.extend(_heavy_blocks(rng, heavy_blocks, sources, media))
+            if generation > 0 or rng.random() < 0.5:
+                lines.append("1 DEAT")
+                lines.append(f"2 DATE {_date(rng, birth_year + rng.randint(1, 90))}")
+                lines.extend(_heavy_blocks(rng, heavy_blocks, sources, media))
+            lines.append(f"1 NOTE Synthetic person {person_id}")
+            lines.append("2 CONT Generated for benchmarking.")
+            if len(lines) > 10000:
+                flush()
+
+        # Pair this generation's parents into families for the generation below
+        if generation == 0:
+            continue
+        child_first, child_size = first_ids[generation - 1], sizes[generation - 1]
+        husbands = list(range(first_id, first_id + size, 2))
+        wives = list(range(first_id + 1, first_id + size, 2))
+        pairs = list(zip(husbands, wives))
+        used = []
+        children = {}
+        for child_id in range(child_first, child_first + child_size):
+            if used and (rng.random() < implex_rate or len(used) == len(pairs)):
+                pair = rng.choice(used)
+            elif pairs:
+                pair = pairs[len(used)]
+                used.append(pair)
+            else:
+                continue
+            children.setdefault(pair, []).append(child_id)
+        for (husband, wife), child_ids in children.items():
+            family_count += 1
+            families.append(f"0 @F{family_count}@ FAM")
+            families.append(f"1 HUSB @I{husband}@")
+            families.append(f"1 WIFE @I{wife}@")
+            families.extend(f"1 CHIL @I{child_id}@" for child_id in child_ids)
+            families.append("1 MARR")
+            families.append(f"2 DATE {_date(rng, 1990 - 30 * generation + 25)}")
+
+    lines.extend(families)
+    for source in range(sources):
+        lines.append(f"0 @S{source}@ SOUR")
+        lines.append(f"1 TITL Kirkebog {source}")
+    for medium in range(media):
+        lines.append(f"0 @M{medium}@ OBJE")
+        lines.append(f"1 FILE media/{medium}.jpg")
+    lines.append("0 TRLR")
+    flush()
+
+def generate_gedcom(path: str, individuals: int = 1000, generations: int = 10, implex_rate: float = 0.1,
+                    heavy_blocks: int = 0, seed: int = 1, line_ending: str = "\n",
+                    encoding: str = "utf-8", errors: Optional[str] = None) -> str:
+    """Write a synthetic GEDCOM file to ``path`` and return the path.
+
+    ``encoding`` may be any codec in CHAR_VALUES, e.g. ``utf-8-sig`` for a
+    BOM or ``cp1252``, and the HEAD declares it with the matching CHAR.
+    """
+    char = char_value(encoding)
+    with open(path, "w", encoding=encoding, errors=errors, newline="") as out:
+        write_gedcom(out, individuals, generations, implex_rate, heavy_blocks, seed, line_ending, char)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic GEDCOM file')
+    parser.add_argument('output', help='Path of the GEDCOM file to write')
+    parser.add_argument('--individuals', type=int, default=1000)
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--implex-rate', type=float, default=0.1)
+    parser.add_argument('--heavy-blocks', type=int, default=0,
+                        help='SOUR/OBJE blocks per event (default: 0)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--line-ending', choices=['lf', 'crlf', 'cr'], default='lf')
+    parser.add_argument('--encoding', default='utf-8')
+    args = parser.parse_args()
+
+    line_ending = {'lf': "\n", 'crlf': "\r\n", 'cr': "\r"}[args.line_ending]
+    generate_gedcom(args.output, args.individuals, args.generations, args.implex_rate,
+                    args.heavy_blocks, args.seed, line_ending, args.encoding)
+
+if __name__ == "__main__":
+    main()
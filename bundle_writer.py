@@ -0,0 +1,62 @@
+import zipfile
+
+class MarkdownBundle:
+    """One Markdown file holding every page, each behind its own anchor.
+
+    Pages are rendered into a list of strings and written in batches of
+    about ``buffer_size`` characters, so a large bundle costs a few big
+    writes instead of several small ones per page.
+    """
+
+    def __init__(self, path: str, markdown_generator, buffer_size: int = 1 << 20):
+        self.markdown_generator = markdown_generator
+        self.buffer_size = buffer_size
+        self._file = open(path, "w", encoding="utf-8")
+        self._parts = []
+        self._buffered = 0
+        self._first = True
+
+    def add_page(self, number: int, texts, depth: int = 4):
+        page = self.markdown_generator.render_page(number, texts, depth)
+        separator = "" if self._first else "\n---\n\n"
+        self._first = False
+        anchor = f'<a id="person-{number}"></a>\n\n'
+        self._parts += (separator, anchor, page)
+        self._buffered += len(separator) + len(anchor) + len(page)
+        if self._buffered >= self.buffer_size:
+            self._flush()
+
+    def _flush(self):
+        self._file.write("".join(self._parts))
+        self._parts.clear()
+        self._buffered = 0
+
+    def close(self):
+        self._flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ZipBundle:
+    """Zip archive of rendered pages, written one member at a time."""
+
+    def __init__(self, path: str):
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add_page(self, name: str, data: bytes):
+        # .docx pages are zip files already; compressing them again only costs time
+        compression = zipfile.ZIP_STORED if name.endswith(".docx") else zipfile.ZIP_DEFLATED
+        self._zip.writestr(name, data, compress_type=compression)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,273 @@
+import csv
+import json
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from gedcom_dates import parse_year
+from individual_store import NO_PERSON
+from name_index import normalize_name, phonetic_key
+
+# Pairs scoring at least this are reported and aliased
+DEFAULT_THRESHOLD = 0.8
+
+# Blocks with more members than this share too common a key to be
+# compared pairwise; they are counted in ``blocks_skipped`` instead
+MAX_BLOCK = 200
+
+# Weights of the evidence compared for a pair. Evidence missing on either
+# side is left out, so a pair is scored on what both records tell.
+_WEIGHTS = {"name": 0.4, "birth": 0.3, "death": 0.1, "father": 0.1, "mother": 0.1}
+
+REPORT_COLUMNS = ["score", "xref_a", "xref_b", "merge_into", "name_a", "name_b",
+                  "birth_a", "birth_b", "death_a", "death_b", "reasons"]
+
+class Duplicate(NamedTuple):
+    score: float
+    xref_a: str
+    xref_b: str
+    reasons: Tuple[str, ...]
+
+class _Profile(NamedTuple):
+    """What one individual is compared on."""
+    normalized: str
+    keys: Tuple[str, ...]  # Phonetic key per name word
+    birth_year: Optional[int]
+    death_year: Optional[int]
+    father: int
+    mother: int
+    known: int  # Number of filled fields, to pick the record to keep
+
+def _year_score(year_a: Optional[int], year_b: Optional[int]) -> Optional[float]:
+    """1 for the same year, 0.5 one year apart, -1 for a conflict, None if unknown."""
+    if year_a is None or year_b is None:
+        return None
+    difference = abs(year_a - year_b)
+    return 1.0 if difference == 0 else 0.5 if difference == 1 else -1.0
+
+class DuplicateFinder:
+    """Scores likely duplicate individuals without comparing every pair.
+
+    Each individual is put into a few blocks: phonetic given name and
+    surname with its birth year (and the next year, so records one year
+    apart meet), and phonetic given name and surname with the given names
+    of both parents. Only individuals sharing a block are scored. Block
+    keys are stored as hashes; a collision only adds a pair to score.
+    """
+
+    def __init__(self, gedcom_processor, threshold: float = DEFAULT_THRESHOLD, max_block: int = MAX_BLOCK):
+        self.individuals = gedcom_processor.individuals
+        self.threshold = threshold
+        self.max_block = max_block
+        self.blocks_skipped = 0
+        self.pairs_compared = 0
+        self._profiles: Dict[int, _Profile] = {}
+
+    def _build_profiles(self):
+        store = self.individuals
+        # Every individual is compared, so stores that load rows on demand load them all at once
+        store.load_all()
+        names: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        word_keys: Dict[str, str] = {}
+        for index, name in store.iter_names():
+            profile_name = names.get(name)
+            if profile_name is None:
+                normalized = normalize_name(name)
+                keys = []
+                for word in normalized.split():
+                    key = word_keys.get(word)
+                    if key is None:
+                        key = word_keys[word] = phonetic_key(word)
+                    keys.append(key)
+                profile_name = names[name] = (normalized, tuple(keys))
+            person = store.person(index)
+            birth_date, death_date = person.birth_date, person.death_date
+            father, mother = store.parent_indices(index)
+            known = bool(birth_date) + bool(death_date) + (father != NO_PERSON) + (mother != NO_PERSON)
+            self._profiles[index] = _Profile(profile_name[0], profile_name[1],
+                                             parse_year(birth_date) if birth_date else None,
+                                             parse_year(death_date) if death_date else None,
+                                             father, mother, known)
+
+    def _given_key(self, index: int) -> str:
+        profile = self._profiles.get(index)
+        return profile.keys[0] if profile is not None and profile.keys else ""
+
+    def candidate_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Yield each pair of store indices sharing a block once, lower index first."""
+        if not self._profiles:
+            self._build_profiles()
+        blocks: Dict[int, List[int]] = {}
+        person_blocks: Dict[int, Tuple[int, ...]] = {}
+        for index, profile in self._profiles.items():
+            if not profile.keys:
+                continue
+            given, surname = profile.keys[0], profile.keys[-1]
+            keys = []
+            if profile.birth_year is not None:
+                keys.append(hash(("born", given, surname, profile.birth_year)))
+                keys.append(hash(("born", given, surname, profile.birth_year + 1)))
+            if profile.father != NO_PERSON or profile.mother != NO_PERSON:
+                keys.append(hash(("parents", given, surname,
+                                  self._given_key(profile.father), self._given_key(profile.mother))))
+            keys.sort()
+            for key in keys:
+                blocks.setdefault(key, []).append(index)
+            person_blocks[index] = tuple(keys)
+
+        oversized = {key for key, members in blocks.items() if len(members) > self.max_block}
+        self.blocks_skipped = len(oversized)
+        for key, members in blocks.items():
+            if len(members) < 2 or key in oversized:
+                continue
+            for position, first in enumerate(members):
+                first_blocks = person_blocks[first]
+                for second in members[position + 1:]:
+                    if first == second:
+                        continue
+                    # A pair sharing several blocks is yielded from the lowest shared,
+                    # compared key only, which avoids keeping a set of every pair seen
+                    second_blocks = person_blocks[second]
+                    for shared in first_blocks:
+                        if shared in second_blocks and shared not in oversized:
+                            break
+                    if shared == key:
+                        yield (first, second) if first < second else (second, first)
+
+    def _parent_score(self, parent_a: int, parent_b: int) -> Optional[float]:
+        if parent_a == NO_PERSON or parent_b == NO_PERSON:
+            return None
+        if parent_a == parent_b:
+            return 1.0
+        profile_a, profile_b = self._profiles.get(parent_a), self._profiles.get(parent_b)
+        if profile_a is None or profile_b is None:
+            return None
+        if profile_a.normalized == profile_b.normalized:
+            return 1.0
+        return 0.5 if profile_a.keys == profile_b.keys else 0.0
+
+    def score(self, index_a: int, index_b: int) -> Optional[float]:
+        """Score one pair from 0 to 1, or None if it cannot be a duplicate."""
+        a, b = self._profiles[index_a], self._profiles[index_b]
+        if index_a in (b.father, b.mother) or index_b in (a.father, a.mother):
+            return None
+        # Years more than one apart are different people; checked first as the cheapest test
+        birth, death = _year_score(a.birth_year, b.birth_year), _year_score(a.death_year, b.death_year)
+        if (birth is not None and birth < 0) or (death is not None and death < 0):
+            return None
+        if a.normalized == b.normalized:
+            name = 1.0
+        else:
+            keys_a, keys_b = set(a.keys), set(b.keys)
+            name = len(keys_a & keys_b) / len(keys_a | keys_b)
+            if name < 0.5:
+                return None
+
+        total = _WEIGHTS["name"] * name
+        weight = _WEIGHTS["name"]
+        facts = 1
+        for field, value in (("birth", birth), ("death", death),
+                             ("father", self._parent_score(a.father, b.father)),
+                             ("mother", self._parent_score(a.mother, b.mother))):
+            if value is not None:
+                total += _WEIGHTS[field] * value
+                weight += _WEIGHTS[field]
+                facts += 1
+        # Without a birth year, a name needs two more known facts to merge on
+        if birth is None and facts < 3:
+            return None
+        return total / weight
+
+    def reasons(self, index_a: int, index_b: int) -> Tuple[str, ...]:
+        """Name the facts that agree for a scored pair, for the merge report."""
+        a, b = self._profiles[index_a], self._profiles[index_b]
+        reasons = ["same name" if a.normalized == b.normalized else "similar name"]
+        for field, value in (("birth", _year_score(a.birth_year, b.birth_year)),
+                             ("death", _year_score(a.death_year, b.death_year))):
+            if value is not None:
+                reasons.append(f"same {field} year" if value == 1.0 else f"{field} years one apart")
+        for field, value in (("father", self._parent_score(a.father, b.father)),
+                             ("mother", self._parent_score(a.mother, b.mother))):
+            if value == 1.0:
+                reasons.append(f"same {field}")
+        return tuple(reasons)
+
+    def find(self) -> List[Duplicate]:
+        """Return the pairs scoring at least ``threshold``, best first."""
+        store = self.individuals
+        duplicates = []
+        for index_a, index_b in self.candidate_pairs():
+            self.pairs_compared += 1
+            score = self.score(index_a, index_b)
+            if score is not None and score >= self.threshold:
+                duplicates.append(Duplicate(round(score, 3), store.person(index_a).id, store.person(index_b).id,
+                                            self.reasons(index_a, index_b)))
+        duplicates.sort(key=lambda duplicate: (-duplicate.score, duplicate.xref_a, duplicate.xref_b))
+        return duplicates
+
+    def alias_map(self, duplicates: List[Duplicate]) -> Dict[str, str]:
+        """Map every duplicate xref to the one record kept for its group.
+
+        Pairs are joined into groups; each group keeps the record with the
+        most filled fields, the first in the file on a tie.
+        """
+        store = self.individuals
+        joined_to: Dict[int, int] = {}  # Union-find links from a member towards its group root
+
+        def root(index: int) -> int:
+            while index in joined_to:
+                index = joined_to[index]
+            return index
+
+        indices = set()
+        for duplicate in duplicates:
+            index_a, index_b = store.xref_index(duplicate.xref_a), store.xref_index(duplicate.xref_b)
+            indices.update((index_a, index_b))
+            first, second = root(index_a), root(index_b)
+            if first != second:
+                joined_to[max(first, second)] = min(first, second)
+
+        members: Dict[int, List[int]] = {}
+        for index in indices:
+            members.setdefault(root(index), []).append(index)
+        aliases = {}
+        for group in members.values():
+            kept = min(group, key=lambda index: (-self._profiles[index].known, index))
+            for index in group:
+                if index != kept:
+                    aliases[store.person(index).id] = store.person(kept).id
+        return aliases
+
+def write_report(gedcom_processor, duplicates: List[Duplicate], aliases: Dict[str, str], path: str):
+    """Write the scored pairs as CSV, with the xref each pair is merged into."""
+    individuals = gedcom_processor.individuals
+    with open(path, "w", newline="", encoding="utf-8") as report:
+        writer = csv.writer(report)
+        writer.writerow(REPORT_COLUMNS)
+        for duplicate in duplicates:
+            a, b = individuals[duplicate.xref_a], individuals[duplicate.xref_b]
+            merge_into = aliases.get(duplicate.xref_a, aliases.get(duplicate.xref_b, duplicate.xref_a))
+            writer.writerow([duplicate.score, duplicate.xref_a, duplicate.xref_b, merge_into, a.name, b.name,
+                             a.birth_date, b.birth_date, a.death_date, b.death_date, "; ".join(duplicate.reasons)])
+
+def write_aliases(aliases: Dict[str, str], path: str):
+    with open(path, "w", encoding="utf-8") as alias_file:
+        json.dump(aliases, alias_file, indent=2, sort_keys=True)
+        alias_file.write("\n")
+
+def load_aliases(path: str) -> Dict[str, str]:
+    with open(path, encoding="utf-8") as alias_file:
+        return json.load(alias_file)
+
+def find_duplicates(gedcom_processor, report_path: str, aliases_path: Optional[str] = None,
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Duplicate]:
+    """Detect duplicates and write the merge report and, optionally, the alias map (--find-duplicates)."""
+    finder = DuplicateFinder(gedcom_processor, threshold)
+    duplicates = finder.find()
+    aliases = finder.alias_map(duplicates)
+    write_report(gedcom_processor, duplicates, aliases, report_path)
+    if aliases_path:
+        write_aliases(aliases, aliases_path)
+    print(f"Compared {finder.pairs_compared} candidate pairs; {len(duplicates)} likely duplicates, "
+          f"{len(aliases)} xrefs to merge")
+    if finder.blocks_skipped:
+        print(f"Skipped {finder.blocks_skipped} blocks with more than {finder.max_block} members")
+    return duplicates
@@ -0,0 +1,104 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# The first free-standing group of three or four digits is the year in
+# every form seen in our files: "1 JAN 1900", "28.10.1916", "ABT 1850",
+# "BET 1850 AND 1860" (the first year) and "1750/51" (the old style year)
+_YEAR = re.compile(r"(?<!\d)(\d{3,4})(?!\d)")
+
+@lru_cache(maxsize=1 << 16)
+def parse_year(date: str) -> Optional[int]:
+    """Return the year of a GEDCOM date value, or None if it has none.
+
+    Cached, since the same date strings recur across a file.
+    """
+    match = _YEAR.search(date)
+    return int(match.group(1)) if match else None
+
+# Dates that only bound the year, e.g. "BEF 1850" or "BET 1850 AND 1860"
+_BOUNDED = re.compile(r"\b(?:BEF|AFT|BET|FROM|TO)\b", re.IGNORECASE)
+
+@lru_cache(maxsize=1 << 16)
+def exact_year(date: str) -> Optional[int]:
+    """Return the year of ``date`` if it names one year, else None.
+
+    Approximate dates (ABT, EST, CAL) count as their year; ranges and
+    bounds do not, so comparisons between dates never rest on a guess.
+    """
+    if _BOUNDED.search(date):
+        return None
+    return parse_year(date)
+
+# Qualifiers of a parsed date, from most to least precise
+EXACT, ABOUT, RANGE, BEFORE, AFTER = range(5)
+
+_APPROXIMATE = {"ABT": ABOUT, "EST": ABOUT, "CAL": ABOUT, "INT": ABOUT, "BEF": BEFORE, "AFT": AFTER}
+
+MONTHS = {"JAN": 1, "FEB": 2, "MAR": 3, "APR": 4, "MAY": 5, "JUN": 6,
+          "JUL": 7, "AUG": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DEC": 12,
+          "MAJ": 5, "OKT": 10}  # Danish spellings seen in hand-typed dates
+
+_QUALIFIER = re.compile(r"\s*(ABT|EST|CAL|INT|BEF|AFT|BET|FROM|TO)\b\.?\s*(.*)", re.IGNORECASE)
+_RANGE_END = re.compile(r"\s+(?:AND|TO)\s+", re.IGNORECASE)
+_ISO = re.compile(r"(?<!\d)(\d{4})-(\d{1,2})-(\d{1,2})(?!\d)")
+_NUMERIC = re.compile(r"(?<!\d)(\d{1,2})[./-](\d{1,2})[./-](\d{3,4})(?!\d)")
+_WORDS = re.compile(r"(?:(?<!\d)(\d{1,2}) +)?([A-Za-z]{3})[A-Za-z]*\.? +(\d{3,4})(?!\d)")
+
+class DateValue(NamedTuple):
+    """A GEDCOM date in numeric form; a month or day of 0 is unknown."""
+    year: int
+    month: int
+    day: int
+    qualifier: int
+    last_year: int  # The second year of a range, else ``year``
+
+def _date_parts(text: str) -> Optional[Tuple[int, int, int]]:
+    match = _ISO.search(text)
+    if match:
+        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    else:
+        match = _NUMERIC.search(text)
+        if match:
+            day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        else:
+            match = _WORDS.search(text)
+            month = MONTHS.get(match.group(2).upper(), 0) if match else 0
+            if month:
+                day, year = int(match.group(1) or 0), int(match.group(3))
+            else:
+                year = parse_year(text)
+                if year is None:
+                    return None
+                month = day = 0
+    if not 1 <= month <= 12:
+        month = day = 0
+    elif not 1 <= day <= 31:
+        day = 0
+    return year, month, day
+
+@lru_cache(maxsize=1 << 16)
+def parse_date(date: str) -> Optional[DateValue]:
+    """Parse a GEDCOM date value, or return None if it names no year.
+
+    Partial dates ("JAN 1900", "1900") leave the unknown parts 0, and
+    the qualifier tells exact dates from approximate ones, ranges
+    ("BET 1850 AND 1860", "FROM 1850 TO 1860") and bounds ("BEF 1850").
+    """
+    qualifier, first, second = EXACT, date, ""
+    match = _QUALIFIER.match(date)
+    if match:
+        word, rest = match.group(1).upper(), match.group(2)
+        if word in ("BET", "FROM"):
+            first, *end = _RANGE_END.split(rest, maxsplit=1)
+            second = end[0] if end else ""
+            qualifier = RANGE if second else AFTER
+        elif word == "TO":
+            first, qualifier = rest, BEFORE
+        else:
+            first, qualifier = rest, _APPROXIMATE[word]
+    parts = _date_parts(first)
+    if parts is None:
+        return None
+    last = _date_parts(second) if second else None
+    return DateValue(*parts, qualifier, last[0] if last else parts[0])
@@ -0,0 +1,125 @@
+import codecs
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable
+
+# Bytes read from the start of a file to find the HEAD record's CHAR line
+HEAD_BYTES = 1 << 16
+
+# CHAR values seen in GEDCOM files, mapped to the codec they are read with.
+# ASCII files are read as Windows-1252, since the 8-bit bytes found in
+# files declared ASCII nearly always come from a Windows program.
+CHARSETS = {
+    "UTF-8": "utf-8",
+    "UTF8": "utf-8",
+    "ANSEL": "ansel",
+    "ANSI": "cp1252",
+    "WINDOWS-1252": "cp1252",
+    "CP1252": "cp1252",
+    "IBM WINDOWS": "cp1252",
+    "ASCII": "cp1252",
+    "IBMPC": "cp850",
+    "IBM DOS": "cp850",
+    "MACINTOSH": "mac_roman",
+    "LATIN1": "latin-1",
+    "ISO-8859-1": "latin-1",
+    "ISO8859-1": "latin-1",
+}
+
+# Two bytes per character; these files are transcoded to UTF-8 while read,
+# since the scanner looks for single byte line starts
+WIDE_ENCODINGS = ("utf-16-le", "utf-16-be")
+
+_CHAR = re.compile(rb"[\r\n][ \t]*1 CHAR[ \t]+([^\r\n]*)")
+_HEAD_END = re.compile(rb"[\r\n][ \t]*0 ")
+
+# ANSEL (ANSI Z39.47) bytes above 0x7F, with the GEDCOM additions.
+# 0xE0-0xFE are combining marks, which ANSEL puts before the base letter.
+_ANSEL_SPACING = {
+    0x88: "", 0x89: "", 0x8D: "\u200d", 0x8E: "\u200c",
+    0xA1: "Ł", 0xA2: "Ø", 0xA3: "Đ", 0xA4: "Þ", 0xA5: "Æ", 0xA6: "Œ", 0xA7: "\u02b9", 0xA8: "·",
+    0xA9: "\u266d", 0xAA: "®", 0xAB: "±", 0xAC: "Ơ", 0xAD: "Ư", 0xAE: "\u02bc", 0xB0: "\u02bb",
+    0xB1: "ł", 0xB2: "ø", 0xB3: "đ", 0xB4: "þ", 0xB5: "æ", 0xB6: "œ", 0xB7: "\u02ba", 0xB8: "ı",
+    0xB9: "£", 0xBA: "ð", 0xBC: "ơ", 0xBD: "ư", 0xBE: "\u25a1", 0xBF: "\u25a0",
+    0xC0: "°", 0xC1: "\u2113", 0xC2: "\u2117", 0xC3: "©", 0xC4: "\u266f", 0xC5: "¿", 0xC6: "¡", 0xC7: "ß",
+    0xC8: "\u20ac", 0xCD: "e", 0xCE: "o", 0xCF: "ß",
+}
+_ANSEL_COMBINING = {
+    0xE0: "\u0309", 0xE1: "\u0300", 0xE2: "\u0301", 0xE3: "\u0302", 0xE4: "\u0303", 0xE5: "\u0304",
+    0xE6: "\u0306", 0xE7: "\u0307", 0xE8: "\u0308", 0xE9: "\u030c", 0xEA: "\u030a", 0xEB: "\ufe20",
+    0xEC: "\ufe21", 0xED: "\u0315", 0xEE: "\u030b", 0xEF: "\u0310", 0xF0: "\u0327", 0xF1: "\u0328",
+    0xF2: "\u0323", 0xF3: "\u0324", 0xF4: "\u0325", 0xF5: "\u0333", 0xF6: "\u0332", 0xF7: "\u0326",
+    0xF8: "\u031c", 0xF9: "\u032e", 0xFA: "\ufe22", 0xFB: "\ufe23", 0xFE: "\u0313",
+}
+
+# str.translate table from the Latin-1 reading of a byte to its ANSEL character
+_ANSEL_TABLE = {byte: _ANSEL_SPACING.get(byte, _ANSEL_COMBINING.get(byte, "\ufffd")) for byte in range(0x80, 0x100)}
+
+_HAS_COMBINING = re.compile(rb"[\xe0-\xfe]")
+_LEADING_MARKS = re.compile("([%s]+)(.)" % "".join(_ANSEL_COMBINING.values()), re.DOTALL)
+
+def decode_ansel(value: bytes) -> str:
+    """Decode ANSEL bytes, e.g. ``b"\\xeaAse"`` to ``"Åse"``.
+
+    Bytes are mapped through a table; combining marks are then moved
+    behind the letter they belong to and composed with NFC.
+    """
+    if value.isascii():
+        return value.decode("ascii")
+    text = value.decode("latin-1").translate(_ANSEL_TABLE)
+    if _HAS_COMBINING.search(value):
+        text = unicodedata.normalize("NFC", _LEADING_MARKS.sub(r"\2\1", text))
+    return text
+
+def _cp1252_fallback(error: UnicodeDecodeError):
+    # Files declared UTF-8 often have a few Windows-1252 values pasted in
+    return error.object[error.start:error.end].decode("cp1252", "replace"), error.end
+
+codecs.register_error("gedcom-cp1252", _cp1252_fallback)
+
+def decode_utf8(value: bytes) -> str:
+    try:
+        return value.decode()
+    except UnicodeDecodeError:
+        return value.decode("utf-8", "gedcom-cp1252")
+
+def detect_encoding(head: bytes) -> str:
+    """Return the codec for a GEDCOM file beginning with ``head``.
+
+    A byte order mark decides; otherwise the CHAR line of the HEAD record
+    does. Files without either are read as UTF-8.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(b"0\x00"):
+        return "utf-16-le"
+    if head.startswith(codecs.BOM_UTF16_BE) or head.startswith(b"\x000"):
+        return "utf-16-be"
+    head_end = _HEAD_END.search(head, 1)
+    match = _CHAR.search(head, 0, head_end.start() if head_end else len(head))
+    if match is None:
+        return "utf-8"
+    return CHARSETS.get(match.group(1).strip().upper().decode("ascii", "replace"), "utf-8")
+
+def file_encoding(gedcom_file: str) -> str:
+    """Detect the encoding of ``gedcom_file`` from its first bytes."""
+    with open(gedcom_file, "rb") as gedcom:
+        return detect_encoding(gedcom.read(HEAD_BYTES))
+
+@lru_cache(maxsize=None)
+def decoder(encoding: str) -> Callable[[bytes], str]:
+    """Return the function decoding values read from a file in ``encoding``.
+
+    Files in a WIDE_ENCODINGS codec are transcoded by read_record_blocks,
+    so their values are UTF-8. Undecodable bytes never raise: UTF-8 falls
+    back to Windows-1252 and other codecs use the replacement character.
+    """
+    if encoding == "ansel":
+        return decode_ansel
+    if encoding == "utf-8" or encoding in WIDE_ENCODINGS:
+        return decode_utf8
+
+    def decode(value: bytes) -> str:
+        return value.decode(encoding, "replace")
+    return decode
@@ -0,0 +1,137 @@
+import mmap
+import os
+import re
+import time
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+from ahnentafel import Ahnentafel
+from gedcom_encoding import WIDE_ENCODINGS, file_encoding
+from gedcom_processor import scan_records
+from record_index import RecordIndex, load_record_index
+
+# HEAD lines copied from the input; the rest of HEAD describes the file
+# it came from and is written anew
+KEPT_HEAD_TAGS = (b"GEDC", b"CHAR", b"LANG", b"SUBM", b"SUBN")
+
+DEFAULT_HEAD_TAGS = {b"GEDC": b"1 GEDC\n2 VERS 5.5.1\n2 FORM LINEAGE-LINKED\n", b"CHAR": b"1 CHAR UTF-8\n"}
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+# A line whose whole value is a pointer, e.g. "2 SOUR @S1@"; lines may end in LF, CRLF or CR
+_POINTER = re.compile(rb"(?:^|(?<=\r))[0-9]+ [A-Za-z0-9_]+ (@[^@#\s]+@)(?=[\r\n]|\Z)", re.MULTILINE)
+
+class ExportSummary(NamedTuple):
+    individuals: int
+    families: int
+    other_records: int  # SOUR, OBJE, NOTE, REPO and SUBM records pointed to
+    bytes_written: int
+
+def _head_chunks(head: bytes) -> dict:
+    """Return the level-1 lines of HEAD with their subtrees, by tag."""
+    chunks = {}
+    lines = head.replace(b"\r\n", b"\n").replace(b"\r", b"\n").split(b"\n1 ")
+    for chunk in lines[1:]:
+        tag = chunk.split(b" ", 1)[0].split(b"\n", 1)[0]
+        if tag in KEPT_HEAD_TAGS and tag not in chunks:
+            chunks[tag] = b"1 " + chunk.rstrip(b"\n") + b"\n"
+    return chunks
+
+def _new_head(head: bytes, output_path: str) -> bytes:
+    today = time.localtime()
+    lines = [b"0 HEAD\n1 SOUR Gedkonvertering\n",
+             f"1 DATE {today.tm_mday} {MONTHS[today.tm_mon - 1]} {today.tm_year}\n".encode(),
+             f"1 FILE {os.path.basename(output_path)}\n".encode()]
+    chunks = _head_chunks(head)
+    for tag in KEPT_HEAD_TAGS:
+        chunk = chunks.get(tag, DEFAULT_HEAD_TAGS.get(tag))
+        if chunk:
+            lines.append(chunk)
+    return b"".join(lines)
+
+def ancestor_xrefs(gedcom_processor, roots: Iterable, generations: Optional[int] = None) -> Set[str]:
+    """Return the xrefs of ``roots`` and all their ancestors, as the tree walk finds them."""
+    xrefs = set()
+    for root in roots:
+        xrefs.update(person.id for _, person in Ahnentafel(gedcom_processor, root, generations).ancestors())
+    return xrefs
+
+def _connecting_families(index: RecordIndex, buffer, individuals: Set[str]) -> Set[str]:
+    """Return the FAM records in which a member of ``individuals`` is a child of another member."""
+    families = set()
+    for xref in individuals:
+        for family_id in index.child_families.get(xref, ()):
+            if family_id in families:
+                continue
+            offset, length = index.span(family_id)
+            for kind, _, (husband, wife, _) in scan_records(buffer[offset:offset + length]):
+                if kind == "FAM" and (husband in individuals or wife in individuals):
+                    families.add(family_id)
+    return families
+
+def _referenced_records(index: RecordIndex, buffer, spans: List[tuple]) -> Set[str]:
+    """Return the non-INDI/FAM records pointed to from ``spans``, following their own pointers."""
+    referenced = set()
+    pending = list(spans)
+    while pending:
+        offset, length = pending.pop()
+        for match in _POINTER.finditer(buffer, offset, offset + length):
+            xref = match.group(1).decode('utf-8', 'replace')
+            if xref in referenced or index.tag_of(xref) in (None, "INDI", "FAM"):
+                continue
+            referenced.add(xref)
+            pending.append(index.span(xref))
+    return referenced
+
+def export_ancestors(gedcom_processor, gedcom_file: str, roots: Iterable, output_path: str,
+                     generations: Optional[int] = None) -> ExportSummary:
+    """Write the ancestors of ``roots`` as a GEDCOM file to ``output_path`` (--export-gedcom).
+
+    The output holds the INDI records of the roots and their ancestors,
+    the FAM records linking them to their parents and the SOUR, OBJE,
+    NOTE, REPO and SUBM records these point to. Records are copied byte
+    for byte from a memory map of the input, in file order, so their
+    encoding and line endings are kept; only HEAD and TRLR are written
+    anew. Pointers to individuals and families left out of the subset,
+    such as siblings' CHIL lines, stay as they are.
+
+    The record offsets come from the ``--index`` record index, which is
+    built and stored beside ``gedcom_file`` if needed.
+    """
+    if file_encoding(gedcom_file) in WIDE_ENCODINGS:
+        raise ValueError("UTF-16 files cannot be exported by byte range")
+    index = getattr(gedcom_processor.individuals, "index", None)
+    if not isinstance(index, RecordIndex):
+        index = load_record_index(gedcom_file)
+
+    individuals = ancestor_xrefs(gedcom_processor, roots, generations)
+    with open(gedcom_file, 'rb') as gedcom, mmap.mmap(gedcom.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        families = _connecting_families(index, buffer, individuals)
+        spans = [index.span(xref) for xref in individuals | families]
+        head_span = next(((offset, length) for tag, offset, length in zip(index.tags, index.offsets, index.lengths)
+                          if tag == "HEAD"), (0, 0))
+        head = buffer[head_span[0]:head_span[0] + head_span[1]]
+        other = _referenced_records(index, buffer, spans + [head_span])
+        spans.extend(index.span(xref) for xref in other)
+        spans.sort()
+
+        newline = b"\r\n" if b"\r\n" in head else index.line_break
+        view = memoryview(buffer)
+        written = 0
+        temp_file = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'wb') as output:
+                if buffer[:3] == b"\xef\xbb\xbf":
+                    written += output.write(b"\xef\xbb\xbf")
+                written += output.write(_new_head(head, output_path).replace(b"\n", newline))
+                for offset, length in spans:
+                    written += output.write(view[offset:offset + length])
+                    if buffer[offset + length - 1:offset + length] not in (b"\n", b"\r"):
+                        written += output.write(newline)
+                written += output.write(b"0 TRLR" + newline)
+            os.replace(temp_file, output_path)
+        finally:
+            view.release()
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    return ExportSummary(len(individuals), len(families), len(other), written)
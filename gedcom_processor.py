@@ -5,148 +5,475 @@ print(f"Python path: {sys.path}")
 print(f"Site packages: {site.getsitepackages()}")
 
 
-from typing import Dict, Optional, Tuple, List, NamedTuple
+from typing import Dict, Optional, Tuple, List, NamedTuple, Iterable, Iterator, BinaryIO, Callable, Union
+import codecs
 import os
 import argparse
-from docx import Document
-from docx.shared import Inches, Pt, Cm
-from docx.enum.section import WD_ORIENTATION
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-
-class Individual:
-    def __init__(self, id: str):
-        self.id = id
-        self.name = ""
-        self.birth_date = ""
-        self.death_date = ""
-        self.father_id = None
-        self.mother_id = None
+from functools import lru_cache
+from metrics import Metrics
+from output_formats import format_names
+from individual_store import Individual, IndividualStore
+from gedcom_encoding import WIDE_ENCODINGS, decoder, file_encoding
+
+# Tag paths read from INDI records, by field name. The first three are
+# always read; generators that need more (e.g. "sex": ("SEX",) or
+# "birth_place": ("BIRT", "PLAC")) add them through GedcomProcessor's
+# extra_fields. Everything not on a path is skipped without tokenising.
+INDIVIDUAL_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "name": ("NAME",),
+    "birth_date": ("BIRT", "DATE"),
+    "death_date": ("DEAT", "DATE"),
+}
+
+FAMILY_TAGS = ("HUSB", "WIFE", "CHIL")
+
+class _TagNode:
+    """The projected tags expected one level below a matched tag.
+
+    ``children`` maps a tag to a child node or to a position in the INDI
+    data list. ``markers`` are the same tags as they appear at the start
+    of a line, ``closers`` the line starts that end this subtree,
+    ``continued`` the start of a CONC or CONT line continuing a value at
+    this level and ``positions`` the data positions filled from it.
+    Markers are bytes, since records are scanned before decoding.
+    ``position`` is where the value of the matched tag's own line goes
+    when a path also ends there (as "name" does above NAME.SURN), or -1.
+    """
+    __slots__ = ("level", "children", "markers", "closers", "continued", "positions", "position", "surname")
+
+    def __init__(self, level: int):
+        self.level = level
+        self.children: Dict[str, object] = {}
+        self.position = -1
+        self.surname = -1  # A SURN leaf below a projected NAME; see _project_value
+        self.markers: Tuple[Tuple[bytes, object], ...] = ()
+        self.closers: Tuple[bytes, ...] = ()
+        self.continued = b""
+        self.positions: Tuple[int, ...] = ()  # data positions of all leaves below
+
+    def freeze(self):
+        self.markers = tuple((f"\n{self.level} {tag}".encode(), target) for tag, target in self.children.items())
+        self.closers = tuple(f"\n{level} ".encode() for level in range(1, self.level))
+        self.continued = f"\n{self.level + 1} CON".encode()
+        surname = self.children.get("SURN")
+        if type(surname) is int and self.position != -1:
+            self.surname = surname
+        positions = [self.position] if self.position != -1 else []
+        for child in self.children.values():
+            if isinstance(child, _TagNode):
+                child.freeze()
+                positions.extend(child.positions)
+            else:
+                positions.append(child)
+        self.positions = tuple(positions)
+
+@lru_cache(maxsize=32)
+def _projection(paths: Tuple[Tuple[str, ...], ...]) -> _TagNode:
+    """Build the tag trie for ``paths``; leaves are positions in the INDI data list."""
+    trie = _TagNode(1)
+    for position, path in enumerate(paths):
+        node = trie
+        for tag in path[:-1]:
+            child = node.children.get(tag)
+            if not isinstance(child, _TagNode):
+                # A tag ending one path and leading on to another keeps its own value
+                leaf, child = child, _TagNode(node.level + 1)
+                node.children[tag] = child
+                if leaf is not None:
+                    child.position = leaf
+            node = child
+        child = node.children.get(path[-1])
+        if isinstance(child, _TagNode):
+            child.position = position
+        else:
+            node.children[path[-1]] = position
+    trie.freeze()
+    return trie
+
+def _field_paths(fields: Optional[Dict[str, Tuple[str, ...]]]) -> Tuple[Tuple[str, ...], ...]:
+    return tuple((INDIVIDUAL_FIELDS if fields is None else fields).values())
+
+def name_surname(name: str) -> str:
+    """Return the surname of a raw NAME value, the part between slashes."""
+    parts = name.split('/')
+    return parts[1].strip() if len(parts) > 1 else ""
+
+def _project_value(values: list, position: int, value: str, name_positions, surname: int = -1):
+    """Store a projected value at ``position``; names are stored without slashes.
+
+    ``surname`` is the position of a SURN field below this NAME, which
+    gets the part between the slashes unless a SURN line gives it.
+    """
+    if position in name_positions:
+        if surname != -1:
+            values[surname] = name_surname(value)
+        value = value.replace('/', '').strip()
+    values[position] = value
+
+def iter_records(lines: Iterable[str], fields: Optional[Dict[str, Tuple[str, ...]]] = None
+                 ) -> Iterator[Tuple[str, str, list]]:
+    """Tokenise GEDCOM lines in a single pass and yield INDI and FAM records.
+
+    INDI records are yielded as ``("INDI", xref, values)`` with one value
+    per entry of ``fields`` (default INDIVIDUAL_FIELDS, so
+    ``[name, birth_date, death_date]``), and FAM records as
+    ``("FAM", xref, [husband_id, wife_id, children])``. CONC and CONT
+    lines below a projected value are joined onto it. Each record is
+    yielded once its last line has been read, so only the record being
+    built is held in memory. ``scan_records`` gives the same result from
+    text much faster; this line by line form also accepts indented lines.
+    """
+    paths = _field_paths(fields)
+    trie = _projection(paths)
+    name_positions = {position for position, path in enumerate(paths) if path[-1] == "NAME"}
+
+    kind = None
+    xref = None
+    data = None
+    nodes = [trie]  # nodes[n] holds the projected tags expected at level n + 1
+    skip_level = 0  # Lines deeper than this are not projected
+    pieces = None  # Parts of a projected value that CONC/CONT lines may continue
+    pieces_target = pieces_level = 0
+    pieces_surname = -1
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        parts = line.split(' ', 2)
+        if len(parts) < 2:
+            continue
+
+        try:
+            level = int(parts[0])
+        except ValueError:
+            continue
+
+        tag_or_id = parts[1]
+        remaining = parts[2] if len(parts) > 2 else ""
+
+        if pieces is not None:
+            if level == pieces_level and tag_or_id in ("CONC", "CONT"):
+                if tag_or_id == "CONT":
+                    pieces.append("\n")
+                pieces.append(remaining)
+                continue
+            # Set before any SURN line below it, which then wins over the slashes
+            _project_value(data, pieces_target, "".join(pieces), name_positions, pieces_surname)
+            pieces = None
+
+        if level > skip_level:
+            continue
+
+        if level == 0:
+            if kind:
+                yield kind, xref, data
+
+            del nodes[1:]
+            if remaining == "INDI":
+                kind, xref, data = "INDI", tag_or_id, [""] * len(paths)
+                skip_level = 1
+            elif remaining == "FAM":
+                kind, xref, data = "FAM", tag_or_id, [None, None, []]
+                skip_level = 1
+            else:
+                kind, xref, data = None, None, None
+                skip_level = 0
+
+        # Process individual data
+        elif kind == "INDI":
+            del nodes[level:]
+            target = nodes[-1].children.get(tag_or_id)
+            skip_level = level
+            if isinstance(target, _TagNode):
+                nodes.append(target)
+                skip_level = level + 1
+                if target.position != -1:
+                    pieces, pieces_target, pieces_level = [remaining], target.position, level + 1
+                    pieces_surname = target.surname
+            elif target is not None:
+                pieces, pieces_target, pieces_level = [remaining], target, level + 1
+                pieces_surname = -1
+
+        # Process family data
+        elif kind == "FAM":
+            if tag_or_id == "HUSB":
+                data[0] = remaining
+            elif tag_or_id == "WIFE":
+                data[1] = remaining
+            elif tag_or_id == "CHIL":
+                data[2].append(remaining)
+
+    if pieces is not None:
+        _project_value(data, pieces_target, "".join(pieces), name_positions, pieces_surname)
+    if kind:
+        yield kind, xref, data
+
+def _line_value(data: bytes, tag_end: int, end: int, continued: bytes = b"") -> bytes:
+    """Return the raw value of the line whose tag ends at ``tag_end``.
+
+    Lines starting with ``continued`` (a CONC or CONT one level down) are
+    joined onto the value, collected in a list so long notes stay linear.
+    """
+    line_end = data.find(b"\n", tag_end, end)
+    if line_end == -1:
+        line_end = end
+    # Same as the third field of line.strip().split(' ', 2)
+    value = data[tag_end + 1:line_end].rstrip() if data[tag_end:tag_end + 1] == b" " else b""
+    if not continued or not data.startswith(continued, line_end):
+        return value
+
+    pieces = [value]
+    while data.startswith(continued, line_end):
+        tag_end = line_end + len(continued) + 1
+        kind, separator = data[tag_end - 1:tag_end], data[tag_end:tag_end + 1]
+        if kind not in (b"C", b"T") or separator not in (b" ", b"\n", b""):
+            break
+        line_end = data.find(b"\n", tag_end, end)
+        if line_end == -1:
+            line_end = end
+        if kind == b"T":
+            pieces.append(b"\n")
+        pieces.append(data[tag_end + 1:line_end].rstrip())
+    # Joined before decoding, so a character split over two lines survives
+    return b"".join(pieces)
+
+# What may follow a tag: its value, the next line or the end of the text.
+# Compared as a tuple, as ``in`` on a bytes object is a slower substring search.
+_TAG_ENDS = (b" ", b"\n", b"")
+
+def _last_tag(data: bytes, marker: bytes, start: int, end: int) -> int:
+    """Return where the last line starting with tag ``marker`` ends its tag, or -1."""
+    while True:
+        position = data.rfind(marker, start, end)
+        if position == -1:
+            return -1
+        tag_end = position + len(marker)
+        # "\n1 BIRT" must not match "\n1 BIRTH"
+        if data[tag_end:tag_end + 1] in _TAG_ENDS:
+            return tag_end
+        end = position
+
+def _scan_node(data: bytes, start: int, end: int, node: _TagNode, values: list, name_positions, decode):
+    # Later values win, so each tag is searched for from the end of the
+    # subtree backwards and the first match settles its field
+    for marker, target in node.markers:
+        limit = end
+        while True:
+            tag_end = _last_tag(data, marker, start, limit)
+            if tag_end == -1:
+                break
+            if type(target) is int:
+                if values[target] is None:
+                    _project_value(values, target, decode(_line_value(data, tag_end, end, node.continued)),
+                                   name_positions)
+                break
+
+            # The subtree ends at the next line at this level or above
+            subtree_end = end
+            for closer in target.closers:
+                closer_at = data.find(closer, tag_end, subtree_end)
+                if closer_at != -1:
+                    subtree_end = closer_at
+            _scan_node(data, tag_end, subtree_end, target, values, name_positions, decode)
+            if target.position != -1 and values[target.position] is None:
+                # Read after the subtree, so the slashes stand in only for a missing SURN
+                surname = target.surname if target.surname != -1 and values[target.surname] is None else -1
+                _project_value(values, target.position, decode(_line_value(data, tag_end, subtree_end, node.continued)),
+                               name_positions, surname)
+            for position in target.positions:
+                if values[position] is None:
+                    # Fields left unset may come from an earlier occurrence
+                    limit = tag_end - len(marker)
+                    break
+            else:
+                break
+
+def scan_records(text: Union[str, bytes], fields: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 decode: Optional[Callable[[bytes], str]] = None) -> Iterator[Tuple[str, str, list]]:
+    """Yield the same records as ``iter_records`` from GEDCOM text or bytes.
+
+    Records are split at level-0 lines, and only the projected tags are
+    looked up inside each record with ``bytes.find``, so SOUR, OBJE, NOTE
+    and other unprojected subtrees are never split into lines. Raw bytes
+    are scanned as they are and only the xrefs and projected values are
+    decoded, with ``decode`` (see ``gedcom_encoding.decoder``; UTF-8 by
+    default). Text is encoded to UTF-8 first.
+    """
+    if isinstance(text, str):
+        data, decode = text.encode('utf-8'), decoder("utf-8")
+    else:
+        data, decode = text, decode or decoder("utf-8")
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    if b"\n " in data or b"\n\t" in data:
+        # Indented lines need the tokenising parser
+        yield from iter_records(decode(data).splitlines(), fields)
+        return
+
+    paths = _field_paths(fields)
+    trie = _projection(paths)
+    width = len(paths)
+    name_positions = {position for position, path in enumerate(paths) if path[-1] == "NAME"}
+
+    start = 0
+    length = len(data)
+    while start < length:
+        end = data.find(b"\n0 ", start)
+        if end == -1:
+            end = length
+        header_end = data.find(b"\n", start, end)
+        if header_end == -1:
+            header_end = end
+        parts = data[start:header_end].strip().split(b' ', 2)
+        start = end + 1
+
+        if len(parts) < 3 or parts[0] != b"0":
+            continue
+        if parts[2] == b"INDI":
+            values = [None] * width
+            _scan_node(data, header_end, end, trie, values, name_positions, decode)
+            if None in values:
+                values = ["" if value is None else value for value in values]
+            yield "INDI", decode(parts[1]), values
+        elif parts[2] == b"FAM":
+            husband = _last_tag(data, b"\n1 HUSB", header_end, end)
+            wife = _last_tag(data, b"\n1 WIFE", header_end, end)
+            children = []
+            position = data.find(b"\n1 CHIL", header_end, end)
+            while position != -1:
+                tag_end = position + 7
+                if tag_end == length or data[tag_end] in b" \n":
+                    children.append(decode(_line_value(data, tag_end, end)))
+                position = data.find(b"\n1 CHIL", tag_end, end)
+            yield "FAM", decode(parts[1]), [None if husband == -1 else decode(_line_value(data, husband, end)),
+                                            None if wife == -1 else decode(_line_value(data, wife, end)),
+                                            children]
+
+def _line_count(block: bytes) -> int:
+    # Files with bare CR line endings have no LF at all
+    ending = b"\n" if b"\n" in block else b"\r"
+    return block.count(ending) + (not block.endswith(ending))
+
+def _last_record_start(block: bytes) -> int:
+    """Return where the last level-0 line after a line break in ``block`` starts, or 0."""
+    # Both LF (also ending CRLF lines) and bare CR line endings occur
+    return max(block.rfind(b"\n0 "), block.rfind(b"\r0 ")) + 1
+
+def read_record_blocks(gedcom: BinaryIO, block_size: int = 1 << 20, encoding: str = "utf-8") -> Iterator[bytes]:
+    """Read ``gedcom`` in blocks of about ``block_size`` that end between records.
+
+    Blocks are raw bytes without a leading byte order mark; files in one
+    of the WIDE_ENCODINGS are transcoded to UTF-8 on the way.
+    """
+    transcoder = codecs.getincrementaldecoder(encoding)() if encoding in WIDE_ENCODINGS else None
+    # Blocks read since the last cut, joined only when one is yielded, so
+    # a record longer than a block is not copied once per block
+    carry: List[bytes] = []
+    first = True
+    while True:
+        raw = gedcom.read(block_size)
+        block = raw if transcoder is None else transcoder.decode(raw, not raw).encode('utf-8')
+        if first:
+            block = block[len(codecs.BOM_UTF8):] if block.startswith(codecs.BOM_UTF8) else block
+            first = False
+        if not raw:
+            carry.append(block)
+            break
+        # A line break split between two blocks only moves the cut to a later record
+        cut = _last_record_start(block)
+        if not cut:
+            carry.append(block)
+            continue
+        carry.append(block[:cut])
+        yield b"".join(carry)
+        carry = [block[cut:]]
+    rest = b"".join(carry)
+    if rest:
+        yield rest
 
 class GedcomProcessor:
-    def __init__(self, gedcom_file: str):
-        self.individuals: Dict[str, Individual] = {}
+    def __init__(self, gedcom_file: str, extra_fields: Optional[Dict[str, Tuple[str, ...]]] = None):
+        # Tag paths read from each INDI record; see INDIVIDUAL_FIELDS
+        self.fields: Dict[str, Tuple[str, ...]] = {**INDIVIDUAL_FIELDS, **(extra_fields or {})}
+        self.individuals: IndividualStore = IndividualStore(self.extra_fields)
         self.person_numbers: Dict[str, int] = {}
         self.current_number = 1
+        self._name_index = None
+        self.aliases: Dict[str, str] = {}  # Duplicate xref -> xref walked in its place
+        # With keep_families set, a parse keeps every family as (husband_id, wife_id, children)
+        # in families once it has linked the parents, for checks that need them all
+        self.keep_families = False
+        self.families: Optional[Dict[str, tuple]] = None
+        self.metrics = Metrics()  # Disabled unless main() enables --metrics-json or --profile
     
     def _parse_gedcom(self, gedcom_file: str):
-        gedcom_text = open(gedcom_file, 'r', encoding='utf-8').read()
+        # Individuals and families are read in one streaming pass; family
+        # links are kept in a pending table and resolved once all
+        # individuals are known.
+        # The file is read as bytes in large blocks that end between
+        # records, and each block is scanned only for the projected tags;
+        # only their values are decoded, in the encoding the file declares.
+        encoding = file_encoding(gedcom_file)
+        decode = decoder(encoding)
+        with open(gedcom_file, 'rb') as gedcom, self.metrics.stage("parse"):
+            blocks = self.metrics.counted(read_record_blocks(gedcom, encoding=encoding), "lines", _line_count)
+            self.individuals, families = self._collect_records(
+                record for block in blocks for record in scan_records(block, self.fields, decode))
+        self.metrics.count("bytes_read", os.path.getsize(gedcom_file))
+        self.metrics.count("individuals", len(self.individuals))
+        self.metrics.count("families", len(families))
 
-        # Stage 1: Read individuals
-        self.individuals = self.read_individuals(gedcom_text)
+        with self.metrics.stage("link_families"):
+            self._resolve_family_links(families)
 
-        # Stage 2: Read family relations
-        self._read_family_relations(gedcom_text)
+    @property
+    def extra_fields(self) -> Tuple[str, ...]:
+        """Names of the projected fields beyond name, birth and death date."""
+        return tuple(self.fields)[len(INDIVIDUAL_FIELDS):]
 
-    def read_individuals(self, gedcom_text: str) -> dict:             
-        individuals: Dict[str, Individual] = {}
+    def _collect_records(self, records: Iterable[Tuple[str, str, list]]) -> Tuple[IndividualStore, Dict[str, tuple]]:
+        individuals = IndividualStore(self.extra_fields)
+        families: Dict[str, tuple] = {}
 
-        current_indi = None
-        current_event = None
+        for kind, xref, data in records:
+            if kind == "INDI":
+                individuals.add(xref, *data)
+            else:
+                families[xref] = (data[0], data[1], data[2])
 
-        for line in gedcom_text.splitlines():
-            if not line.strip():
-                continue
-            
-            parts = line.strip().split(' ', 2)
-            if len(parts) < 2:
-                continue
+        return individuals, families
 
-            try:
-                level = int(parts[0])
-            except ValueError:
-                continue
-            
-            tag_or_id = parts[1]
-            remaining = parts[2] if len(parts) > 2 else ""
-
-            # Handle INDI records
-            if level == 0:
-                if remaining == "INDI":
-                    current_indi = tag_or_id
-                    
-                    individual = Individual(current_indi)
-                    individual.name = ""
-                    individual.birth_date = ""
-                    individual.death_date = ""
-                    individuals[current_indi] = individual
-                    current_event = None
-                else:
-                    current_indi = None
-                    current_event = None
-
-            # Process individual data
-            elif current_indi and level == 1:
-                if tag_or_id == "NAME":
-                    individual.name = remaining.replace('/', '').strip()
-                elif tag_or_id in ["BIRT", "DEAT"]:
-                    current_event = tag_or_id
-                else:
-                    current_event = None
-            elif current_indi and level == 2:
-                if tag_or_id == "DATE" and current_event:
-                    if current_event == "BIRT":
-                        individual.birth_date = remaining
-                    elif current_event == "DEAT":
-                        individual.death_date = remaining
-
-        
+    def read_individuals(self, gedcom_text: str) -> IndividualStore:
+        individuals, _ = self._collect_records(scan_records(gedcom_text, self.fields))
         return individuals
 
     def _read_family_relations(self, gedcom_text: str):
-        families_data = {}
-        current_family = None
+        _, families = self._collect_records(scan_records(gedcom_text, self.fields))
+        self._resolve_family_links(families)
 
-        for line in gedcom_text.splitlines():   
-            if not line.strip():
-                continue
-            parts = line.strip().split(' ', 2)
-            if len(parts) < 2:
-                continue
+    def _resolve_family_links(self, families: Dict[str, tuple]):
+        # Update family relations
+        for husband_id, wife_id, children in families.values():
+            for child_id in children:
+                self.individuals.link_parents(child_id, husband_id, wife_id)
+        if self.keep_families:
+            self.families = families
 
-            try:
-                level = int(parts[0])
-            except ValueError:
-                continue
+    def get_person_info(self, person: Individual, number: Optional[int] = None) -> str:
+        # Without an ancestor number, persons are numbered in the order they are first shown
+        if number is None:
+            if person.id not in self.person_numbers:
+                self.person_numbers[person.id] = self.current_number
+                self.current_number += 1
+            number = self.person_numbers[person.id]
 
-            tag_or_id = parts[1]
-            remaining = parts[2] if len(parts) > 2 else ""
-
-            # Handle FAM records
-            if level == 0 and remaining == "FAM":
-                current_family = tag_or_id
-                families_data[current_family] = {"husband": None, "wife": None, "children": []}
-            elif level == 0:
-                current_family = None
-
-            # Process family data
-            elif current_family and level == 1:
-                if tag_or_id == "HUSB":
-                    families_data[current_family]["husband"] = remaining
-                elif tag_or_id == "WIFE":
-                    families_data[current_family]["wife"] = remaining
-                elif tag_or_id == "CHIL":
-                    families_data[current_family]["children"].append(remaining)
+        return f"{number}. {self.person_details(person)}"
 
-        # Update family relations
-        for family_id, data in families_data.items():
-            husband_id = data["husband"]
-            wife_id = data["wife"]
-            for child_id in data["children"]:
-                if child_id in self.individuals:
-                    if husband_id:
-                        self.individuals[child_id].father_id = husband_id
-                    if wife_id:
-                        self.individuals[child_id].mother_id = wife_id
-
-    def get_person_info(self, person: Individual) -> str:
-        if person.id not in self.person_numbers:
-            self.person_numbers[person.id] = self.current_number
-            self.current_number += 1
-            
-        number = self.person_numbers[person.id]
-        info = f"{number}. {person.name}"
+    def person_details(self, person: Individual) -> str:
+        """Return the name and dates shown for ``person`` after its ancestor number."""
+        info = person.name
         if person.birth_date:
             info += f" (f. {person.birth_date}"
             if person.death_date:
@@ -154,37 +481,296 @@ class GedcomProcessor:
             info += ")"
         return info
 
+    @property
+    def name_index(self):
+        """Name index over the current individuals, built on first use."""
+        if self._name_index is None or self._name_index_source is not self.individuals:
+            self._name_index = self.individuals.name_index()
+            self._name_index_source = self.individuals
+        return self._name_index
+
+    def find_people(self, query: str) -> List[Individual]:
+        """Return the individuals matching an xref or a name query."""
+        query = query.strip()
+        if query.startswith("@") and query.endswith("@"):
+            return [self.individuals[query]] if query in self.individuals else []
+        return [self.individuals.person(index) for index in self.name_index.search(query)]
+
     def find_parents(self, person: Individual) -> Tuple[Optional[Individual], Optional[Individual]]:
-        father = self.individuals.get(person.father_id) if person.father_id else None
-        mother = self.individuals.get(person.mother_id) if person.mother_id else None
+        father, mother = self.individuals.parents(person)
+        if self.aliases:
+            return self.canonical(father), self.canonical(mother)
         return father, mother
 
+    def canonical(self, person: Optional[Individual]) -> Optional[Individual]:
+        """Return the individual walked in place of ``person`` under the alias map."""
+        if person is None:
+            return None
+        target = self.aliases.get(person.id)
+        return person if target is None else self.individuals[target]
+
+    def apply_aliases(self, aliases: Dict[str, str]):
+        """Walk each xref in ``aliases`` as the individual it maps to.
+
+        Chains are followed to their end, and parents missing on a kept
+        individual are taken from its duplicates.
+        """
+        resolved = {}
+        for xref in aliases:
+            target, seen = aliases[xref], {xref}
+            while target in aliases and target not in seen:
+                seen.add(target)
+                target = aliases[target]
+            if target != xref and target in self.individuals:
+                resolved[xref] = target
+        self.aliases = resolved
+
+        for xref, target in resolved.items():
+            if xref in self.individuals:
+                duplicate, kept = self.individuals[xref], self.individuals[target]
+                self.individuals.link_parents(target, None if kept.father_id else duplicate.father_id,
+                                              None if kept.mother_id else duplicate.mother_id)
+
+    def prefetch_ancestors(self, person: Individual, generations: Optional[int] = None):
+        """Let the store load ``person``'s ancestors in one batch before a walk."""
+        self.individuals.prefetch_ancestors(person.id, generations)
+
+def find_root(processor: GedcomProcessor, query: str) -> Optional[Individual]:
+    """Resolve one --root query, reporting unmatched and ambiguous queries."""
+    matches = processor.find_people(query)
+    if not matches:
+        print(f"No individual matches '{query}'")
+        return None
+    if len(matches) > 1:
+        print(f"'{query}' matches {len(matches)} individuals; use one of these xrefs with --root:")
+        for person in matches[:50]:
+            print(f"  {person.id}  {person.name} (f. {person.birth_date or '?'})")
+        return None
+    return matches[0]
+
+def positive_int(value: str) -> int:
+    """Parse a command line count that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description='Process a GEDCOM file and generate ancestor trees')
     parser.add_argument('gedcom_file', help='Path to the GEDCOM file to process')
     parser.add_argument('--output-dir', default='output', help='Directory to store output files (default: output)')
-    parser.add_argument('--format', choices=['markdown', 'word'], default='markdown',
+    parser.add_argument('--format', choices=format_names(), default='markdown',
                       help='Output format: markdown (.md) or Word (.docx) (default: markdown)')
+    parser.add_argument('--root', action='append',
+                      help='Root person: an xref such as @I1@, or a name to search for. '
+                           'Repeat to generate trees for several roots in one run')
+    parser.add_argument('--roots-file',
+                      help='File with one root (xref or name) per line, for batch generation')
+    parser.add_argument('--generations', type=int,
+                      help='Only walk this many generations from the root (default: all)')
+    parser.add_argument('--depth', type=positive_int, default=4,
+                      help='Generations shown in the table on each page (default: 4)')
+    parser.add_argument('--render-jobs', type=int, default=1,
+                      help='Render and save pages with this many workers (default: 1)')
+    parser.add_argument('--render-pool', choices=['process', 'thread'], default='process',
+                      help='Worker pool used by --render-jobs (default: process)')
+    parser.add_argument('--bundle', choices=['single', 'zip'],
+                      help='Write all pages to one file (single) or one zip archive (zip) instead of a file per ancestor')
+    parser.add_argument('--full', action='store_true',
+                      help='Rewrite every page, even those unchanged since the last run')
+    parser.add_argument('--cache', action='store_true',
+                      help='Reuse a parse snapshot stored next to the GEDCOM file')
+    parser.add_argument('--cache-dir',
+                      help='Reuse a parse snapshot stored in this directory (implies --cache)')
+    parser.add_argument('--jobs', type=int, default=1,
+                      help='Parse the GEDCOM file in this many worker processes (default: 1)')
+    parser.add_argument('--index', action='store_true',
+                      help='Index record offsets and decode records only when the tree walk reaches them')
+    parser.add_argument('--sqlite', nargs='?', const='', metavar='DB',
+                      help='Keep the parsed data in a SQLite database (default: <file>.sqlite), '
+                           'reused by later runs, and read individuals from it on demand')
+    parser.add_argument('--metrics-json',
+                      help='Write wall and CPU time per stage, counts, peak RSS and the slowest pages to this JSON file')
+    parser.add_argument('--profile', choices=['load', 'parse', 'link_families', 'roots', 'traverse', 'page_jobs', 'render', 'relationships', 'duplicates', 'export', 'integrity', 'stats'],
+                      help='Profile one stage with cProfile, or with tracemalloc under --profile-mode memory')
+    parser.add_argument('--profile-mode', choices=['cpu', 'memory'], default='cpu',
+                      help='cpu dumps a cProfile file; memory adds the top allocations to the metrics (default: cpu)')
+    parser.add_argument('--profile-output', help='cProfile dump file (default: profile-<stage>.prof)')
+    parser.add_argument('--relationships', nargs=2, metavar=('PAIRS_CSV', 'OUTPUT_CSV'),
+                      help='Write how each pair of xrefs in PAIRS_CSV is related to OUTPUT_CSV instead of generating trees')
+    parser.add_argument('--find-duplicates', metavar='REPORT_CSV',
+                      help='Write likely duplicate individuals to this CSV merge report instead of generating trees')
+    parser.add_argument('--duplicate-threshold', type=float, default=0.8,
+                      help='Lowest score (0-1) reported by --find-duplicates (default: 0.8)')
+    parser.add_argument('--write-aliases', metavar='ALIASES_JSON',
+                      help='With --find-duplicates, also write the duplicate xref -> kept xref map')
+    parser.add_argument('--aliases', metavar='ALIASES_JSON',
+                      help='Walk the trees with each duplicate xref in this map replaced by the xref it maps to')
+    parser.add_argument('--check-integrity', metavar='REPORT_JSON',
+                      help='Check for ancestry cycles, several parent families, dangling pointers and impossible '
+                           'dates, and write the findings to this JSON file')
+    parser.add_argument('--strict', action='store_true',
+                      help='Check integrity and stop before generating anything if errors are found')
+    parser.add_argument('--export-gedcom', metavar='OUTPUT_GED',
+                      help='Write the roots and their ancestors as a GEDCOM file instead of generating trees')
+    parser.add_argument('--stats', metavar='OUTPUT',
+                      help='Write births per decade, lifespans, surname frequencies and the implex of each root '
+                           'as CSV (.csv) or JSON to this file instead of generating trees')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                      help='Keep the parsed file in memory and render pages on demand over HTTP on this port')
+    parser.add_argument('--serve-host', default='127.0.0.1',
+                      help='Address the --serve HTTP server listens on (default: 127.0.0.1)')
+    parser.add_argument('--page-cache-mb', type=int, default=64,
+                      help='Memory for rendered pages kept by --serve, in MB (default: 64)')
+    parser.add_argument('--watch-interval', type=float, default=2.0,
+                      help='Seconds between checks for a changed GEDCOM file under --serve (default: 2)')
     args = parser.parse_args()
 
+    metrics = Metrics(enabled=bool(args.metrics_json), profile_stage=args.profile,
+                      profile_mode=args.profile_mode, profile_output=args.profile_output)
+    try:
+        run(args, metrics)
+    finally:
+        if args.metrics_json:
+            metrics.write(args.metrics_json)
+            print(f"Wrote metrics to {args.metrics_json}")
+
+def load(processor: GedcomProcessor, args) -> GedcomProcessor:
+    """Fill ``processor`` from the GEDCOM file the way the options ask for."""
+    if args.sqlite is not None:
+        from sqlite_store import open_sqlite
+        open_sqlite(processor, args.gedcom_file, args.sqlite or None)
+    elif args.index:
+        from record_index import open_lazy
+        open_lazy(processor, args.gedcom_file)
+    elif args.cache or args.cache_dir:
+        from parse_cache import parse_with_cache
+        if parse_with_cache(processor, args.gedcom_file, args.cache_dir, args.jobs):
+            print("Loaded parsed data from cache")
+    elif args.jobs > 1:
+        from parallel_parser import parse_parallel
+        parse_parallel(processor, args.gedcom_file, args.jobs)
+    else:
+        processor._parse_gedcom(args.gedcom_file)
+    return processor
+
+def merge_aliases(processor: GedcomProcessor, args) -> GedcomProcessor:
+    """Walk the duplicates listed in the ``--aliases`` file as their kept records."""
+    if args.aliases:
+        from duplicates import load_aliases
+        processor.apply_aliases(load_aliases(args.aliases))
+    return processor
+
+def run(args, metrics: Metrics):
     print(f"Processing GEDCOM file: {args.gedcom_file}")
-    processor = GedcomProcessor(args.gedcom_file)
-    processor._parse_gedcom(args.gedcom_file)
+    extra_fields = None
+    if args.stats:
+        from population_stats import STATS_FIELDS
+        extra_fields = STATS_FIELDS
+    processor = GedcomProcessor(args.gedcom_file, extra_fields)
+    processor.metrics = metrics
+    # The integrity checks reuse the loaded data, but a store links each child to one
+    # father and one mother only, so the load keeps every family for them as well
+    processor.keep_families = bool(args.check_integrity or args.strict)
+    with metrics.stage("load"):
+        load(processor, args)
     
     print(f"Found {len(processor.individuals)} individuals")
-    
-    # Find a root person (individual named 'steen thrane jacobsen')
-    root_person = next((person for person in processor.individuals.values() if person.name.lower() == "steen thrane jacobsen"), None)
 
-    if not root_person:
-        # Default to the first person in the file if 'steen thrane jacobsen' is not found
-        root_person = next(iter(processor.individuals.values())) if processor.individuals else None
+    if args.check_integrity or args.strict:
+        from integrity import check_integrity
+        with metrics.stage("integrity"):
+            report = check_integrity(args.gedcom_file, args.check_integrity, processor)
+        processor.families = None
+        print(f"Integrity check: {report.errors} errors, {report.warnings} warnings")
+        if args.check_integrity:
+            print(f"Wrote integrity report to {args.check_integrity}")
+        if args.strict and report.errors:
+            print("Stopping because of integrity errors (--strict)")
+            return
+
+    if args.find_duplicates:
+        from duplicates import find_duplicates
+        with metrics.stage("duplicates"):
+            find_duplicates(processor, args.find_duplicates, args.write_aliases, args.duplicate_threshold)
+        print(f"Wrote merge report to {args.find_duplicates}")
+        return
+
+    # Applied after the integrity checks, which look at the records as they are in the file
+    if args.aliases:
+        merge_aliases(processor, args)
+        print(f"Merging {len(processor.aliases)} duplicate xrefs")
+
+    if args.relationships:
+        from relationship import relationships_csv
+        pairs_path, output_path = args.relationships
+        with metrics.stage("relationships"):
+            count = relationships_csv(processor, pairs_path, output_path)
+        print(f"Wrote {count} relationships to {output_path}")
+        return
+
+    if args.serve is not None:
+        from render_service import serve
+        # A reloaded snapshot is loaded and merged like the first one
+        serve(processor, lambda: merge_aliases(load(GedcomProcessor(args.gedcom_file, extra_fields), args), args), args)
+        return
     
-    if root_person:
+    queries = list(args.root or [])
+    if args.roots_file:
+        with open(args.roots_file, encoding='utf-8') as roots_file:
+            queries.extend(line.strip() for line in roots_file if line.strip())
+
+    with metrics.stage("roots"):
+        if queries:
+            roots = [processor.canonical(person) for person in (find_root(processor, query) for query in queries) if person]
+        else:
+            # Find a root person (individual named 'steen thrane jacobsen')
+            matches = processor.find_people("steen thrane jacobsen")
+            if len(matches) > 1:
+                # Several people by the default name; list them rather than guess
+                find_root(processor, "steen thrane jacobsen")
+                return
+            root_person = matches[0] if matches else None
+
+            if not root_person and processor.individuals:
+                # Default to the first person in the file if 'steen thrane jacobsen' is not found
+                root_person = next(iter(processor.individuals.values()))
+                print(f"No root given; using the first individual, {root_person.id} {root_person.name}")
+            roots = [root_person] if root_person else []
+    if queries and not roots:
+        return
+
+    if args.stats:
+        from population_stats import population_stats, write_stats
+        with metrics.stage("stats"):
+            stats = population_stats(processor, roots, args.generations)
+            write_stats(stats, args.stats)
+        print(f"Wrote statistics for {stats.individuals} individuals to {args.stats}")
+        return
+
+    if args.export_gedcom and roots:
+        from gedcom_export import export_ancestors
+        with metrics.stage("export"):
+            summary = export_ancestors(processor, args.gedcom_file, roots, args.export_gedcom, args.generations)
+        print(f"Exported {summary.individuals} individuals, {summary.families} families and "
+              f"{summary.other_records} other records to {args.export_gedcom}")
+        return
+
+    if roots:
         from tree_processor import TreeProcessor  # Local import to avoid circular dependency
-        tree_processor = TreeProcessor(processor)
-        tree_processor.process_tree(root_person, args.output_dir, args.format)
-        print(f"Generated ancestor trees in {args.output_dir}/")
+        tree_processor = TreeProcessor(processor, depth=args.depth, generations=args.generations,
+                                       workers=args.render_jobs, pool=args.render_pool,
+                                       incremental=not args.full, metrics=metrics)
+        shared_pages = 0
+        with tree_processor.batch():
+            for root_person in roots:
+                # In batch mode every root gets its own directory, named after its xref
+                output_dir = args.output_dir if len(queries) <= 1 else os.path.join(args.output_dir, root_person.id.strip('@'))
+                tree_processor.process_tree(root_person, output_dir, args.format, args.bundle)
+                print(f"Generated ancestor trees in {output_dir}/")
+                shared_pages += tree_processor.pages_copied
+        if len(roots) > 1:
+            print(f"Copied {shared_pages} pages shared between roots instead of rendering them again")
     else:
         print("No individuals found in the GEDCOM file")
 
@@ -0,0 +1,254 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Marker for a missing parent link in the integer parent columns
+NO_PERSON = -1
+
+class Individual:
+    """Lightweight view of one row in an IndividualStore.
+
+    Reading or assigning ``name``, ``birth_date``, ``death_date``,
+    ``father_id`` and ``mother_id`` goes straight to the store's columns,
+    so views are cheap to create and hold no data of their own.
+    """
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "IndividualStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def id(self) -> str:
+        return self._store._xrefs[self._index]
+
+    @property
+    def name(self) -> str:
+        return self._store._strings[self._store._names[self._index]]
+
+    @name.setter
+    def name(self, value: str):
+        self._store._names[self._index] = self._store._string_id(value)
+
+    @property
+    def birth_date(self) -> str:
+        return self._store._strings[self._store._births[self._index]]
+
+    @birth_date.setter
+    def birth_date(self, value: str):
+        self._store._births[self._index] = self._store._string_id(value)
+
+    @property
+    def death_date(self) -> str:
+        return self._store._strings[self._store._deaths[self._index]]
+
+    @death_date.setter
+    def death_date(self, value: str):
+        self._store._deaths[self._index] = self._store._string_id(value)
+
+    @property
+    def father_id(self) -> Optional[str]:
+        return self._store._xref_at(self._store._fathers[self._index])
+
+    @father_id.setter
+    def father_id(self, value: Optional[str]):
+        self._store._fathers[self._index] = self._store.xref_index(value) if value else NO_PERSON
+
+    @property
+    def mother_id(self) -> Optional[str]:
+        return self._store._xref_at(self._store._mothers[self._index])
+
+    @mother_id.setter
+    def mother_id(self, value: Optional[str]):
+        self._store._mothers[self._index] = self._store.xref_index(value) if value else NO_PERSON
+
+    def field(self, name: str) -> str:
+        """Return an extra projected field, such as "sex" or "birth_place"."""
+        return self._store._strings[self._store._extra[name][self._index]]
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, Individual)
+                and self._store is other._store and self._index == other._index)
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._index))
+
+    def __repr__(self) -> str:
+        return f"Individual({self.id!r}, {self.name!r})"
+
+class IndividualStore(Mapping):
+    """Columnar storage for parsed individuals, keyed by xref.
+
+    Every xref seen (as a record or as a parent link) is interned once and
+    mapped to an integer index. Names and dates are kept in a shared string
+    table, and parent links are integer arrays indexed by that same number,
+    so ``parents`` is a pair of array lookups. Only xrefs added with ``add``
+    count as members of the mapping. ``extra_fields`` names additional
+    string columns, filled from the values after the death date in ``add``.
+    """
+
+    def __init__(self, extra_fields: Tuple[str, ...] = ()):
+        self._xrefs: List[str] = []
+        self._xref_index: Dict[str, int] = {}
+        self._present = bytearray()
+        self._count = 0
+
+        self._strings: List[str] = [""]
+        self._string_index: Dict[str, int] = {"": 0}
+
+        self._names = array('i')
+        self._births = array('i')
+        self._deaths = array('i')
+        self._fathers = array('i')
+        self._mothers = array('i')
+        self._extra: Dict[str, array] = {name: array('i') for name in extra_fields}
+
+    @property
+    def extra_fields(self) -> Tuple[str, ...]:
+        return tuple(self._extra)
+
+    def _string_id(self, value: str) -> int:
+        string_id = self._string_index.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_index[value] = string_id
+        return string_id
+
+    def _xref_at(self, index: int) -> Optional[str]:
+        return None if index == NO_PERSON else self._xrefs[index]
+
+    def xref_index(self, xref: str) -> int:
+        """Return the integer index for ``xref``, interning it if it is new."""
+        index = self._xref_index.get(xref)
+        if index is None:
+            index = len(self._xrefs)
+            self._xrefs.append(xref)
+            self._xref_index[xref] = index
+            self._present.append(0)
+            self._names.append(0)
+            self._births.append(0)
+            self._deaths.append(0)
+            self._fathers.append(NO_PERSON)
+            self._mothers.append(NO_PERSON)
+            for column in self._extra.values():
+                column.append(0)
+        return index
+
+    def add(self, xref: str, name: str = "", birth_date: str = "", death_date: str = "", *extra: str) -> Individual:
+        index = self.xref_index(xref)
+        if not self._present[index]:
+            self._present[index] = 1
+            self._count += 1
+        self._names[index] = self._string_id(name)
+        self._births[index] = self._string_id(birth_date)
+        self._deaths[index] = self._string_id(death_date)
+        self._fathers[index] = NO_PERSON
+        self._mothers[index] = NO_PERSON
+        for column, value in zip(self._extra.values(), extra):
+            column[index] = self._string_id(value)
+        return Individual(self, index)
+
+    def link_parents(self, child_id: str, father_id: Optional[str], mother_id: Optional[str]):
+        """Set the parents of ``child_id`` if it is a known individual."""
+        index = self._xref_index.get(child_id)
+        if index is None or not self._present[index]:
+            return
+        if father_id:
+            self._fathers[index] = self.xref_index(father_id)
+        if mother_id:
+            self._mothers[index] = self.xref_index(mother_id)
+
+    def person(self, index: int) -> Optional[Individual]:
+        """Return the individual at ``index``, or None if it has no record."""
+        if index == NO_PERSON or not self._present[index]:
+            return None
+        return Individual(self, index)
+
+    def parents(self, person: Individual) -> Tuple[Optional[Individual], Optional[Individual]]:
+        father, mother = self.parent_indices(person._index)
+        return self.person(father), self.person(mother)
+
+    def parent_indices(self, index: int) -> Tuple[int, int]:
+        """Return the indices of the parents of the individual at ``index``.
+
+        A parent without a record is NO_PERSON. Like ``parents``, this
+        loads the parents' rows in stores that load them on demand, but
+        creates no Individual views, for walks over many ancestors.
+        """
+        present = self._present
+        father, mother = self._fathers[index], self._mothers[index]
+        if father != NO_PERSON and not present[father] and self.person(father) is None:
+            father = NO_PERSON
+        if mother != NO_PERSON and not present[mother] and self.person(mother) is None:
+            mother = NO_PERSON
+        return father, mother
+
+    def prefetch_ancestors(self, xref: str, generations: Optional[int] = None):
+        """Load the ancestors of ``xref`` ahead of a tree walk; every row is loaded already."""
+
+    def load_all(self):
+        """Load every individual into the columns; every row is loaded already."""
+
+    def close(self):
+        """Release the files behind a store that loads rows on demand; there are none."""
+
+    def name_index(self):
+        """Build a NameIndex over this store's names."""
+        from name_index import NameIndex
+        return NameIndex(self.iter_names())
+
+    def iter_names(self) -> Iterator[Tuple[int, str]]:
+        """Yield (index, name) for every individual, in file order."""
+        strings = self._strings
+        present = self._present
+        for index, name_id in enumerate(self._names):
+            if present[index]:
+                yield index, strings[name_id]
+
+    def __getitem__(self, xref: str) -> Individual:
+        index = self._xref_index.get(xref)
+        if index is None or not self._present[index]:
+            raise KeyError(xref)
+        return Individual(self, index)
+
+    def __contains__(self, xref) -> bool:
+        index = self._xref_index.get(xref)
+        return index is not None and bool(self._present[index])
+
+    def __iter__(self) -> Iterator[str]:
+        present = self._present
+        for index, xref in enumerate(self._xrefs):
+            if present[index]:
+                yield xref
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getstate__(self) -> dict:
+        # The lookup dicts are rebuilt on load; only the tables are stored.
+        return {
+            "xrefs": self._xrefs,
+            "present": bytes(self._present),
+            "strings": self._strings,
+            "names": self._names,
+            "births": self._births,
+            "deaths": self._deaths,
+            "fathers": self._fathers,
+            "mothers": self._mothers,
+            "extra": self._extra,
+        }
+
+    def __setstate__(self, state: dict):
+        self._xrefs = state["xrefs"]
+        self._xref_index = {xref: index for index, xref in enumerate(self._xrefs)}
+        self._present = bytearray(state["present"])
+        self._count = self._present.count(1)
+        self._strings = state["strings"]
+        self._string_index = {value: index for index, value in enumerate(self._strings)}
+        self._names = state["names"]
+        self._births = state["births"]
+        self._deaths = state["deaths"]
+        self._fathers = state["fathers"]
+        self._mothers = state["mothers"]
+        self._extra = state.get("extra", {})
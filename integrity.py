@@ -0,0 +1,288 @@
+import json
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from gedcom_dates import exact_year
+from gedcom_encoding import decoder, file_encoding
+from gedcom_processor import read_record_blocks, scan_records
+from individual_store import IndividualStore, NO_PERSON
+
+ERROR = "error"
+WARNING = "warning"
+
+# Severity of each check. Errors block rendering under --strict; several
+# parent families are legitimate for adoptions, so they only warn.
+CHECKS = {
+    "ancestry_cycle": ERROR,
+    "dangling_reference": ERROR,
+    "death_before_birth": ERROR,
+    "born_before_parent": ERROR,
+    "born_after_parent_death": ERROR,
+    "multiple_parent_families": WARNING,
+}
+
+NO_YEAR = -1
+
+class Issue(NamedTuple):
+    check: str
+    xrefs: Tuple[str, ...]
+    message: str
+
+    @property
+    def severity(self) -> str:
+        return CHECKS[self.check]
+
+class IntegrityReport(NamedTuple):
+    individuals: int
+    families: int
+    issues: List[Issue]
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for issue in self.issues if issue.severity == ERROR)
+
+    @property
+    def warnings(self) -> int:
+        return sum(1 for issue in self.issues if issue.severity == WARNING)
+
+    def as_dict(self) -> dict:
+        counts: Dict[str, int] = {}
+        for issue in self.issues:
+            counts[issue.check] = counts.get(issue.check, 0) + 1
+        return {
+            "individuals": self.individuals,
+            "families": self.families,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "counts": counts,
+            "issues": [{"check": issue.check, "severity": issue.severity, "xrefs": list(issue.xrefs),
+                        "message": issue.message} for issue in self.issues],
+        }
+
+def _year(date: str) -> int:
+    year = exact_year(date) if date else None
+    return NO_YEAR if year is None else year
+
+class IntegrityChecker:
+    """Checks the pedigree of a GEDCOM file in time linear in its size.
+
+    Individuals and families are collected into flat arrays indexed by
+    an interned xref number; every family's HUSB, WIFE and CHIL pointers
+    are kept, not just the last family a child is linked through. The
+    parent graph is then stored as compressed adjacency arrays and
+    searched for cycles with an iterative depth-first search, so deep
+    pedigrees never hit the recursion limit.
+    """
+
+    def __init__(self):
+        self._xrefs: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._present = bytearray()
+        self._names: List[str] = []
+        self._births = array('i')
+        self._deaths = array('i')
+
+        self._family_xrefs: List[str] = []
+        self._husbands = array('i')
+        self._wives = array('i')
+        self._children_start = array('i', [0])  # Family f's children are _children[start[f]:start[f + 1]]
+        self._children = array('i')
+
+    def _intern(self, xref: str) -> int:
+        index = self._index.get(xref)
+        if index is None:
+            index = self._index[xref] = len(self._xrefs)
+            self._xrefs.append(xref)
+            self._present.append(0)
+            self._names.append("")
+            self._births.append(NO_YEAR)
+            self._deaths.append(NO_YEAR)
+        return index
+
+    def add_individual(self, xref: str, name: str, birth_date: str, death_date: str):
+        index = self._intern(xref)
+        self._present[index] = 1
+        self._names[index] = name
+        self._births[index] = _year(birth_date)
+        self._deaths[index] = _year(death_date)
+
+    def add_family(self, xref: str, husband: Optional[str], wife: Optional[str], children: List[str]):
+        self._family_xrefs.append(xref)
+        self._husbands.append(self._intern(husband) if husband else NO_PERSON)
+        self._wives.append(self._intern(wife) if wife else NO_PERSON)
+        self._children.extend(self._intern(child) for child in children)
+        self._children_start.append(len(self._children))
+
+    def read(self, gedcom_file: str, individuals: bool = True):
+        """Collect the individuals and families of ``gedcom_file`` in one streaming pass.
+
+        With ``individuals`` false only the families are collected, and
+        nothing is projected from the INDI records.
+        """
+        encoding = file_encoding(gedcom_file)
+        decode = decoder(encoding)
+        with open(gedcom_file, 'rb') as gedcom:
+            for block in read_record_blocks(gedcom, encoding=encoding):
+                for kind, xref, data in scan_records(block, None if individuals else {}, decode):
+                    if kind == "FAM":
+                        self.add_family(xref, *data)
+                    elif individuals:
+                        self.add_individual(xref, *data)
+
+    def add_store(self, store: IndividualStore):
+        """Collect the individuals already loaded into ``store``."""
+        store.load_all()
+        for xref, person in store.items():
+            self.add_individual(xref, person.name, person.birth_date, person.death_date)
+
+    def add_families(self, families: Dict[str, tuple]):
+        """Collect ``families`` as kept by a load (see GedcomProcessor.keep_families)."""
+        for xref, (husband, wife, children) in families.items():
+            self.add_family(xref, husband, wife, children)
+
+    def _describe(self, index: int) -> str:
+        name = self._names[index]
+        return f"{name} ({self._xrefs[index]})" if name else self._xrefs[index]
+
+    def _family_members(self, family: int):
+        for role, index in (("HUSB", self._husbands[family]), ("WIFE", self._wives[family])):
+            if index != NO_PERSON:
+                yield role, index
+        for position in range(self._children_start[family], self._children_start[family + 1]):
+            yield "CHIL", self._children[position]
+
+    def _check_references(self, issues: List[Issue]):
+        present, xrefs = self._present, self._xrefs
+        for family, family_xref in enumerate(self._family_xrefs):
+            for role, index in self._family_members(family):
+                if not present[index]:
+                    issues.append(Issue("dangling_reference", (family_xref, xrefs[index]),
+                                        f"Family {family_xref} names {xrefs[index]} as {role}, "
+                                        "but there is no such individual"))
+
+    def _child_families(self) -> Tuple[array, array]:
+        """Return the families each individual is a child in, as adjacency arrays."""
+        count = len(self._xrefs)
+        start = array('i', [0]) * (count + 1)
+        for child in self._children:
+            start[child + 1] += 1
+        for index in range(count):
+            start[index + 1] += start[index]
+        families = array('i', [0]) * len(self._children)
+        filled = start[:-1]
+        for family in range(len(self._family_xrefs)):
+            for position in range(self._children_start[family], self._children_start[family + 1]):
+                child = self._children[position]
+                families[filled[child]] = family
+                filled[child] += 1
+        return start, families
+
+    def _check_parent_families(self, issues: List[Issue], start: array, families: array):
+        for child in range(len(self._xrefs)):
+            if start[child + 1] - start[child] > 1:
+                # A CHIL line repeated within one family is not a second family
+                family_xrefs = list(dict.fromkeys(self._family_xrefs[family]
+                                                  for family in families[start[child]:start[child + 1]]))
+                if len(family_xrefs) < 2:
+                    continue
+                issues.append(Issue("multiple_parent_families", (self._xrefs[child], *family_xrefs),
+                                    f"{self._describe(child)} is a child in {len(family_xrefs)} families: "
+                                    f"{', '.join(family_xrefs)}; the trees take the father from the last of them "
+                                    "naming a husband and the mother from the last naming a wife"))
+
+    def _check_cycles(self, issues: List[Issue], start: array, families: array):
+        husbands, wives = self._husbands, self._wives
+        state = bytearray(len(self._xrefs))  # 0 unvisited, 1 on the current path, 2 finished
+        depth = array('i', [0]) * len(self._xrefs)  # Position on the current path
+
+        def parents_of(index: int) -> List[int]:
+            return [parent for family in families[start[index]:start[index + 1]]
+                    for parent in (husbands[family], wives[family]) if parent != NO_PERSON]
+
+        for root in range(len(self._xrefs)):
+            if state[root]:
+                continue
+            # The current path from ``root`` up, with the parents each entry has left to visit
+            path = [root]
+            pending = [parents_of(root)]
+            state[root] = 1
+            while path:
+                parents = pending[-1]
+                if not parents:
+                    state[path.pop()] = 2
+                    pending.pop()
+                    continue
+                parent = parents.pop()
+                if state[parent] == 1:
+                    cycle = path[depth[parent]:]
+                    names = " -> ".join(self._describe(index) for index in cycle + [parent])
+                    issues.append(Issue("ancestry_cycle", tuple(self._xrefs[index] for index in cycle),
+                                        f"Ancestry loops back on itself: {names}"))
+                elif state[parent] == 0:
+                    state[parent] = 1
+                    depth[parent] = len(path)
+                    path.append(parent)
+                    pending.append(parents_of(parent))
+
+    def _check_dates(self, issues: List[Issue]):
+        births, deaths, xrefs = self._births, self._deaths, self._xrefs
+        for index in range(len(xrefs)):
+            if births[index] != NO_YEAR and deaths[index] != NO_YEAR and deaths[index] < births[index]:
+                issues.append(Issue("death_before_birth", (xrefs[index],),
+                                    f"{self._describe(index)} died in {deaths[index]}, before being born in {births[index]}"))
+
+        for family in range(len(self._family_xrefs)):
+            # A father may die up to a year before his child is born
+            parents = [(index, grace) for index, grace in ((self._husbands[family], 1), (self._wives[family], 0))
+                       if index != NO_PERSON]
+            for position in range(self._children_start[family], self._children_start[family + 1]):
+                child = self._children[position]
+                born = births[child]
+                if born == NO_YEAR:
+                    continue
+                for parent, grace in parents:
+                    if births[parent] != NO_YEAR and born < births[parent]:
+                        issues.append(Issue("born_before_parent", (xrefs[child], xrefs[parent]),
+                                            f"{self._describe(child)} was born in {born}, before their parent "
+                                            f"{self._describe(parent)} in {births[parent]}"))
+                    if deaths[parent] != NO_YEAR and born > deaths[parent] + grace:
+                        issues.append(Issue("born_after_parent_death", (xrefs[child], xrefs[parent]),
+                                            f"{self._describe(child)} was born in {born}, after their parent "
+                                            f"{self._describe(parent)} died in {deaths[parent]}"))
+
+    def check(self) -> IntegrityReport:
+        """Run every check over what has been read."""
+        issues: List[Issue] = []
+        self._check_references(issues)
+        start, families = self._child_families()
+        self._check_parent_families(issues, start, families)
+        self._check_cycles(issues, start, families)
+        self._check_dates(issues)
+        return IntegrityReport(sum(self._present), len(self._family_xrefs), issues)
+
+def write_report(report: IntegrityReport, path: str):
+    with open(path, "w", encoding="utf-8") as report_file:
+        json.dump(report.as_dict(), report_file, indent=2, ensure_ascii=False)
+        report_file.write("\n")
+
+def check_integrity(gedcom_file: str, report_path: Optional[str] = None, processor=None) -> IntegrityReport:
+    """Check ``gedcom_file`` and optionally write the JSON report (--check-integrity).
+
+    Given the GedcomProcessor that has loaded the file, its individuals
+    and the families its load kept are checked instead. Loads that keep
+    no families (a cache hit, --index or --sqlite) leave only the FAM
+    records to be read from the file.
+    """
+    checker = IntegrityChecker()
+    if processor is None:
+        checker.read(gedcom_file)
+    else:
+        checker.add_store(processor.individuals)
+        if processor.families is not None:
+            checker.add_families(processor.families)
+        else:
+            checker.read(gedcom_file, individuals=False)
+    report = checker.check()
+    if report_path:
+        write_report(report, report_path)
+    return report
@@ -1,10 +1,65 @@
+from ahnentafel import Ahnentafel
+
+def _cell(text: str) -> str:
+    # A table row is one line, so pipes are escaped and the line breaks of
+    # CONT lines become <br>
+    return text.replace("|", "\\|").replace("\r\n", "<br>").replace("\r", "<br>").replace("\n", "<br>")
+
 class MarkdownGenerator:
+    """Renders anetavle pages as Markdown tables laid out like the Word grid.
+
+    Row n of a page holds the 2 ** n ancestors n generations above the
+    page's person. Cells span the columns of the ancestors above them
+    with MultiMarkdown colspans (a cell closed by several pipes), so the
+    table has 2 ** (depth - 1) columns like the Word table.
+    """
+
     def __init__(self, gedcom_processor):
         self.gedcom_processor = gedcom_processor
+        self._page_templates = {}  # depth -> format string of a whole page
+
+    def _build_page_template(self, depth: int) -> str:
+        columns = 1 << (depth - 1)
+        rows = []
+        for generation in range(depth):
+            span = "|" * (columns >> generation)
+            rows.append("|" + (" {} " + span) * (1 << generation))
+            if generation == 0:
+                # The root row is the table header; the rows below are centred like the Word cells
+                rows.append("|" + ":---:|" * columns)
+        return "# Anetavle for person {}\n\n" + "\n".join(rows) + "\n"
+
+    def _page_template(self, depth: int) -> str:
+        template = self._page_templates.get(depth)
+        if template is None:
+            template = self._page_templates[depth] = self._build_page_template(depth)
+        return template
+
+    def generate_markdown(self, root_person, output_dir, depth: int = 4, ahnentafel: Ahnentafel = None,
+                          number: int = 1):
+        # As for Word grids, build an ahnentafel only when the caller does not share its own
+        if ahnentafel is None:
+            ahnentafel = Ahnentafel(self.gedcom_processor, root_person, depth)
+            number = 1
+        texts = self.page_payload(ahnentafel, number, root_person, depth)
+        self.save_page(self.render_page(number, texts, depth), f"{output_dir}/{number}.md")
+
+    def page_payload(self, ahnentafel: Ahnentafel, number: int, person, depth: int):
+        return ahnentafel.grid_labels(self.gedcom_processor, number, depth)
+
+    def render_page(self, number: int, texts, depth: int = 4) -> str:
+        """Build the complete page text for ancestor ``number`` from its cell texts."""
+        return self._page_template(depth).format(number, *[_cell(text) for text in texts])
+
+    def save_page(self, content: str, filename: str) -> int:
+        data = content.encode("utf-8")
+        with open(filename, "wb") as md_file:
+            md_file.write(data)
+        return len(data)
+
+    def page_bytes(self, content: str) -> bytes:
+        return content.encode("utf-8")
 
-    def generate_markdown(self, person, number, output_dir):
-        filename = f"{output_dir}/{number}.md"
-        with open(filename, "w", encoding="utf-8") as md_file:
-            md_file.write(f"# Anetavle for person {number}\n\n")
-            md_file.write(self.gedcom_processor.get_person_info(person))
-            md_file.write("\n")
\ No newline at end of file
+    def open_bundle(self, path: str):
+        from bundle_writer import MarkdownBundle
+        return MarkdownBundle(path, self)
@@ -0,0 +1,146 @@
+import heapq
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_DISABLED = nullcontext()
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class Metrics:
+    """Wall and CPU time per stage, counters and the slowest pages of a run.
+
+    A disabled instance keeps every method a constant-time no-op, so code
+    can report unconditionally. ``profile_stage`` names one stage to run
+    under cProfile (``profile_mode="cpu"``) or tracemalloc (``"memory"``).
+    """
+
+    def __init__(self, enabled: bool = False, slowest: int = 20,
+                 profile_stage: Optional[str] = None, profile_mode: str = "cpu",
+                 profile_output: Optional[str] = None):
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.slowest = slowest
+        self._pages: List[tuple] = []  # min-heap of (seconds, number, filename, render, save)
+        self.profile_stage = profile_stage
+        self.profile_mode = profile_mode
+        self.profile_output = profile_output or f"profile-{profile_stage}.prof"
+        self.memory_profile: Optional[List[dict]] = None
+
+    def stage(self, name: str):
+        """Context manager timing one stage; repeated stages accumulate."""
+        if not self.enabled and name != self.profile_stage:
+            return _DISABLED
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str):
+        profiler = self._start_profile() if name == self.profile_stage else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if profiler is not None:
+                self._stop_profile(profiler)
+            stage = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "calls": 0})
+            stage["wall_seconds"] += wall
+            stage["cpu_seconds"] += cpu
+            stage["calls"] += 1
+
+    def _start_profile(self):
+        if self.profile_mode == "memory":
+            import tracemalloc
+            tracemalloc.start()
+            return tracemalloc
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profile(self, profiler):
+        if self.profile_mode == "memory":
+            snapshot = profiler.take_snapshot()
+            profiler.stop()
+            self.memory_profile = [
+                {"location": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:25]
+            ]
+        else:
+            profiler.disable()
+            profiler.dump_stats(self.profile_output)
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def counted(self, items: Iterable, name: str = "lines", weight: Optional[Callable] = None) -> Iterable:
+        """Pass ``items`` through, counting them (or their ``weight``) when enabled."""
+        if not self.enabled:
+            return items
+        return self._count_items(items, name, weight)
+
+    def _count_items(self, items: Iterable, name: str, weight: Optional[Callable]):
+        count = 0
+        try:
+            for item in items:
+                count += 1 if weight is None else weight(item)
+                yield item
+        finally:
+            self.count(name, count)
+
+    def page(self, number: int, filename: str, render_seconds: float, save_seconds: float, size: int):
+        """Record one written page, keeping the slowest ``slowest`` of them."""
+        if not self.enabled:
+            return
+        self.count("pages_rendered")
+        self.count("bytes_written", size)
+        # Pages may render in worker processes, so only their wall time is known
+        for name, seconds in (("page_render", render_seconds), ("page_save", save_seconds)):
+            stage = self.stages.setdefault(name, {"wall_seconds": 0.0, "calls": 0})
+            stage["wall_seconds"] += seconds
+            stage["calls"] += 1
+        entry = (render_seconds + save_seconds, number, filename, render_seconds, save_seconds)
+        if len(self._pages) < self.slowest:
+            heapq.heappush(self._pages, entry)
+        elif entry > self._pages[0]:
+            heapq.heapreplace(self._pages, entry)
+
+    def report(self) -> dict:
+        report = {
+            "stages": {name: {key: round(value, 6) if isinstance(value, float) else value
+                              for key, value in stage.items()}
+                       for name, stage in self.stages.items()},
+            "counts": dict(self.counts),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "slowest_pages": [
+                {"number": number, "file": filename, "seconds": round(seconds, 6),
+                 "render_seconds": round(render, 6), "save_seconds": round(save, 6)}
+                for seconds, number, filename, render, save in sorted(self._pages, reverse=True)
+            ],
+        }
+        if self.memory_profile is not None:
+            report["memory_profile"] = {"stage": self.profile_stage, "top": self.memory_profile}
+        elif self.profile_stage in self.stages:
+            report["cpu_profile"] = {"stage": self.profile_stage, "file": os.path.abspath(self.profile_output)}
+        return report
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(self.report(), report_file, indent=2)
+            report_file.write("\n")
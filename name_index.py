@@ -0,0 +1,119 @@
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+# Danish letters do not decompose under NFKD, so fold them explicitly
+_LETTER_FOLDS = str.maketrans({"æ": "ae", "ø": "oe", "å": "aa", "ß": "ss"})
+
+# Spelling variants common in Danish records, applied in order; a
+# remaining "c" is resolved between the two groups
+_HARD_SOUNDS = [("sch", "s"), ("ch", "k"), ("ck", "k"), ("q", "k")]
+_OTHER_SOUNDS = [
+    ("ph", "f"), ("th", "t"), ("dt", "t"), ("w", "v"), ("x", "ks"), ("z", "s"),
+    ("ae", "e"), ("oe", "o"), ("aa", "a"), ("ie", "i"), ("y", "i"),
+]
+_HARD_C = re.compile(r"c(?=[aou])")
+_DOUBLE = re.compile(r"(.)\1+")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def normalize_name(name: str) -> str:
+    """Case- and diacritic-fold ``name`` and reduce it to space-separated words."""
+    folded = name.casefold()
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded.translate(_LETTER_FOLDS))
+        folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return " ".join(_WORD.findall(folded))
+
+def phonetic_key(word: str) -> str:
+    """Return a sound-alike key for one normalised word (Jørgensen ~ Jorgensøn)."""
+    for old, new in _HARD_SOUNDS:
+        word = word.replace(old, new)
+    if "c" in word:
+        word = _HARD_C.sub("k", word).replace("c", "s")
+    for old, new in _OTHER_SOUNDS:
+        word = word.replace(old, new)
+    if word.startswith(("hj", "hv")):
+        word = word[1:]
+    if word.endswith(("sen", "son")):
+        word = word[:-3] + "sn"
+    return _DOUBLE.sub(r"\1", word)
+
+def _contains(indices: array, value: int) -> bool:
+    position = bisect_left(indices, value)
+    return position < len(indices) and indices[position] == value
+
+class NameIndex:
+    """Lookup tables from normalised names to individual store indices.
+
+    ``search`` tries, in order: the full normalised name, all query words
+    as name words, and all query words by phonetic key. Each table maps a
+    key to a sorted integer array, so a query costs a few dict lookups and
+    a bisect per candidate instead of a scan over the individuals.
+    """
+
+    def __init__(self, names: Iterable[Tuple[int, str]]):
+        full: Dict[str, List[int]] = {}
+        words: Dict[str, List[int]] = {}
+        phonetic: Dict[str, List[int]] = {}
+
+        # Names repeat their words far more than whole names, so normalise
+        # and key each distinct raw word once
+        word_cache: Dict[str, Tuple[str, ...]] = {}
+        phonetic_cache: Dict[str, str] = {}
+        for index, name in names:
+            name_words = []
+            for raw_word in name.split():
+                normalized_words = word_cache.get(raw_word)
+                if normalized_words is None:
+                    normalized_words = word_cache[raw_word] = tuple(normalize_name(raw_word).split())
+                name_words.extend(normalized_words)
+            if not name_words:
+                continue
+
+            full.setdefault(" ".join(name_words), []).append(index)
+            for word in set(name_words):
+                words.setdefault(word, []).append(index)
+                key = phonetic_cache.get(word)
+                if key is None:
+                    key = phonetic_cache[word] = phonetic_key(word)
+                phonetic.setdefault(key, []).append(index)
+
+        self.full = self._freeze(full)
+        self.words = self._freeze(words)
+        self.phonetic = self._freeze(phonetic)
+
+    @staticmethod
+    def _freeze(table: Dict[str, List[int]]) -> Dict[str, array]:
+        return {key: array('i', sorted(indices)) for key, indices in table.items()}
+
+    def _all_words(self, table: Dict[str, array], words: List[str]) -> List[int]:
+        candidates = [table.get(word) for word in words]
+        if not all(candidates):
+            return []
+        candidates.sort(key=len)
+        matches = candidates[0]
+        for other in candidates[1:]:
+            if len(other) > 32 * len(matches):
+                # Probe a much longer list by bisection instead of walking it
+                matches = [index for index in matches if _contains(other, index)]
+            else:
+                common = set(matches).intersection(other)
+                matches = [index for index in matches if index in common]
+            if not matches:
+                return []
+        return list(matches)
+
+    def search(self, query: str) -> List[int]:
+        """Return the store indices matching ``query``, in file order."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        if normalized in self.full:
+            return list(self.full[normalized])
+
+        words = normalized.split()
+        return (self._all_words(self.words, words)
+                or self._all_words(self.phonetic, [phonetic_key(word) for word in words]))
@@ -0,0 +1,45 @@
+from importlib import import_module
+from typing import Dict, List, NamedTuple
+
+class OutputFormat(NamedTuple):
+    """An output format and the generator class that renders it.
+
+    ``generator`` is a "module:Class" path, imported the first time the
+    format is used, so formats cost nothing until they are selected. The
+    class is constructed with the GedcomProcessor (None in pool workers,
+    which render from finished payloads) and provides:
+
+    - ``page_payload(ahnentafel, number, person, depth)``: the data shown
+      on one page; it is fingerprinted and sent to pool workers
+    - ``render_page(number, payload, depth)``: the rendered page
+    - ``save_page(rendered, filename)``: write it, returning the byte size
+    - ``page_bytes(rendered)``: the bytes of the page file
+    - ``open_bundle(path)``: a context manager whose
+      ``add_page(number, payload, depth)`` streams pages into one file
+    """
+    name: str
+    extension: str
+    content_type: str
+    generator: str
+
+_FORMATS: Dict[str, OutputFormat] = {}
+
+def register_format(name: str, extension: str, content_type: str, generator: str):
+    _FORMATS[name] = OutputFormat(name, extension, content_type, generator)
+
+def format_names() -> List[str]:
+    return list(_FORMATS)
+
+def get_format(name: str) -> OutputFormat:
+    try:
+        return _FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown output format: {name}") from None
+
+def generator_class(name: str) -> type:
+    module, _, class_name = get_format(name).generator.partition(":")
+    return getattr(import_module(module), class_name)
+
+register_format("markdown", "md", "text/markdown; charset=utf-8", "markdown_generator:MarkdownGenerator")
+register_format("word", "docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                "word_document_generator:WordDocumentGenerator")
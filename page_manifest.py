@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable
+
+# Bump whenever page rendering changes, so every page is rewritten once
+GENERATOR_VERSION = 2
+
+MANIFEST_NAME = ".anetavle-manifest.json"
+
+def page_fingerprint(job) -> str:
+    """Fingerprint a page job from everything that ends up on the page.
+
+    The job payload holds the finished cell or page texts, i.e. the
+    persons and fields shown, so any edit to them changes the fingerprint.
+    """
+    format, _, number, payload, depth = job
+    key = repr((GENERATOR_VERSION, format, depth, number, payload))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+class PageManifest:
+    """Fingerprints of the pages last written to an output directory."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.pages: Dict[str, str] = {}
+        try:
+            with open(self.path, encoding="utf-8") as manifest:
+                data = json.load(manifest)
+            if data.get("generator") == GENERATOR_VERSION:
+                self.pages = data["pages"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def is_current(self, filename: str, fingerprint: str) -> bool:
+        name = os.path.basename(filename)
+        return self.pages.get(name) == fingerprint and os.path.exists(filename)
+
+    def remove_stale(self, current: Iterable[str]):
+        """Delete pages listed in the manifest that are no longer produced."""
+        removed = []
+        for name in set(self.pages) - set(current):
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+            except FileNotFoundError:
+                pass
+            removed.append(name)
+        return removed
+
+    def save(self, pages: Dict[str, str]):
+        self.pages = pages
+        temp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as manifest:
+            json.dump({"generator": GENERATOR_VERSION, "pages": pages}, manifest, indent=0, sort_keys=True)
+        os.replace(temp_file, self.path)
@@ -0,0 +1,87 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from gedcom_encoding import WIDE_ENCODINGS, decoder, file_encoding
+from gedcom_processor import scan_records
+from individual_store import IndividualStore
+
+def _next_record_start(gedcom, position: int):
+    """Return the offset of the first level-0 line starting after ``position``."""
+    # Step back one byte so a line that starts exactly at "position" is found
+    gedcom.seek(position - 1)
+    offset = position - 1
+    window = b""
+    while True:
+        block = gedcom.read(1 << 16)
+        if not block:
+            return None
+        found = (window + block).find(b"\n0 ")
+        if found != -1:
+            return offset - len(window) + found + 1
+        offset += len(block)
+        window = block[-2:]
+
+def split_at_records(gedcom_file: str, chunks: int) -> List[Tuple[int, int]]:
+    """Split ``gedcom_file`` into up to ``chunks`` byte ranges.
+
+    Every range starts at the beginning of a level-0 line, so no record is
+    cut in two. Ranges are returned in file order.
+    """
+    size = os.path.getsize(gedcom_file)
+    if size == 0:
+        return []
+
+    starts = [0]
+    with open(gedcom_file, 'rb') as gedcom:
+        for chunk in range(1, chunks):
+            position = size * chunk // chunks
+            if position <= starts[-1]:
+                continue
+            start = _next_record_start(gedcom, position)
+            if start is None:
+                break
+            if start > starts[-1]:
+                starts.append(start)
+
+    return list(zip(starts, starts[1:] + [size]))
+
+def _parse_chunk(job: Tuple[str, int, int, Optional[dict], str]) -> Tuple[List[tuple], Dict[str, tuple]]:
+    gedcom_file, start, end, fields, encoding = job
+    with open(gedcom_file, 'rb') as gedcom:
+        gedcom.seek(start)
+        data = gedcom.read(end - start)
+
+    rows = []
+    families: Dict[str, tuple] = {}
+    for kind, xref, record in scan_records(data, fields, decoder(encoding)):
+        if kind == "INDI":
+            rows.append((xref, *record))
+        else:
+            families[xref] = (record[0], record[1], record[2])
+    return rows, families
+
+def parse_parallel(processor, gedcom_file: str, jobs: int):
+    """Parse ``gedcom_file`` into ``processor`` using ``jobs`` worker processes.
+
+    Chunks are parsed independently and merged in file order, so the
+    result is the same as ``GedcomProcessor._parse_gedcom``. UTF-16 files
+    cannot be split at byte offsets and are parsed in one process.
+    """
+    encoding = file_encoding(gedcom_file)
+    ranges = split_at_records(gedcom_file, jobs) if encoding not in WIDE_ENCODINGS else []
+    if jobs <= 1 or len(ranges) <= 1:
+        processor._parse_gedcom(gedcom_file)
+        return
+
+    individuals = IndividualStore(processor.extra_fields)
+    families: Dict[str, tuple] = {}
+    chunk_jobs = [(gedcom_file, start, end, processor.fields, encoding) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for rows, chunk_families in pool.map(_parse_chunk, chunk_jobs):
+            for row in rows:
+                individuals.add(*row)
+            families.update(chunk_families)
+
+    processor.individuals = individuals
+    processor._resolve_family_links(families)
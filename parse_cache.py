@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+from typing import Optional
+
+# Bump whenever the parser or IndividualStore layout changes, so that
+# snapshots written by older versions are ignored.
+CACHE_VERSION = 3
+
+def file_fingerprint(gedcom_file: str, with_hash: bool = True) -> dict:
+    stat = os.stat(gedcom_file)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(gedcom_file, 'rb') as gedcom:
+            for block in iter(lambda: gedcom.read(1 << 20), b""):
+                digest.update(block)
+        fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+def cache_path(gedcom_file: str, cache_dir: Optional[str] = None) -> str:
+    """Return the snapshot path for ``gedcom_file``.
+
+    Without a cache directory the snapshot is stored next to the input.
+    In a shared cache directory the name includes a hash of the absolute
+    input path, so files with the same name do not collide.
+    """
+    if not cache_dir:
+        return gedcom_file + ".cache"
+    path_hash = hashlib.sha1(os.path.abspath(gedcom_file).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.basename(gedcom_file)}.{path_hash}.cache")
+
+def load_snapshot(processor, gedcom_file: str, snapshot_file: str) -> bool:
+    """Load a valid snapshot into ``processor``; return False if there is none.
+
+    The header is read first. A matching size and mtime is accepted
+    directly; if only the mtime differs, the content hash decides, and a
+    snapshot accepted by its hash is saved again with the new mtime.
+    """
+    touched = None  # Fingerprint of a file whose mtime changed but whose content did not
+    try:
+        with open(snapshot_file, 'rb') as snapshot:
+            header = pickle.load(snapshot)
+            if header.get("version") != CACHE_VERSION or header.get("fields") != processor.fields:
+                return False
+
+            current = file_fingerprint(gedcom_file, with_hash=False)
+            if current["size"] != header["size"]:
+                return False
+            if current["mtime_ns"] != header["mtime_ns"]:
+                touched = file_fingerprint(gedcom_file)
+                if touched["sha256"] != header["sha256"]:
+                    return False
+
+            processor.individuals = pickle.load(snapshot)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+        return False
+
+    if touched is not None:
+        try:
+            save_snapshot(processor, gedcom_file, snapshot_file, touched)
+        except OSError as e:
+            print(f"Could not update parse cache {snapshot_file}: {e}")
+    return True
+
+def save_snapshot(processor, gedcom_file: str, snapshot_file: str, fingerprint: Optional[dict] = None):
+    """Write ``processor``'s individuals to ``snapshot_file``.
+
+    ``fingerprint`` is the file_fingerprint of ``gedcom_file`` if the
+    caller has it already, so the file is not hashed twice.
+    """
+    header = dict(fingerprint) if fingerprint is not None else file_fingerprint(gedcom_file)
+    header["version"] = CACHE_VERSION
+    header["fields"] = processor.fields
+
+    directory = os.path.dirname(snapshot_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write to a temporary file first so a crash never leaves a torn snapshot
+    temp_file = f"{snapshot_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'wb') as snapshot:
+        pickle.dump(header, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(processor.individuals, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, snapshot_file)
+
+def parse_with_cache(processor, gedcom_file: str, cache_dir: Optional[str] = None, jobs: int = 1) -> bool:
+    """Fill ``processor`` from the snapshot or by parsing; return True on a cache hit."""
+    snapshot_file = cache_path(gedcom_file, cache_dir)
+    if load_snapshot(processor, gedcom_file, snapshot_file):
+        return True
+
+    if jobs > 1:
+        from parallel_parser import parse_parallel
+        parse_parallel(processor, gedcom_file, jobs)
+    else:
+        processor._parse_gedcom(gedcom_file)
+    try:
+        save_snapshot(processor, gedcom_file, snapshot_file)
+    except OSError as e:
+        print(f"Could not write parse cache {snapshot_file}: {e}")
+    return False
@@ -0,0 +1,223 @@
+import csv
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from gedcom_dates import ABOUT, AFTER, BEFORE, EXACT, RANGE, parse_date
+from individual_store import IndividualStore, NO_PERSON
+
+NO_DATE = -1  # Qualifier of a missing or unreadable date
+
+# How each qualifier is counted in the date quality summary
+DATE_QUALITY = {EXACT: "exact", ABOUT: "approximate", RANGE: "range", BEFORE: "bounded", AFTER: "bounded",
+                NO_DATE: "missing"}
+
+# Longer lifespans are typing errors; shorter than 0 ones are integrity errors
+MAX_LIFESPAN = 120
+
+# Projected for --stats: the SURN of the name, or the part of it between slashes
+STATS_FIELDS = {"surname": ("NAME", "SURN")}
+
+class DateColumns(NamedTuple):
+    """Parsed dates as parallel NumPy columns; month and day are 0 when unknown."""
+    year: np.ndarray
+    month: np.ndarray
+    day: np.ndarray
+    qualifier: np.ndarray
+    last_year: np.ndarray
+
+    def take(self, rows: np.ndarray) -> "DateColumns":
+        return DateColumns(*(column[rows] for column in self))
+
+    def mid_year(self) -> np.ndarray:
+        """Return the year, or the middle of a range."""
+        return np.where(self.qualifier == RANGE, (self.year + self.last_year) // 2, self.year)
+
+class RootStats(NamedTuple):
+    xref: str
+    name: str
+    generations: int  # Deepest generation with a known ancestor; the root alone is 1
+    ancestors: int  # Distinct ancestors, not counting the root
+    positions: int  # Ancestor positions, counting an ancestor once per line of descent
+    implex_ratio: float  # 1 - ancestors / positions
+
+class PopulationStats(NamedTuple):
+    individuals: int
+    births_per_decade: Dict[int, int]
+    date_quality: Dict[str, Dict[str, int]]  # Per event, the number of dates of each qualifier
+    lifespans: Dict[str, float]
+    lifespan_by_birth_decade: Dict[int, Tuple[int, float]]  # Decade -> (count, mean)
+    surnames: List[Tuple[str, int]]
+    roots: List[RootStats]
+
+    def as_dict(self) -> dict:
+        return {
+            "individuals": self.individuals,
+            "births_per_decade": {str(decade): count for decade, count in self.births_per_decade.items()},
+            "date_quality": self.date_quality,
+            "lifespans": self.lifespans,
+            "lifespan_by_birth_decade": {str(decade): {"count": count, "mean": mean}
+                                         for decade, (count, mean) in self.lifespan_by_birth_decade.items()},
+            "surnames": dict(self.surnames),
+            "roots": [root._asdict() for root in self.roots],
+        }
+
+    def rows(self) -> Iterable[Tuple[str, str, object]]:
+        """Yield (section, key, value) rows for the CSV report."""
+        yield "individuals", "", self.individuals
+        for decade, count in self.births_per_decade.items():
+            yield "births_per_decade", decade, count
+        for event, counts in self.date_quality.items():
+            for qualifier, count in counts.items():
+                yield f"{event}_dates", qualifier, count
+        for key, value in self.lifespans.items():
+            yield "lifespan", key, value
+        for decade, (_, mean) in self.lifespan_by_birth_decade.items():
+            yield "mean_lifespan_by_birth_decade", decade, mean
+        for surname, count in self.surnames:
+            yield "surnames", surname, count
+        for root in self.roots:
+            for field in ("generations", "ancestors", "positions", "implex_ratio"):
+                yield field, root.xref, getattr(root, field)
+
+def _column(values) -> np.ndarray:
+    """Return an ``array('i')`` or bytearray column as a NumPy array without copying."""
+    return np.frombuffer(values, dtype=np.intc if not isinstance(values, bytearray) else np.uint8)
+
+def date_columns(strings: List[str], string_ids: np.ndarray) -> DateColumns:
+    """Parse the date strings ``string_ids`` point to into numeric columns.
+
+    Each distinct string is parsed once and the results are spread over
+    the rows with one fancy index per column.
+    """
+    distinct, rows = np.unique(string_ids, return_inverse=True)
+    table = DateColumns(np.zeros(len(distinct), np.int16), np.zeros(len(distinct), np.int8),
+                        np.zeros(len(distinct), np.int8), np.full(len(distinct), NO_DATE, np.int8),
+                        np.zeros(len(distinct), np.int16))
+    for position, string_id in enumerate(distinct.tolist()):
+        date = parse_date(strings[string_id]) if string_id else None
+        if date is not None:
+            for column, value in zip(table, date):
+                column[position] = value
+    return table.take(rows)
+
+def _decade_counts(decades: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[int, np.ndarray]:
+    if not len(decades):
+        return 0, np.zeros(0)
+    first = int(decades.min())
+    return first, np.bincount(decades - first, weights)
+
+def _lifespans(births: DateColumns, deaths: DateColumns) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the lifespans in whole years of rows with a usable birth and death, and those rows."""
+    usable = np.isin(births.qualifier, (EXACT, ABOUT)) & np.isin(deaths.qualifier, (EXACT, ABOUT))
+    rows = np.flatnonzero(usable)
+    birth, death = births.take(rows), deaths.take(rows)
+    years = death.year.astype(np.int32) - birth.year
+    # A year is not complete until the birthday, where both dates say enough to tell
+    months_known = (birth.month > 0) & (death.month > 0)
+    days_known = months_known & (birth.day > 0) & (death.day > 0)
+    before_birthday = months_known & ((death.month < birth.month)
+                                      | (days_known & (death.month == birth.month) & (death.day < birth.day)))
+    years -= before_birthday
+    plausible = (years >= 0) & (years <= MAX_LIFESPAN)
+    return years[plausible], rows[plausible]
+
+def implex(store: IndividualStore, root_index: int, generations: Optional[int] = None) -> Tuple[int, int, int]:
+    """Return (generations, distinct ancestors, ancestor positions) above ``root_index``.
+
+    The pedigree is walked one generation at a time over the parent
+    columns. Each generation is a set of distinct individuals with the
+    number of lines of descent reaching them, so an ancestor appearing
+    in many places is visited once per generation, not once per place.
+    """
+    fathers, mothers = _column(store._fathers), _column(store._mothers)
+    present = _column(store._present).astype(bool)
+    seen = np.zeros(len(present), dtype=bool)
+    frontier, lines = np.array([root_index]), np.ones(1)
+    depth, ancestors, positions = 1, 0, 0.0
+    while generations is None or depth < generations:
+        parents = np.concatenate((fathers[frontier], mothers[frontier]))
+        parent_lines = np.concatenate((lines, lines))
+        known = parents != NO_PERSON
+        known[known] = present[parents[known]]
+        if not known.any():
+            break
+        frontier, inverse = np.unique(parents[known], return_inverse=True)
+        lines = np.bincount(inverse, parent_lines[known])
+        depth += 1
+        new = ~seen[frontier]
+        seen[frontier] = True
+        ancestors += int(new.sum())
+        positions += float(lines.sum())
+        # A pedigree n generations deep has at least n - 1 distinct ancestors,
+        # so going deeper without meeting anyone new means a cycle
+        if depth - 1 > ancestors:
+            depth -= 1
+            break
+    return depth, ancestors, int(positions)
+
+def population_stats(gedcom_processor, roots: Iterable = (), generations: Optional[int] = None) -> PopulationStats:
+    """Compute the population statistics of the loaded file and the implex of ``roots`` (--stats).
+
+    Surnames are counted from the "surname" field, so the processor
+    must project STATS_FIELDS; without it the surname list is empty.
+    """
+    store = gedcom_processor.individuals
+    store.load_all()
+    strings = store._strings
+    rows = np.flatnonzero(_column(store._present))
+
+    births = date_columns(strings, _column(store._births)[rows])
+    deaths = date_columns(strings, _column(store._deaths)[rows])
+    date_quality = {}
+    for event, dates in (("birth", births), ("death", deaths)):
+        counts = np.bincount(dates.qualifier.astype(np.int32) - NO_DATE, minlength=len(DATE_QUALITY))
+        quality = date_quality[event] = dict.fromkeys(DATE_QUALITY.values(), 0)
+        for qualifier, count in enumerate(counts.tolist(), start=NO_DATE):
+            quality[DATE_QUALITY[qualifier]] += count
+
+    dated = np.isin(births.qualifier, (EXACT, ABOUT, RANGE))
+    first, counts = _decade_counts(births.mid_year()[dated] // 10)
+    births_per_decade = {(first + offset) * 10: int(count) for offset, count in enumerate(counts) if count}
+
+    years, lived = _lifespans(births, deaths)
+    lifespans = {"count": int(len(years))}
+    lifespan_by_birth_decade = {}
+    if len(years):
+        lifespans.update(mean=round(float(years.mean()), 2), median=float(np.median(years)),
+                         min=int(years.min()), max=int(years.max()))
+        decades = births.year[lived] // 10
+        first, counts = _decade_counts(decades)
+        _, totals = _decade_counts(decades, years)
+        lifespan_by_birth_decade = {(first + offset) * 10: (int(count), round(float(total / count), 2))
+                                    for offset, (count, total) in enumerate(zip(counts, totals)) if count}
+
+    surname_list = []
+    if "surname" in store.extra_fields:
+        # Surnames are interned strings, so counting their ids counts the surnames
+        surname_ids, surname_counts = np.unique(_column(store._extra["surname"])[rows], return_counts=True)
+        order = np.argsort(-surname_counts, kind="stable")
+        surname_list = [(strings[surname_id], count) for surname_id, count
+                        in zip(surname_ids[order].tolist(), surname_counts[order].tolist()) if surname_id]
+
+    root_stats = []
+    for root in roots:
+        depth, ancestors, positions = implex(store, root._index, generations)
+        root_stats.append(RootStats(root.id, root.name, depth, ancestors, positions,
+                                    round(1 - ancestors / positions, 4) if positions else 0.0))
+
+    return PopulationStats(len(rows), births_per_decade, date_quality, lifespans,
+                           lifespan_by_birth_decade, surname_list, root_stats)
+
+def write_stats(stats: PopulationStats, path: str):
+    """Write ``stats`` as CSV if ``path`` ends in .csv, else as JSON."""
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as stats_file:
+            writer = csv.writer(stats_file)
+            writer.writerow(["section", "key", "value"])
+            writer.writerows(stats.rows())
+    else:
+        with open(path, "w", encoding="utf-8") as stats_file:
+            json.dump(stats.as_dict(), stats_file, indent=2, ensure_ascii=False)
+            stats_file.write("\n")
@@ -0,0 +1,250 @@
+import mmap
+import os
+import pickle
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from gedcom_encoding import HEAD_BYTES, WIDE_ENCODINGS, decoder, file_encoding
+from gedcom_processor import INDIVIDUAL_FIELDS, _last_tag, _line_value, scan_records
+from individual_store import IndividualStore, Individual, NO_PERSON
+
+# Bump whenever the index layout changes
+INDEX_VERSION = 3
+
+class RecordIndex:
+    """Byte offset and length of every level-0 record in a GEDCOM file.
+
+    Records are kept in file order in flat arrays; ``positions`` maps an
+    xref to its position in those arrays. Records without an xref, such as
+    HEAD and TRLR, are indexed too but can only be reached by position.
+    ``child_families`` lists the FAM records naming each xref as CHIL, in
+    file order, so parents can be found without decoding every family.
+    ``line_break`` is the byte lines end with: LF, also in CRLF files, or
+    CR in files with bare CR line endings.
+    """
+
+    def __init__(self):
+        self.line_break = b"\n"
+        self.tags: List[str] = []
+        self.xrefs: List[Optional[str]] = []
+        self.offsets = array('q')
+        self.lengths = array('q')
+        self.positions: Dict[str, int] = {}
+        self.child_families: Dict[str, Sequence[str]] = {}
+
+    def add(self, tag: str, xref: Optional[str], offset: int, length: int):
+        if xref:
+            self.positions[xref] = len(self.tags)
+        # Interned, so the pickled index stores each tag once
+        self.tags.append(sys.intern(tag))
+        self.xrefs.append(xref)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+
+    def span(self, xref: str) -> Optional[Tuple[int, int]]:
+        position = self.positions.get(xref)
+        if position is None:
+            return None
+        return self.offsets[position], self.lengths[position]
+
+    def tag_of(self, xref: str) -> Optional[str]:
+        position = self.positions.get(xref)
+        return None if position is None else self.tags[position]
+
+    def xrefs_with_tag(self, tag: str) -> Iterator[str]:
+        for record_tag, xref in zip(self.tags, self.xrefs):
+            if record_tag == tag and xref:
+                yield xref
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+def _line_break(buffer) -> bytes:
+    """Return the byte lines in ``buffer`` end with, judged from the first line break."""
+    line_end = buffer.find(b"\n", 0, HEAD_BYTES)
+    carriage_return = buffer.find(b"\r", 0, HEAD_BYTES if line_end == -1 else line_end)
+    # A CR right before the first LF belongs to a CRLF ending
+    if carriage_return != -1 and carriage_return != line_end - 1:
+        return b"\r"
+    return b"\n"
+
+def _normalized(record: bytes) -> bytes:
+    """Return ``record`` with CRLF and bare CR line endings turned into LF."""
+    if b"\r" in record:
+        return record.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return record
+
+def _record_header(buffer, offset: int, end: int, line_break: bytes = b"\n") -> Tuple[str, Optional[str]]:
+    line_end = buffer.find(line_break, offset, end)
+    if line_end == -1:
+        line_end = end
+    parts = bytes(buffer[offset:line_end]).strip().split(b" ", 2)
+    if len(parts) > 2 and parts[1].startswith(b"@"):
+        return parts[2].strip().decode('utf-8', 'replace'), parts[1].decode('utf-8', 'replace')
+    tag = parts[1] if len(parts) > 1 else b""
+    return tag.decode('utf-8', 'replace'), None
+
+def _index_children(index: RecordIndex, family_id: str, buffer, start: int, end: int):
+    marker = index.line_break + b"1 CHIL "
+    position = buffer.find(marker, start, end)
+    while position != -1:
+        line_end = buffer.find(index.line_break, position + 1, end)
+        if line_end == -1:
+            line_end = end
+        child_id = bytes(buffer[position + 8:line_end]).strip().decode('utf-8', 'replace')
+        index.child_families.setdefault(child_id, []).append(family_id)
+        position = buffer.find(marker, line_end, end)
+
+def build_record_index(gedcom_file: str) -> RecordIndex:
+    """Scan ``gedcom_file`` once for level-0 lines and index their records."""
+    index = RecordIndex()
+    if os.path.getsize(gedcom_file) == 0:
+        return index
+
+    with open(gedcom_file, 'rb') as gedcom, mmap.mmap(gedcom.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        size = len(buffer)
+        start = 3 if buffer[:3] == b"\xef\xbb\xbf" else 0
+        # Looked up once, as searching for both endings would scan to the end of the file for each record
+        line_break = index.line_break = _line_break(buffer)
+        record_start = line_break + b"0 "
+        while start < size:
+            # A record ends where the next line starting with level 0 begins
+            next_record = buffer.find(record_start, start)
+            end = size if next_record == -1 else next_record + 1
+            tag, xref = _record_header(buffer, start, end, line_break)
+            index.add(tag, xref, start, end - start)
+            if tag == "FAM" and xref:
+                _index_children(index, xref, buffer, start, end)
+            start = end
+
+    # Most children are in one family; a tuple is half the size of a list
+    for child_id, families in index.child_families.items():
+        index.child_families[child_id] = tuple(families)
+    return index
+
+def index_path(gedcom_file: str) -> str:
+    return gedcom_file + ".idx"
+
+def load_record_index(gedcom_file: str) -> RecordIndex:
+    """Return the index stored beside ``gedcom_file``, rebuilding it if stale."""
+    stat = os.stat(gedcom_file)
+    stamp = (INDEX_VERSION, stat.st_size, stat.st_mtime_ns)
+    path = index_path(gedcom_file)
+    try:
+        with open(path, 'rb') as stored:
+            if pickle.load(stored) == stamp:
+                return pickle.load(stored)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        pass
+
+    index = build_record_index(gedcom_file)
+    try:
+        temp_file = f"{path}.{os.getpid()}.tmp"
+        with open(temp_file, 'wb') as stored:
+            pickle.dump(stamp, stored, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(index, stored, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, path)
+    except OSError as e:
+        print(f"Could not write record index {path}: {e}")
+    return index
+
+class LazyIndividualStore(IndividualStore):
+    """IndividualStore that decodes INDI and FAM records on first access.
+
+    Parents are resolved through the families that list the individual as
+    CHIL, so following a pedigree only decodes the records on that pedigree.
+    ``records_loaded`` counts the records decoded so far.
+    """
+
+    def __init__(self, gedcom_file: str, index: RecordIndex, fields: Optional[Dict[str, Tuple[str, ...]]] = None):
+        super().__init__(tuple(fields or ())[len(INDIVIDUAL_FIELDS):])
+        self.index = index
+        self.fields = fields
+        self.records_loaded = 0
+        self.decode = decoder(file_encoding(gedcom_file))
+        self._gedcom = open(gedcom_file, 'rb')
+        self._buffer = mmap.mmap(self._gedcom.fileno(), 0, access=mmap.ACCESS_READ) if index else b""
+        self._indi_count = sum(1 for tag in index.tags if tag == "INDI")
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._gedcom.close()
+
+    def _record_bytes(self, xref: str) -> bytes:
+        offset, length = self.index.span(xref)
+        self.records_loaded += 1
+        return self._buffer[offset:offset + length]
+
+    def _load(self, xref: str) -> bool:
+        if self.index.tag_of(xref) != "INDI":
+            return False
+
+        for kind, record_xref, data in scan_records(self._record_bytes(xref), self.fields, self.decode):
+            if kind == "INDI":
+                self.add(record_xref, *data)
+
+        # Resolve parents through the families this person is a child in
+        for family_id in self.index.child_families.get(xref, ()):
+            for kind, _, data in scan_records(self._record_bytes(family_id), None, self.decode):
+                if kind == "FAM":
+                    self.link_parents(xref, data[0], data[1])
+        return True
+
+    def _ensure(self, xref) -> bool:
+        if IndividualStore.__contains__(self, xref):
+            return True
+        return self._load(xref)
+
+    def load_all(self):
+        for xref in self.index.xrefs_with_tag("INDI"):
+            self._ensure(xref)
+
+    def iter_names(self) -> Iterator[Tuple[int, str]]:
+        # Read only the raw NAME lines, without decoding whole records;
+        # xrefs are interned so their records can be loaded by index later.
+        # As when parsing, the last NAME of a record is the one kept.
+        for xref in self.index.xrefs_with_tag("INDI"):
+            offset, length = self.index.span(xref)
+            record = _normalized(self._buffer[offset:offset + length])
+            tag_end = _last_tag(record, b"\n1 NAME", 0, len(record))
+            if tag_end == -1:
+                yield self.xref_index(xref), ""
+                continue
+            value = _line_value(record, tag_end, len(record), b"\n2 CON")
+            yield self.xref_index(xref), self.decode(value).replace('/', '').strip()
+
+    def person(self, index: int) -> Optional[Individual]:
+        if index != NO_PERSON and not self._present[index]:
+            self._load(self._xrefs[index])
+        return super().person(index)
+
+    def __getitem__(self, xref: str) -> Individual:
+        if not self._ensure(xref):
+            raise KeyError(xref)
+        return super().__getitem__(xref)
+
+    def __contains__(self, xref) -> bool:
+        return self.index.tag_of(xref) == "INDI"
+
+    def __iter__(self) -> Iterator[str]:
+        return self.index.xrefs_with_tag("INDI")
+
+    def __len__(self) -> int:
+        return self._indi_count
+
+    def __getstate__(self):
+        raise TypeError("LazyIndividualStore reads from an open file and cannot be pickled")
+
+def open_lazy(processor, gedcom_file: str) -> IndividualStore:
+    """Point ``processor`` at an on-demand view of ``gedcom_file``.
+
+    UTF-16 files have no byte offsets to index and are parsed in full.
+    """
+    if file_encoding(gedcom_file) in WIDE_ENCODINGS:
+        print("UTF-16 files cannot be indexed; reading the whole file")
+        processor._parse_gedcom(gedcom_file)
+        return processor.individuals
+    processor.individuals = LazyIndividualStore(gedcom_file, load_record_index(gedcom_file), processor.fields)
+    return processor.individuals
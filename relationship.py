@@ -0,0 +1,247 @@
+import csv
+from collections import OrderedDict
+from operator import add
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+from individual_store import NO_PERSON
+
+# Ancestor index entries kept across queries, summed over all cached persons
+DEFAULT_CACHE_ENTRIES = 5_000_000
+
+CSV_COLUMNS = ["person_a", "person_b", "relationship", "generations_a", "generations_b",
+               "degree", "removal", "half", "common_ancestors"]
+
+class Relationship(NamedTuple):
+    """How ``person_a`` is related to ``person_b``.
+
+    ``generations_a`` and ``generations_b`` count the generations from
+    each person up to the nearest common ancestors. ``degree`` is the
+    cousin degree (0 for siblings, aunts/uncles and nieces/nephews, None
+    in a direct line) and ``removal`` the difference in generations.
+    ``half`` is set when the two lines descend from a common ancestor
+    through different, known partners, and None when a partner on one
+    of the lines is unknown.
+    """
+    person_a: str
+    person_b: str
+    common_ancestors: Tuple[str, ...]
+    generations_a: int
+    generations_b: int
+    degree: Optional[int]
+    removal: int
+    half: Optional[bool]
+    description: str
+
+def _ordinal(number: int) -> str:
+    if 10 <= number % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
+def _direct_line(generations: int, relative: str) -> str:
+    if generations == 1:
+        return relative
+    return "great-" * (generations - 2) + "grand" + relative
+
+def describe(generations_a: int, generations_b: int, half: bool = False) -> str:
+    """Name what person a is to person b, e.g. "2nd cousin 1x removed"."""
+    half_prefix = "half " if half else ""
+    if generations_a == 0 and generations_b == 0:
+        return "same person"
+    if generations_a == 0:
+        return _direct_line(generations_b, "parent")
+    if generations_b == 0:
+        return _direct_line(generations_a, "child")
+    if generations_a == 1 and generations_b == 1:
+        return half_prefix + "sibling"
+    if generations_a == 1:
+        return half_prefix + "great-" * (generations_b - 2) + "aunt/uncle"
+    if generations_b == 1:
+        return half_prefix + "great-" * (generations_a - 2) + "niece/nephew"
+    degree = min(generations_a, generations_b) - 1
+    removal = abs(generations_a - generations_b)
+    description = f"{half_prefix}{_ordinal(degree)} cousin"
+    if removal:
+        description += f" {removal}x removed"
+    return description
+
+class RelationshipCalculator:
+    """Relationship queries over the parent links of an IndividualStore.
+
+    Each queried person gets an ancestor index: every ancestor's store
+    index mapped to its generation distance, found with one breadth-first
+    walk over ``parent_indices``. Indexes are kept in an LRU cache bounded by
+    ``cache_entries``, so batches that mention a person many times walk
+    their ancestry once, and a pair costs one set intersection of the
+    smaller index against the larger.
+    """
+
+    def __init__(self, gedcom_processor, cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.individuals = gedcom_processor.individuals
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[int, Dict[int, int]]" = OrderedDict()
+        self._cached_entries = 0
+
+    def _walk_ancestors(self, index: int) -> Dict[int, int]:
+        parent_indices = self.individuals.parent_indices
+        distances = {index: 0}
+        current = [index]
+        distance = 0
+        while current:
+            distance += 1
+            next_generation = []
+            for person in current:
+                for parent in parent_indices(person):
+                    if parent == NO_PERSON or parent in distances:
+                        continue
+                    distances[parent] = distance
+                    next_generation.append(parent)
+            current = next_generation
+        return distances
+
+    def ancestors(self, index: int) -> Dict[int, int]:
+        """Return the ancestor index of the person at store ``index``, itself included."""
+        distances = self._cache.get(index)
+        if distances is not None:
+            self._cache.move_to_end(index)
+            return distances
+        distances = self._walk_ancestors(index)
+        self._cache[index] = distances
+        self._cached_entries += len(distances)
+        while self._cached_entries > self.cache_entries and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_entries -= len(evicted)
+        return distances
+
+    def _index(self, xref: str) -> int:
+        # Looking the person up first loads its row in stores that load on demand
+        self.individuals[xref]
+        return self.individuals.xref_index(xref)
+
+    def _nearest(self, index_a: int, index_b: int) -> Tuple[List[int], int, int]:
+        ancestors_a, ancestors_b = self.ancestors(index_a), self.ancestors(index_b)
+        common = list(ancestors_a.keys() & ancestors_b.keys())
+        if not common:
+            return [], 0, 0
+
+        # Distances and totals are built with map() to stay out of the interpreter loop
+        distances_a = list(map(ancestors_a.__getitem__, common))
+        distances_b = list(map(ancestors_b.__getitem__, common))
+        totals = list(map(add, distances_a, distances_b))
+        best_total = min(totals)
+        closest = [position for position, total in enumerate(totals) if total == best_total]
+        generations_a, generations_b = min(((distances_a[position], distances_b[position]) for position in closest),
+                                           key=lambda split: abs(split[0] - split[1]))
+        nearest = sorted(common[position] for position in closest
+                         if distances_a[position] == generations_a)
+        return nearest, generations_a, generations_b
+
+    def common_ancestors(self, xref_a: str, xref_b: str) -> Tuple[List[str], int, int]:
+        """Return the nearest common ancestors of two persons and their distances.
+
+        Nearest means the fewest generations in total; when implex offers
+        several splits of that total, the most even one is used. Without
+        a common ancestor the list is empty.
+        """
+        nearest, generations_a, generations_b = self._nearest(self._index(xref_a), self._index(xref_b))
+        return [self.individuals.person(ancestor).id for ancestor in nearest], generations_a, generations_b
+
+    def _partners(self, index: int, ancestor: int, generations: int) -> Set[int]:
+        """Return the other parents of the children of ``ancestor`` on the line up from ``index``.
+
+        NO_PERSON stands for a child whose other parent is unknown.
+        """
+        parent_indices = self.individuals.parent_indices
+        partners = set()
+        for child, distance in self.ancestors(index).items():
+            if distance == generations - 1:
+                father, mother = parent_indices(child)
+                if father == ancestor:
+                    partners.add(mother)
+                elif mother == ancestor:
+                    partners.add(father)
+        return partners
+
+    def _half(self, index_a: int, index_b: int, nearest: List[int],
+              generations_a: int, generations_b: int) -> Optional[bool]:
+        """Return whether two collateral relatives are half relatives, or None if it is unknown.
+
+        They are full relatives when both lines run through the same
+        couple among the nearest common ancestors, and half relatives
+        when each nearest ancestor had the two lines' children with
+        different partners, all of them known.
+        """
+        unknown = False
+        for ancestor in nearest:
+            partners_a = self._partners(index_a, ancestor, generations_a)
+            partners_b = self._partners(index_b, ancestor, generations_b)
+            if (partners_a & partners_b) - {NO_PERSON}:
+                return False
+            unknown = (unknown or not partners_a or not partners_b
+                       or NO_PERSON in partners_a or NO_PERSON in partners_b)
+        return None if unknown else True
+
+    def relationship(self, xref_a: str, xref_b: str) -> Optional[Relationship]:
+        """Return how ``xref_a`` is related to ``xref_b``, or None if they share no ancestor."""
+        index_a, index_b = self._index(xref_a), self._index(xref_b)
+        nearest, generations_a, generations_b = self._nearest(index_a, index_b)
+        if not nearest:
+            return None
+        collateral = generations_a > 0 and generations_b > 0
+        half = self._half(index_a, index_b, nearest, generations_a, generations_b) if collateral else False
+        degree = min(generations_a, generations_b) - 1 if collateral else None
+        common = tuple(self.individuals.person(ancestor).id for ancestor in nearest)
+        return Relationship(xref_a, xref_b, common, generations_a, generations_b, degree,
+                            abs(generations_a - generations_b), half,
+                            describe(generations_a, generations_b, bool(half)))
+
+    def relationships(self, pairs: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str, Optional[Relationship], str]]:
+        """Yield (xref_a, xref_b, relationship, error) for each pair, in order."""
+        store = self.individuals
+        for xref_a, xref_b in pairs:
+            missing = [xref for xref in (xref_a, xref_b) if xref not in store]
+            if missing:
+                yield xref_a, xref_b, None, f"unknown person {' '.join(missing)}"
+            else:
+                yield xref_a, xref_b, self.relationship(xref_a, xref_b), ""
+
+def read_pairs(pairs_file: TextIO) -> Iterator[Tuple[str, str]]:
+    """Yield (xref, xref) from the first two columns of a CSV file.
+
+    A first row whose first cell is not an xref is taken as a header.
+    """
+    for row_number, row in enumerate(csv.reader(pairs_file)):
+        if len(row) < 2:
+            continue
+        xref_a, xref_b = row[0].strip(), row[1].strip()
+        if row_number == 0 and not xref_a.startswith("@"):
+            continue
+        yield xref_a, xref_b
+
+def write_relationships(rows: Iterable[Tuple[str, str, Optional[Relationship], str]], output: TextIO) -> int:
+    """Write relationships as CSV rows; return the number of pairs written."""
+    writer = csv.writer(output)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for xref_a, xref_b, relationship, error in rows:
+        if relationship is None:
+            writer.writerow([xref_a, xref_b, error or "not related", "", "", "", "", "", ""])
+        else:
+            writer.writerow([xref_a, xref_b, relationship.description, relationship.generations_a,
+                             relationship.generations_b, "" if relationship.degree is None else relationship.degree,
+                             relationship.removal, "unknown" if relationship.half is None else int(relationship.half),
+                             " ".join(relationship.common_ancestors)])
+        count += 1
+    return count
+
+def relationships_csv(gedcom_processor, pairs_path: str, output_path: str) -> int:
+    """Answer every pair in ``pairs_path`` into ``output_path`` (--relationships).
+
+    Pairs are streamed, so the batch size does not affect memory beyond
+    the ancestor index cache.
+    """
+    calculator = RelationshipCalculator(gedcom_processor)
+    with open(pairs_path, newline="", encoding="utf-8") as pairs_file, \
+            open(output_path, "w", newline="", encoding="utf-8") as output:
+        return write_relationships(calculator.relationships(read_pairs(pairs_file)), output)
@@ -0,0 +1,303 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Hashable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from ahnentafel import Ahnentafel
+from output_formats import format_names, get_format
+from parse_cache import file_fingerprint
+from tree_processor import TreeProcessor, _render_page
+
+# Ahnentafels kept per loaded file, one per recently requested root
+AHNENTAFEL_CACHE_SIZE = 32
+
+class PageCache:
+    """Rendered pages in least-recently-used order, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._pages: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            data = self._pages.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Hashable, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._pages[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+class _Snapshot:
+    """One loaded GEDCOM file with everything needed to render from it.
+
+    Stores may load rows lazily, so all access to the processor goes
+    through ``lock``. A reload builds a new snapshot, swaps it in and
+    then closes the old one, which marks it ``closed``.
+    """
+
+    def __init__(self, processor, fingerprint: dict, generation: int,
+                 generations: Optional[int], depth: int):
+        self.processor = processor
+        self.fingerprint = fingerprint
+        self.generation = generation
+        self.generations = generations
+        self.loaded_at = time.time()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.tree_processor = TreeProcessor(processor, depth=depth, generations=generations)
+        self._ahnentafels: "OrderedDict[str, Ahnentafel]" = OrderedDict()
+
+    def ahnentafel(self, root_person) -> Ahnentafel:
+        ahnentafel = self._ahnentafels.get(root_person.id)
+        if ahnentafel is None:
+            # A snapshot's data never changes, so all its roots share the person details
+            ahnentafel = Ahnentafel(self.processor, root_person, self.generations,
+                                    self.tree_processor.person_details)
+            self._ahnentafels[root_person.id] = ahnentafel
+            if len(self._ahnentafels) > AHNENTAFEL_CACHE_SIZE:
+                self._ahnentafels.popitem(last=False)
+        else:
+            self._ahnentafels.move_to_end(root_person.id)
+        return ahnentafel
+
+    def close(self):
+        """Close the store once the renders using it have finished."""
+        with self.lock:
+            self.closed = True
+            # A lazy store's mmap must not outlive it, as the file may be rewritten in place
+            self.processor.individuals.close()
+
+class RenderService:
+    """Renders anetavle pages on demand from a GEDCOM file kept in memory.
+
+    ``load_processor`` returns a freshly parsed GedcomProcessor for the
+    file. Rendered pages are kept in a PageCache. ``check_for_changes``
+    reloads the file when its size or mtime has changed; the new data is
+    parsed while the old is still served and then swapped in at once.
+    """
+
+    def __init__(self, gedcom_file: str, load_processor: Callable, processor=None,
+                 generations: Optional[int] = None, depth: int = 4, cache_bytes: int = 64 << 20):
+        self.gedcom_file = gedcom_file
+        self.load_processor = load_processor
+        self.generations = generations
+        self.depth = depth
+        self.cache = PageCache(cache_bytes)
+        self.reloads = 0
+        self.reload_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        fingerprint = file_fingerprint(gedcom_file, with_hash=False)
+        self._snapshot = _Snapshot(processor if processor is not None else load_processor(),
+                                   fingerprint, 0, generations, depth)
+
+    @property
+    def processor(self):
+        return self._snapshot.processor
+
+    @contextmanager
+    def _locked_snapshot(self):
+        """Hold the lock of the current snapshot, passing over one a reload has closed meanwhile."""
+        while True:
+            snapshot = self._snapshot
+            with snapshot.lock:
+                if not snapshot.closed:
+                    yield snapshot
+                    return
+
+    def find_roots(self, query: str) -> List:
+        """Return the individuals matching an xref or name query."""
+        with self._locked_snapshot() as snapshot:
+            return snapshot.processor.find_people(query)
+
+    def render(self, xref: str, number: int, format: str) -> Tuple[Optional[bytes], bool]:
+        """Return the page for ancestor ``number`` of the root ``xref`` and whether it was cached.
+
+        The root is looked up in the same snapshot the page is rendered
+        from, so a reload in between cannot mix two files. The page is
+        None if the root or the ahnentafel's person at ``number`` is missing.
+        """
+        get_format(format)  # Raises ValueError for unknown formats
+        # The generation keeps pages rendered from a replaced file apart
+        data = self.cache.get((self._snapshot.generation, xref, number, format))
+        if data is not None:
+            return data, True
+
+        with self._locked_snapshot() as snapshot:
+            key = (snapshot.generation, xref, number, format)
+            root_person = snapshot.processor.individuals.get(xref)
+            if root_person is None:
+                return None, False
+            ahnentafel = snapshot.ahnentafel(root_person)
+            person = ahnentafel.get(number)
+            if person is None:
+                return None, False
+            tree_processor = snapshot.tree_processor
+            job = tree_processor.page_job(ahnentafel, number, person, "", format)
+            data = _render_page(job, tree_processor.generator(format))
+        self.cache.put(key, data)
+        return data, False
+
+    def check_for_changes(self) -> bool:
+        """Reload the GEDCOM file if it changed; return True if it was reloaded."""
+        with self._reload_lock:
+            try:
+                fingerprint = file_fingerprint(self.gedcom_file, with_hash=False)
+            except OSError:
+                return False  # Being replaced; try again on the next check
+            current = self._snapshot
+            if fingerprint == current.fingerprint:
+                return False
+            try:
+                processor = self.load_processor()
+            except Exception as error:
+                # Probably a half-written file; keep serving the old data
+                self.reload_error = f"{type(error).__name__}: {error}"
+                return False
+            # A change during the load leaves a newer mtime, so it is picked up next time
+            self._snapshot = _Snapshot(processor, fingerprint, current.generation + 1,
+                                       self.generations, self.depth)
+            self.cache.clear()
+            self.reloads += 1
+            self.reload_error = None
+            current.close()
+            return True
+
+    def watch(self, interval: float = 2.0) -> threading.Thread:
+        """Check the GEDCOM file for changes every ``interval`` seconds in the background."""
+        def poll():
+            while not self._stop.wait(interval):
+                if self.check_for_changes():
+                    print(f"Reloaded {self.gedcom_file}: {len(self.processor.individuals)} individuals")
+
+        thread = threading.Thread(target=poll, name="gedcom-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "gedcom_file": self.gedcom_file,
+            "individuals": len(snapshot.processor.individuals),
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "reload_error": self.reload_error,
+            "cache": {"pages": len(self.cache), "bytes": self.cache.size, "max_bytes": self.cache.max_bytes,
+                      "hits": self.cache.hits, "misses": self.cache.misses},
+        }
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of a RenderService.
+
+    ``GET /page?root=<xref or name>&number=<n>&format=<format>``
+    returns one page; ``GET /status`` returns the service status as JSON.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/status":
+            self._send_json(200, self.server.service.status())
+        elif url.path == "/page":
+            self._page(parse_qs(url.query))
+        else:
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+
+    def _page(self, query: dict):
+        service = self.server.service
+        root = query.get("root", [""])[0]
+        format = query.get("format", ["markdown"])[0]
+        try:
+            number = int(query.get("number", ["1"])[0])
+        except ValueError:
+            number = 0
+        if not root or number < 1 or format not in format_names():
+            self._send_json(400, {"error": "Expected root, a number of at least 1 and a format: "
+                                           + ", ".join(format_names())})
+            return
+
+        matches = service.find_roots(root)
+        if not matches:
+            self._send_json(404, {"error": f"No individual matches '{root}'"})
+            return
+        if len(matches) > 1:
+            self._send_json(409, {"error": f"'{root}' matches {len(matches)} individuals",
+                                  "matches": [{"xref": person.id, "name": person.name} for person in matches[:50]]})
+            return
+
+        data, cached = service.render(matches[0].id, number, format)
+        if data is None:
+            self._send_json(404, {"error": f"No ancestor number {number} for {matches[0].id}"})
+            return
+        self._send(200, get_format(format).content_type, data, {"X-Cache": "hit" if cached else "miss"})
+
+    def _send_json(self, status: int, body: dict):
+        self._send(status, "application/json", json.dumps(body).encode("utf-8"))
+
+    def _send(self, status: int, content_type: str, data: bytes, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def make_server(service: RenderService, host: str = "127.0.0.1", port: int = 8765,
+                quiet: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
+
+def serve(processor, load_processor: Callable, args):
+    """Serve pages from ``processor`` over HTTP until interrupted (--serve)."""
+    service = RenderService(args.gedcom_file, load_processor, processor, generations=args.generations,
+                            depth=args.depth, cache_bytes=args.page_cache_mb << 20)
+    server = make_server(service, args.serve_host, args.serve)
+    service.watch(args.watch_interval)
+    host, port = server.server_address[:2]
+    print(f"Serving anetavle pages on http://{host}:{port}/page?root=<xref or name>&number=<n>&format=<format>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
@@ -0,0 +1,318 @@
+import json
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gedcom_encoding import decoder, file_encoding
+from gedcom_processor import INDIVIDUAL_FIELDS, read_record_blocks, scan_records
+from individual_store import Individual, IndividualStore, NO_PERSON
+from name_index import normalize_name, phonetic_key
+
+# Bump whenever the schema or the way it is filled changes
+SCHEMA_VERSION = 2
+
+# Rows per executemany while loading
+BATCH_SIZE = 10000
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE individuals (
+    id INTEGER PRIMARY KEY,
+    xref TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    birth_date TEXT NOT NULL,
+    death_date TEXT NOT NULL,
+    extra TEXT,
+    normalized TEXT NOT NULL,
+    father TEXT,
+    mother TEXT
+);
+CREATE TABLE families (id INTEGER PRIMARY KEY, xref TEXT NOT NULL, husband TEXT, wife TEXT);
+CREATE TABLE children (family_id INTEGER NOT NULL, child TEXT NOT NULL);
+CREATE TABLE name_words (word TEXT NOT NULL, key TEXT NOT NULL, person INTEGER NOT NULL);
+"""
+
+# Created after the bulk load, which is faster than maintaining them row by row
+_INDEXES = """
+CREATE INDEX children_child ON children (child);
+CREATE INDEX individuals_father ON individuals (father);
+CREATE INDEX individuals_mother ON individuals (mother);
+CREATE INDEX individuals_normalized ON individuals (normalized);
+CREATE INDEX name_words_word ON name_words (word, person);
+CREATE INDEX name_words_key ON name_words (key, person);
+"""
+
+# The last family naming a husband (wife) decides the father (mother), as
+# in GedcomProcessor._resolve_family_links; an empty HUSB or WIFE line
+# names no one there either
+_LINK_PARENTS = """
+UPDATE individuals SET
+    father = coalesce((SELECT families.husband FROM children JOIN families ON families.id = children.family_id
+                       WHERE children.child = individuals.xref AND families.husband IS NOT NULL
+                       AND families.husband <> ''
+                       ORDER BY families.id DESC LIMIT 1), father),
+    mother = coalesce((SELECT families.wife FROM children JOIN families ON families.id = children.family_id
+                       WHERE children.child = individuals.xref AND families.wife IS NOT NULL
+                       AND families.wife <> ''
+                       ORDER BY families.id DESC LIMIT 1), mother)
+WHERE xref IN (SELECT child FROM children)
+"""
+
+_COLUMNS = "xref, name, birth_date, death_date, extra, father, mother"
+
+def database_path(gedcom_file: str) -> str:
+    return gedcom_file + ".sqlite"
+
+def _stamp(gedcom_file: str, fields: Dict[str, Tuple[str, ...]]) -> Dict[str, str]:
+    stat = os.stat(gedcom_file)
+    return {
+        "version": str(SCHEMA_VERSION),
+        "size": str(stat.st_size),
+        "mtime_ns": str(stat.st_mtime_ns),
+        "fields": json.dumps(fields),
+    }
+
+def _is_current(db_path: str, stamp: Dict[str, str]) -> bool:
+    if not os.path.exists(db_path):
+        return False
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            stored = dict(connection.execute("SELECT key, value FROM meta"))
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return False
+    return stored == stamp
+
+class _NameWords:
+    """Normalised words and phonetic keys of names, as NameIndex indexes them."""
+
+    def __init__(self):
+        self._words: Dict[str, Tuple[str, ...]] = {}
+        self._keys: Dict[str, str] = {}
+
+    def __call__(self, name: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Return the normalised full name and its distinct (word, key) pairs."""
+        name_words = []
+        for raw_word in name.split():
+            words = self._words.get(raw_word)
+            if words is None:
+                words = self._words[raw_word] = tuple(normalize_name(raw_word).split())
+            name_words.extend(words)
+        pairs = []
+        for word in dict.fromkeys(name_words):
+            key = self._keys.get(word)
+            if key is None:
+                key = self._keys[word] = phonetic_key(word)
+            pairs.append((word, key))
+        return " ".join(name_words), pairs
+
+def build_database(gedcom_file: str, db_path: str, fields: Optional[Dict[str, Tuple[str, ...]]] = None):
+    """Stream ``gedcom_file`` into a new SQLite database at ``db_path``.
+
+    Records are inserted in batches as they are scanned, so memory does not
+    grow with the file. The database is built under a temporary name and
+    moved into place when complete.
+    """
+    fields = fields or INDIVIDUAL_FIELDS
+    temp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(_SCHEMA)
+
+        name_words = _NameWords()
+        extra_count = len(fields) - len(INDIVIDUAL_FIELDS)
+        individuals, words, families, children = [], [], [], []
+        person_id = family_id = 0
+
+        def flush():
+            connection.executemany(f"INSERT OR REPLACE INTO individuals (id, {_COLUMNS}, normalized) "
+                                   "VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?)", individuals)
+            connection.executemany("INSERT INTO name_words VALUES (?, ?, ?)", words)
+            connection.executemany("INSERT INTO families VALUES (?, ?, ?, ?)", families)
+            connection.executemany("INSERT INTO children VALUES (?, ?)", children)
+            for batch in (individuals, words, families, children):
+                batch.clear()
+
+        encoding = file_encoding(gedcom_file)
+        decode = decoder(encoding)
+        with open(gedcom_file, 'rb') as gedcom:
+            for block in read_record_blocks(gedcom, encoding=encoding):
+                for kind, xref, data in scan_records(block, fields, decode):
+                    if kind == "INDI":
+                        person_id += 1
+                        normalized, pairs = name_words(data[0])
+                        extra = json.dumps(data[3:]) if extra_count else None
+                        individuals.append((person_id, xref, data[0], data[1], data[2], extra, normalized))
+                        words.extend((word, key, person_id) for word, key in pairs)
+                    else:
+                        family_id += 1
+                        families.append((family_id, xref, data[0], data[1]))
+                        children.extend((family_id, child) for child in data[2])
+                    if len(individuals) + len(families) >= BATCH_SIZE:
+                        flush()
+        flush()
+
+        connection.executescript(_INDEXES)
+        connection.execute(_LINK_PARENTS)
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", _stamp(gedcom_file, fields).items())
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, db_path)
+
+class SqliteNameIndex:
+    """Name search with NameIndex semantics, answered by the database."""
+
+    def __init__(self, store: "SqliteIndividualStore"):
+        self.store = store
+
+    def _indices(self, sql: str, parameters) -> List[int]:
+        rows = self.store.connection.execute(sql, parameters)
+        return [self.store.xref_index(xref) for xref, in rows]
+
+    def search(self, query: str) -> List[int]:
+        """Return the store indices matching ``query``, in file order."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        matches = self._indices("SELECT xref FROM individuals WHERE normalized = ? ORDER BY id", (normalized,))
+        if matches:
+            return matches
+
+        words = normalized.split()
+        for column, values in (("word", words), ("key", [phonetic_key(word) for word in words])):
+            persons = " INTERSECT ".join(f"SELECT person FROM name_words WHERE {column} = ?" for _ in values)
+            matches = self._indices(f"SELECT xref FROM individuals WHERE id IN ({persons}) ORDER BY id", values)
+            if matches:
+                return matches
+        return []
+
+class SqliteIndividualStore(IndividualStore):
+    """IndividualStore that reads individuals from a SQLite database on demand.
+
+    Rows are copied into the in-memory columns the first time they are
+    reached, so memory follows the part of the pedigree that is used, not
+    the size of the file. ``prefetch_ancestors`` loads a whole ancestor set
+    with one recursive query instead of one query per person.
+    """
+
+    def __init__(self, db_path: str, fields: Optional[Dict[str, Tuple[str, ...]]] = None):
+        super().__init__(tuple(fields or INDIVIDUAL_FIELDS)[len(INDIVIDUAL_FIELDS):])
+        self.db_path = db_path
+        # The render service reads from request threads, one at a time
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.records_loaded = 0
+        self._total = None
+
+    def close(self):
+        self.connection.close()
+
+    def _add_row(self, row: tuple):
+        xref, name, birth_date, death_date, extra, father, mother = row
+        values = json.loads(extra) if extra else ()
+        IndividualStore.add(self, xref, name, birth_date, death_date, *values)
+        IndividualStore.link_parents(self, xref, father, mother)
+        self.records_loaded += 1
+
+    def _load(self, xref: str) -> bool:
+        row = self.connection.execute(f"SELECT {_COLUMNS} FROM individuals WHERE xref = ?", (xref,)).fetchone()
+        if row is None:
+            return False
+        self._add_row(row)
+        return True
+
+    def prefetch_ancestors(self, xref: str, generations: Optional[int] = None):
+        if generations is None:
+            # Without a depth column UNION visits every ancestor once, even with implex
+            ancestors = """
+                WITH RECURSIVE ancestors(xref) AS (
+                    SELECT ?
+                    UNION
+                    SELECT parent.xref FROM ancestors
+                    JOIN individuals person ON person.xref = ancestors.xref
+                    JOIN individuals parent ON parent.xref IN (person.father, person.mother)
+                )"""
+            parameters = (xref,)
+        else:
+            ancestors = """
+                WITH RECURSIVE ancestors(xref, depth) AS (
+                    SELECT ?, 1
+                    UNION
+                    SELECT parent.xref, ancestors.depth + 1 FROM ancestors
+                    JOIN individuals person ON person.xref = ancestors.xref
+                    JOIN individuals parent ON parent.xref IN (person.father, person.mother)
+                    WHERE ancestors.depth < ?
+                )"""
+            parameters = (xref, generations)
+        cursor = self.connection.execute(
+            f"{ancestors} SELECT {_COLUMNS} FROM individuals WHERE xref IN (SELECT xref FROM ancestors)", parameters)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                if not IndividualStore.__contains__(self, row[0]):
+                    self._add_row(row)
+
+    def load_all(self):
+        cursor = self.connection.execute(f"SELECT {_COLUMNS} FROM individuals ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                if not IndividualStore.__contains__(self, row[0]):
+                    self._add_row(row)
+
+    def name_index(self) -> SqliteNameIndex:
+        return SqliteNameIndex(self)
+
+    def iter_names(self) -> Iterator[Tuple[int, str]]:
+        for xref, name in self.connection.execute("SELECT xref, name FROM individuals ORDER BY id"):
+            yield self.xref_index(xref), name
+
+    def person(self, index: int) -> Optional[Individual]:
+        if index != NO_PERSON and not self._present[index]:
+            self._load(self._xrefs[index])
+        return super().person(index)
+
+    def __getitem__(self, xref: str) -> Individual:
+        if not IndividualStore.__contains__(self, xref) and not self._load(xref):
+            raise KeyError(xref)
+        return super().__getitem__(xref)
+
+    def __contains__(self, xref) -> bool:
+        if IndividualStore.__contains__(self, xref):
+            return True
+        return self.connection.execute("SELECT 1 FROM individuals WHERE xref = ?", (xref,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for xref, in self.connection.execute("SELECT xref FROM individuals ORDER BY id"):
+            yield xref
+
+    def __len__(self) -> int:
+        if self._total is None:
+            self._total = self.connection.execute("SELECT count(*) FROM individuals").fetchone()[0]
+        return self._total
+
+    def __getstate__(self):
+        raise TypeError("SqliteIndividualStore reads from an open database and cannot be pickled")
+
+def open_sqlite(processor, gedcom_file: str, db_path: Optional[str] = None) -> SqliteIndividualStore:
+    """Point ``processor`` at a SQLite copy of ``gedcom_file``, building it if stale.
+
+    The database is kept (next to the GEDCOM file by default) and reused by
+    later runs as long as the file and the projected fields are unchanged.
+    """
+    db_path = db_path or database_path(gedcom_file)
+    if not _is_current(db_path, _stamp(gedcom_file, processor.fields)):
+        build_database(gedcom_file, db_path, processor.fields)
+    processor.individuals = SqliteIndividualStore(db_path, processor.fields)
+    return processor.individuals
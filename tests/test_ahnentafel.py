@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+from ahnentafel import Ahnentafel
+from tree_processor import TreeProcessor
+from tests.test_data import family_ged
+
+
+def implex_processor():
+    # Cousins @C1@ and @C2@ share grandparents @G1@ and @G2@; their child
+    # @R@ has the grandparents at two numbers each.
+    processor = GedcomProcessor("")
+    store = processor.individuals
+    for xref in ["@R@", "@C1@", "@C2@", "@P1@", "@P2@", "@G1@", "@G2@", "@X1@"]:
+        store.add(xref, xref.strip("@"))
+    store.link_parents("@R@", "@C1@", "@C2@")
+    store.link_parents("@C1@", "@P1@", "@X1@")
+    store.link_parents("@C2@", "@P2@", None)
+    store.link_parents("@P1@", "@G1@", "@G2@")
+    store.link_parents("@P2@", "@G1@", "@G2@")
+    return processor
+
+
+def test_ahnentafel_numbers_and_implex():
+    processor = implex_processor()
+    table = Ahnentafel(processor, processor.individuals["@R@"])
+
+    assert [number for number, _ in table.ancestors()] == [1, 2, 3, 4, 5, 6, 8, 9]
+    assert table.get(2).id == "@C1@"
+    assert table.get(7) is None
+    assert table.implex == {"@G1@": [8, 12], "@G2@": [9, 13]}
+    assert table.get(12).id == "@G1@"
+    assert table.generation_cells(3, 2) == [table.get(12), table.get(13), None, None]
+
+
+def test_ahnentafel_limits_generations():
+    processor = implex_processor()
+    table = Ahnentafel(processor, processor.individuals["@R@"], generations=2)
+
+    assert len(table) == 3
+    assert table.get(4) is None
+
+
+def test_process_tree_markdown_uses_ancestor_numbers(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+
+    TreeProcessor(processor).process_tree(processor.individuals["@I1@"], str(tmp_path / "out"))
+
+    assert sorted(os.listdir(tmp_path / "out")) == [".anetavle-manifest.json", "1.md", "2.md", "3.md"]
+    assert "3. Jane Smith (f. 1 FEB 1925)" in (tmp_path / "out" / "3.md").read_text(encoding="utf-8")
@@ -353,3 +353,122 @@ def real_persons_ged():
 1 _STP
 1 FAMC @37854866@
 1 _FID G2WX-81L"""
+
+
+@pytest.fixture
+def family_ged():
+    return """0 HEAD
+1 CHAR UTF-8
+0 @I1@ INDI
+1 NAME Child /Doe/
+1 BIRT
+2 DATE 1 JAN 1950
+0 @I2@ INDI
+1 NAME John /Doe/
+1 BIRT
+2 DATE 1 JAN 1920
+1 DEAT
+2 DATE 1 DEC 1990
+0 @I3@ INDI
+1 NAME Jane /Smith/
+1 BIRT
+2 DATE 1 FEB 1925
+0 @F1@ FAM
+1 HUSB @I2@
+1 WIFE @I3@
+1 CHIL @I1@
+1 MARR
+2 DATE 1948
+0 TRLR"""
+
+
+@pytest.fixture
+def siblings_ged():
+    return """0 @S1@ INDI
+1 NAME Anna /Doe/
+0 @S2@ INDI
+1 NAME Bent /Doe/
+0 @P1@ INDI
+1 NAME John /Doe/
+0 @P2@ INDI
+1 NAME Jane /Smith/
+0 @F1@ FAM
+1 HUSB @P1@
+1 WIFE @P2@
+1 CHIL @S1@
+1 CHIL @S2@
+0 TRLR"""
+
+
+@pytest.fixture
+def cousins_ged():
+    # Grandparents G1 and G2 have A1 and A2; G1 and G3 have H. C1 and C2
+    # are first cousins, and D2 is C2's child.
+    records = []
+    for xref in ["G1", "G2", "G3", "A1", "A2", "H", "X1", "X2", "C1", "C2", "Y", "D2"]:
+        records.append(f"0 @{xref}@ INDI\n1 NAME Person /{xref}/")
+    for family, husband, wife, children in [("F1", "G1", "G2", ["A1", "A2"]), ("F2", "A1", "X1", ["C1"]),
+                                             ("F3", "X2", "A2", ["C2"]), ("F4", "C2", "Y", ["D2"]),
+                                             ("F5", "G1", "G3", ["H"])]:
+        lines = [f"0 @{family}@ FAM", f"1 HUSB @{husband}@", f"1 WIFE @{wife}@"]
+        lines.extend(f"1 CHIL @{child}@" for child in children)
+        records.append("\n".join(lines))
+    return "0 HEAD\n" + "\n".join(records) + "\n0 TRLR\n"
+
+
+@pytest.fixture
+def merged_ged():
+    # Two exports of the same family: @I1@-@I3@ and @I11@-@I13@. The second
+    # knows Jens Hansen's father. @I20@ and @I21@ share names but not years.
+    return """0 HEAD
+0 @I1@ INDI
+1 NAME Anna /Hansen/
+1 BIRT
+2 DATE 1 JAN 1900
+0 @I2@ INDI
+1 NAME Jens /Hansen/
+1 BIRT
+2 DATE 1870
+0 @I3@ INDI
+1 NAME Maren /Nielsen/
+1 BIRT
+2 DATE 12.03.1872
+0 @I21@ INDI
+1 NAME Anna /Hansen/
+1 BIRT
+2 DATE 1903
+0 @F1@ FAM
+1 HUSB @I2@
+1 WIFE @I3@
+1 CHIL @I1@
+1 CHIL @I21@
+0 @I11@ INDI
+1 NAME Anna /Hansen/
+1 BIRT
+2 DATE 1 JAN 1900
+0 @I12@ INDI
+1 NAME Jens /Hansen/
+1 BIRT
+2 DATE ABT 1870
+1 DEAT
+2 DATE 1940
+0 @I13@ INDI
+1 NAME Maren /Nielsen/
+1 BIRT
+2 DATE 1871
+0 @I14@ INDI
+1 NAME Peder /Hansen/
+1 BIRT
+2 DATE 1840
+0 @I20@ INDI
+1 NAME Jens /Hansen/
+1 BIRT
+2 DATE 1890
+0 @F2@ FAM
+1 HUSB @I12@
+1 WIFE @I13@
+1 CHIL @I11@
+0 @F3@ FAM
+1 HUSB @I14@
+1 CHIL @I12@
+0 TRLR"""
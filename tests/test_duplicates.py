@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import argparse
+import pytest
+from ahnentafel import Ahnentafel
+from duplicates import DuplicateFinder, find_duplicates, load_aliases
+from gedcom_dates import parse_year
+from gedcom_processor import GedcomProcessor, load, merge_aliases
+from record_index import open_lazy
+from tests.test_data import merged_ged
+
+
+@pytest.fixture
+def merged_processor(tmp_path, merged_ged):
+    gedcom_file = tmp_path / "merged.ged"
+    gedcom_file.write_text(merged_ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+    return processor
+
+
+@pytest.mark.parametrize("date, year", [
+    ("1 JAN 1900", 1900), ("28.10.1916", 1916), ("ABT 1850", 1850),
+    ("BET 1850 AND 1860", 1850), ("1750/51", 1750), ("", None), ("UNKNOWN", None),
+])
+def test_parse_year(date, year):
+    assert parse_year(date) == year
+
+
+def test_finder_scores_blocked_pairs(merged_processor):
+    finder = DuplicateFinder(merged_processor, threshold=0.75)
+    duplicates = {(duplicate.xref_a, duplicate.xref_b): duplicate for duplicate in finder.find()}
+
+    assert set(duplicates) == {("@I1@", "@I11@"), ("@I2@", "@I12@"), ("@I3@", "@I13@")}
+    assert duplicates[("@I1@", "@I11@")].score == 1.0
+    assert "same father" in duplicates[("@I1@", "@I11@")].reasons
+    assert duplicates[("@I3@", "@I13@")].reasons == ("same name", "birth years one apart")
+    # Blocking keeps the unrelated Jens Hansen and the younger Anna out of the comparisons
+    assert finder.pairs_compared < 10
+
+    # The record with the most facts is kept
+    assert finder.alias_map(list(duplicates.values())) == {"@I11@": "@I1@", "@I2@": "@I12@", "@I13@": "@I3@"}
+
+
+def test_tree_walk_honours_aliases(tmp_path, merged_processor):
+    report, aliases = tmp_path / "duplicates.csv", tmp_path / "aliases.json"
+    find_duplicates(merged_processor, str(report), str(aliases), threshold=0.75)
+    merged_processor.apply_aliases(load_aliases(str(aliases)))
+
+    ahnentafel = Ahnentafel(merged_processor, merged_processor.canonical(merged_processor.individuals["@I11@"]))
+    assert [(number, person.id) for number, person in ahnentafel.ancestors()] == [
+        (1, "@I1@"), (2, "@I12@"), (3, "@I3@"), (4, "@I14@")]
+    assert report.read_text(encoding="utf-8").splitlines()[1].startswith("1.0,@I1@,@I11@,@I1@,Anna Hansen")
+
+
+def test_finder_on_lazy_store(tmp_path, merged_ged, merged_processor):
+    gedcom_file = tmp_path / "lazy.ged"
+    gedcom_file.write_text(merged_ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    open_lazy(processor, str(gedcom_file))
+
+    lazy_finder, finder = DuplicateFinder(processor, threshold=0.75), DuplicateFinder(merged_processor, threshold=0.75)
+    duplicates = lazy_finder.find()
+    assert duplicates == finder.find()
+    assert lazy_finder.alias_map(duplicates) == finder.alias_map(duplicates)
+
+
+def test_every_load_merges_aliases(tmp_path, merged_ged, merged_processor):
+    gedcom_file, aliases = tmp_path / "merged.ged", tmp_path / "aliases.json"
+    gedcom_file.write_text(merged_ged, encoding="utf-8")
+    find_duplicates(merged_processor, str(tmp_path / "duplicates.csv"), str(aliases), threshold=0.75)
+    args = argparse.Namespace(gedcom_file=str(gedcom_file), sqlite=None, index=True, cache=False,
+                              cache_dir=None, jobs=1, aliases=str(aliases))
+
+    # The render service reloads through the same two steps
+    for _ in range(2):
+        processor = merge_aliases(load(GedcomProcessor(args.gedcom_file), args), args)
+        assert processor.aliases == load_aliases(str(aliases))
+        assert processor.canonical(processor.individuals["@I11@"]).id == "@I1@"
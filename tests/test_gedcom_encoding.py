@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_encoding import decode_ansel, detect_encoding
+from gedcom_processor import GedcomProcessor, iter_records, scan_records
+
+def _gedcom(charset: str, name: bytes) -> bytes:
+    return (b"0 HEAD\n1 SOUR test\n1 CHAR " + charset.encode() + b"\n"
+            b"0 @I1@ INDI\n1 NAME " + name + b"\n1 BIRT\n2 DATE 1 JAN 1850\n0 TRLR\n")
+
+def _parse(tmp_path, data: bytes) -> GedcomProcessor:
+    gedcom_file = tmp_path / "test.ged"
+    gedcom_file.write_bytes(data)
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+    return processor
+
+def test_detect_encoding():
+    assert detect_encoding(_gedcom("ANSEL", b"A")) == "ansel"
+    assert detect_encoding(_gedcom("ANSI", b"A")) == "cp1252"
+    assert detect_encoding(_gedcom("UTF-8", b"A")) == "utf-8"
+    assert detect_encoding(b"\xef\xbb\xbf" + _gedcom("ANSEL", b"A")) == "utf-8"
+    assert detect_encoding("0 HEAD\n".encode("utf-16-le")) == "utf-16-le"
+    # Only the HEAD record is consulted
+    assert detect_encoding(b"0 HEAD\n0 @N1@ NOTE\n1 CHAR ANSEL\n") == "utf-8"
+
+def test_decode_ansel_moves_combining_marks_behind_the_letter():
+    assert decode_ansel(b"\xeaAse S\xb2rensen") == "Åse Sørensen"
+    assert decode_ansel(b"\xa5ble Fran\xf0cois Ren\xe2ee") == "Æble François Renée"
+    assert decode_ansel(b"Hans") == "Hans"
+
+def test_parse_ansel_file(tmp_path):
+    processor = _parse(tmp_path, _gedcom("ANSEL", b"\xeaAse /J\xb2rgensen/"))
+    assert processor.individuals["@I1@"].name == "Åse Jørgensen"
+    assert processor.individuals["@I1@"].birth_date == "1 JAN 1850"
+
+def test_parse_windows_1252_file(tmp_path):
+    processor = _parse(tmp_path, _gedcom("ANSI", "Søren /Ærø/".encode("cp1252")).replace(b"\n", b"\r\n"))
+    assert processor.individuals["@I1@"].name == "Søren Ærø"
+
+def test_parse_utf8_with_bom_and_stray_windows_1252_bytes(tmp_path):
+    data = b"\xef\xbb\xbf" + _gedcom("UTF-8", "Søren /Ærø/".encode("utf-8") + b" \xe6")
+    processor = _parse(tmp_path, data)
+    assert processor.individuals["@I1@"].name == "Søren Ærø æ"
+
+def test_parse_utf16_file(tmp_path):
+    data = "\ufeff".encode("utf-16-le") + _gedcom("UNICODE", "Søren /Ærø/".encode("utf-8")).decode("utf-8").encode("utf-16-le")
+    processor = _parse(tmp_path, data)
+    assert processor.individuals["@I1@"].name == "Søren Ærø"
+
+def test_conc_and_cont_are_joined():
+    text = ("0 @I1@ INDI\n1 NAME Anne /Mar\n2 CONC ie Jensen/\n"
+            "1 BIRT\n2 DATE ABT\n3 CONT 1850\n2 PLAC Odense\n"
+            "1 NOTE Not\n2 CONC projected\n0 TRLR\n")
+    expected = ("INDI", "@I1@", ["Anne Marie Jensen", "ABT\n1850", ""])
+    assert list(scan_records(text)) == [expected]
+    assert list(iter_records(text.splitlines())) == [expected]
+
+def test_character_split_over_conc_lines_is_decoded_whole():
+    data = b"0 @I1@ INDI\n1 NAME S\xc3\n2 CONC \xb8ren /Jensen/\n"
+    assert list(scan_records(data)) == [("INDI", "@I1@", ["Søren Jensen", "", ""])]
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ahnentafel import Ahnentafel
+from gedcom_export import export_ancestors
+from gedcom_processor import GedcomProcessor
+from record_index import open_lazy
+from tests.test_data import cousins_ged
+
+def _source_ged(cousins_ged: str) -> str:
+    return (cousins_ged
+            .replace("0 HEAD\n", "0 HEAD\n1 SOUR OtherProgram\n2 VERS 7\n1 SUBM @U1@\n1 GEDC\n2 VERS 5.5\n1 CHAR UTF-8\n")
+            .replace("1 NAME Person /G1/", "1 NAME Person /G1/\n1 BIRT\n2 SOUR @S1@")
+            .replace("0 TRLR\n", "0 @S1@ SOUR\n1 REPO @R1@\n0 @R1@ REPO\n0 @S2@ SOUR\n0 @U1@ SUBM\n0 TRLR\n"))
+
+def _records(data: bytes):
+    return [b"0 " + record for record in (b"\n" + data).split(b"\n0 ")[1:]]
+
+def test_export_copies_ancestor_records(tmp_path, cousins_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(_source_ged(cousins_ged), encoding="utf-8")
+    output = tmp_path / "c1.ged"
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+
+    summary = export_ancestors(processor, str(gedcom_file), [processor.individuals["@C1@"]], str(output))
+
+    assert (summary.individuals, summary.families, summary.other_records) == (5, 2, 3)
+    data = output.read_bytes()
+    assert data.startswith(b"0 HEAD\n1 SOUR Gedkonvertering\n")
+    assert b"1 GEDC\n2 VERS 5.5\n1 CHAR UTF-8\n1 SUBM @U1@\n0 @G1@ INDI" in data
+    assert data.endswith(b"\n0 TRLR\n") and len(data) == summary.bytes_written
+    original = gedcom_file.read_bytes()
+    headers = []
+    for record in _records(data)[1:-1]:
+        assert record in original
+        headers.append(record.split(b"\n", 1)[0].decode())
+    # File order, with the records the ancestors point to but no others
+    assert headers == ["0 @G1@ INDI", "0 @G2@ INDI", "0 @A1@ INDI", "0 @X1@ INDI", "0 @C1@ INDI",
+                       "0 @F1@ FAM", "0 @F2@ FAM", "0 @S1@ SOUR", "0 @R1@ REPO", "0 @U1@ SUBM"]
+
+    exported = GedcomProcessor(str(output))
+    exported._parse_gedcom(str(output))
+    ahnentafel = Ahnentafel(exported, exported.individuals["@C1@"])
+    assert [(number, person.id) for number, person in ahnentafel.ancestors()] == \
+        [(1, "@C1@"), (2, "@A1@"), (3, "@X1@"), (4, "@G1@"), (5, "@G2@")]
+
+def test_export_from_lazy_store_keeps_crlf_and_generation_limit(tmp_path, cousins_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_bytes(_source_ged(cousins_ged).replace("\n", "\r\n").encode("utf-8"))
+    output = tmp_path / "d2.ged"
+    processor = GedcomProcessor(str(gedcom_file))
+    open_lazy(processor, str(gedcom_file))
+
+    summary = export_ancestors(processor, str(gedcom_file), [processor.individuals["@D2@"]], str(output),
+                               generations=2)
+
+    assert (summary.individuals, summary.families) == (3, 1)
+    data = output.read_bytes()
+    assert b"\n" not in data.replace(b"\r\n", b"")
+    assert b"0 @F4@ FAM\r\n1 HUSB @C2@\r\n1 WIFE @Y@\r\n1 CHIL @D2@\r\n" in data
+    processor.individuals.close()
+
+
+def test_export_of_bare_cr_file(tmp_path, cousins_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_bytes(_source_ged(cousins_ged).replace("\n", "\r").encode("utf-8"))
+    output = tmp_path / "c1.ged"
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+
+    summary = export_ancestors(processor, str(gedcom_file), [processor.individuals["@C1@"]], str(output))
+
+    assert (summary.individuals, summary.families, summary.other_records) == (5, 2, 3)
+    data = output.read_bytes()
+    assert b"\n" not in data and data.endswith(b"\r0 TRLR\r")
+    exported = GedcomProcessor(str(output))
+    exported._parse_gedcom(str(output))
+    assert sorted(exported.individuals) == ["@A1@", "@C1@", "@G1@", "@G2@", "@X1@"]
@@ -1,9 +1,11 @@
+import argparse
+import io
 import pytest
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from gedcom_processor import GedcomProcessor
-from tests.test_data import simple_persons_ged, real_persons_ged
+from gedcom_processor import GedcomProcessor, iter_records, positive_int, read_record_blocks, scan_records
+from tests.test_data import simple_persons_ged, real_persons_ged, family_ged
 
  
 def test_read_individuals_simple(simple_persons_ged):
@@ -72,4 +74,104 @@ NOT VALID GEDCOM"""
     processor = GedcomProcessor(str(malformed_file))
     individuals = processor.read_individuals(str(malformed_file))
     
-    assert len(individuals) == 0
\ No newline at end of file
+    assert len(individuals) == 0
+
+def test_parse_gedcom_links_families(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+
+    assert len(processor.individuals) == 3
+    child = processor.individuals["@I1@"]
+    assert child.father_id == "@I2@"
+    assert child.mother_id == "@I3@"
+
+    father, mother = processor.find_parents(child)
+    assert father.name == "John Doe"
+    assert mother.name == "Jane Smith"
+    assert processor.individuals["@I2@"].father_id is None
+
+def test_scan_records_matches_line_parser(real_persons_ged):
+    tricky = """0 HEAD
+0 @I1@ INDI
+1 NAME Old /Name/
+1 BIRT
+2 DATE 1 JAN 1900
+2 SOUR @S1@
+3 DATA
+4 DATE 2 FEB 2000
+1 NAME Ny /Navn/
+1 BIRT
+2 PLAC Odense
+1 DEAT
+2 DATE
+1 BIRTH
+2 DATE 3 MAR 1903
+0 @F1@ FAM
+1 HUSB @I2@
+1 CHIL @I1@
+1 CHILD @I9@
+1 CHIL @I3@
+0 TRLR"""
+    for text in (real_persons_ged, tricky, tricky.replace("\n", "\r\n"), tricky.replace("\n1 ", "\n  1 ")):
+        assert list(scan_records(text)) == list(iter_records(text.splitlines()))
+
+    records = list(scan_records(tricky))
+    assert records[0] == ("INDI", "@I1@", ["Ny Navn", "1 JAN 1900", ""])
+    assert records[1] == ("FAM", "@F1@", ["@I2@", None, ["@I1@", "@I3@"]])
+
+def test_extra_fields_are_projected(family_ged):
+    text = (family_ged.replace("1 NAME John /Doe/", "1 NAME John /Doe/\n1 SEX M")
+            .replace("2 DATE 1 JAN 1920", "2 DATE 1 JAN 1920\n2 PLAC Odense"))
+    processor = GedcomProcessor("", extra_fields={"sex": ("SEX",), "birth_place": ("BIRT", "PLAC")})
+    individuals = processor.read_individuals(text + "\n")
+
+    assert individuals.extra_fields == ("sex", "birth_place")
+    assert individuals["@I2@"].field("sex") == "M"
+    assert individuals["@I3@"].field("sex") == ""
+    assert individuals["@I2@"].field("birth_place") == "Odense"
+    assert individuals["@I2@"].birth_date == "1 JAN 1920"
+
+def test_surname_comes_from_surn_or_slashes():
+    text = """0 HEAD
+0 @I1@ INDI
+1 NAME Anna /Møller Hansen/
+0 @I2@ INDI
+1 NAME Hans /von Holstein/ Jensen
+2 GIVN Hans
+2 SURN Holstein
+0 @I3@ INDI
+1 NAME Old /Name/
+2 SURN Gammel
+1 NAME Ny /Navn/
+0 @I4@ INDI
+1 NAME Peder
+0 TRLR
+"""
+    fields = {"name": ("NAME",), "birth_date": ("BIRT", "DATE"), "death_date": ("DEAT", "DATE"),
+              "surname": ("NAME", "SURN")}
+    records = list(scan_records(text, fields))
+    assert records == list(iter_records(text.splitlines(), fields))
+    assert [values for _, _, values in records] == [["Anna Møller Hansen", "", "", "Møller Hansen"],
+                                                    ["Hans von Holstein Jensen", "", "", "Holstein"],
+                                                    ["Ny Navn", "", "", "Navn"],
+                                                    ["Peder", "", "", ""]]
+
+@pytest.mark.parametrize("ending", ["\n", "\r\n", "\r"])
+def test_record_blocks_end_between_records(real_persons_ged, ending):
+    data = real_persons_ged.replace("\n", ending).encode("utf-8")
+    blocks = list(read_record_blocks(io.BytesIO(data), block_size=64))
+
+    assert b"".join(blocks) == data
+    # Bare CR files must be cut into blocks too, not read whole
+    assert len(blocks) > 1
+    assert all(block.startswith(b"0 ") for block in blocks)
+    assert [record for block in blocks for record in scan_records(block)] == list(scan_records(real_persons_ged))
+
+def test_counts_must_be_positive():
+    assert positive_int("3") == 3
+    for value in ("0", "-2"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_int(value)
@@ -0,0 +1,37 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from individual_store import IndividualStore
+
+
+def test_store_views_read_and_write_columns():
+    store = IndividualStore()
+    child = store.add("@I1@", "Child Doe", "1 JAN 1950")
+    store.add("@I2@", "John Doe", "1 JAN 1920", "1 DEC 1990")
+    store.link_parents("@I1@", "@I2@", "@I9@")
+
+    assert len(store) == 2
+    assert list(store) == ["@I1@", "@I2@"]
+    assert "@I9@" not in store
+
+    assert child.name == "Child Doe"
+    assert child.death_date == ""
+    assert child.father_id == "@I2@"
+    assert child.mother_id == "@I9@"
+
+    father, mother = store.parents(child)
+    assert father == store["@I2@"]
+    assert father.name == "John Doe"
+    assert mother is None
+
+    child.birth_date = "2 JAN 1950"
+    assert store["@I1@"].birth_date == "2 JAN 1950"
+
+
+def test_store_shares_repeated_strings():
+    store = IndividualStore()
+    store.add("@I1@", "Ane Hansen", "1900")
+    store.add("@I2@", "Ane Hansen", "1900")
+
+    assert store._names[0] == store._names[1]
+    assert store._births[0] == store._births[1]
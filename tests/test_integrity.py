@@ -0,0 +1,110 @@
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from gedcom_processor import GedcomProcessor
+from integrity import IntegrityChecker, check_integrity
+from record_index import open_lazy
+from tests.test_data import family_ged
+
+def test_clean_file_has_no_issues(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+
+    report = check_integrity(str(gedcom_file))
+
+    assert (report.individuals, report.families, report.issues) == (3, 1, [])
+
+def test_every_check_is_reported(tmp_path):
+    # I1 is a child of I2, and I2 a child of I1; I3 is in two families
+    gedcom_file = tmp_path / "bad.ged"
+    gedcom_file.write_text("""0 HEAD
+0 @I1@ INDI
+1 NAME Anna /Loop/
+1 BIRT
+2 DATE 1900
+1 DEAT
+2 DATE ABT 1890
+0 @I2@ INDI
+1 NAME Bent /Loop/
+1 BIRT
+2 DATE 1920
+0 @I3@ INDI
+1 NAME Carl /Twice/
+1 BIRT
+2 DATE 1950
+0 @I4@ INDI
+1 NAME Dora /Early/
+1 BIRT
+2 DATE 1800
+1 DEAT
+2 DATE BEF 1900
+0 @F1@ FAM
+1 HUSB @I2@
+1 CHIL @I1@
+0 @F2@ FAM
+1 HUSB @I1@
+1 CHIL @I2@
+1 CHIL @I3@
+0 @F3@ FAM
+1 WIFE @I4@
+1 CHIL @I3@
+1 CHIL @I9@
+0 TRLR
+""", encoding="utf-8")
+    report_file = tmp_path / "report.json"
+
+    report = check_integrity(str(gedcom_file), str(report_file))
+
+    found = {(issue.check, issue.xrefs) for issue in report.issues}
+    assert found == {
+        ("dangling_reference", ("@F3@", "@I9@")),
+        ("multiple_parent_families", ("@I3@", "@F2@", "@F3@")),
+        ("ancestry_cycle", ("@I1@", "@I2@")),
+        ("death_before_birth", ("@I1@",)),
+        ("born_before_parent", ("@I1@", "@I2@")),
+        ("born_after_parent_death", ("@I2@", "@I1@")),
+        ("born_after_parent_death", ("@I3@", "@I1@")),
+        # I4's death is only bounded, so it is not compared
+    }
+    assert (report.errors, report.warnings) == (6, 1)
+
+    saved = json.loads(report_file.read_text(encoding="utf-8"))
+    assert saved["counts"]["ancestry_cycle"] == 1
+    cycle = next(issue for issue in saved["issues"] if issue["check"] == "ancestry_cycle")
+    assert cycle["severity"] == "error"
+    assert cycle["message"] == "Ancestry loops back on itself: Anna Loop (@I1@) -> Bent Loop (@I2@) -> Anna Loop (@I1@)"
+
+def test_deep_pedigree_does_not_recurse(tmp_path):
+    # A 5000 generation line would overflow a recursive search
+    lines = ["0 HEAD"]
+    for generation in range(5000):
+        lines.append(f"0 @I{generation}@ INDI\n1 NAME Person /{generation}/")
+        lines.append(f"0 @F{generation}@ FAM\n1 HUSB @I{generation + 1}@\n1 CHIL @I{generation}@")
+    lines.append("0 @I5000@ INDI\n0 TRLR\n")
+    gedcom_file = tmp_path / "deep.ged"
+    gedcom_file.write_text("\n".join(lines), encoding="utf-8")
+
+    assert check_integrity(str(gedcom_file)).issues == []
+
+def test_loaded_processor_is_checked_without_parsing_again(tmp_path, family_ged, monkeypatch):
+    # I1 is also a child of a second family, whose WIFE does not exist
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged.replace("0 TRLR", "0 @F2@ FAM\n1 WIFE @I8@\n1 CHIL @I1@\n0 TRLR"),
+                           encoding="utf-8")
+    expected = check_integrity(str(gedcom_file))
+    assert {issue.check for issue in expected.issues} == {"dangling_reference", "multiple_parent_families"}
+
+    processor = GedcomProcessor(str(gedcom_file))
+    processor.keep_families = True
+    processor._parse_gedcom(str(gedcom_file))
+    monkeypatch.setattr(IntegrityChecker, "read", lambda *args, **kwargs: pytest.fail("file read again"))
+    assert check_integrity(str(gedcom_file), processor=processor) == expected
+    monkeypatch.undo()
+
+    # A lazy store keeps no families, so only those are read from the file
+    lazy = GedcomProcessor(str(gedcom_file))
+    open_lazy(lazy, str(gedcom_file))
+    assert check_integrity(str(gedcom_file), processor=lazy) == expected
+    lazy.individuals.close()
@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ahnentafel import Ahnentafel
+from gedcom_processor import GedcomProcessor
+from markdown_generator import MarkdownGenerator
+from tests.test_data import cousins_ged, family_ged
+
+
+def test_markdown_grid_spans_cells_like_word(tmp_path, family_ged):
+    processor = GedcomProcessor("")
+    processor.individuals = processor.read_individuals(family_ged)
+    processor._read_family_relations(family_ged)
+    generator = MarkdownGenerator(processor)
+
+    generator.generate_markdown(processor.individuals["@I1@"], str(tmp_path), depth=3)
+
+    assert (tmp_path / "1.md").read_text(encoding="utf-8") == (
+        "# Anetavle for person 1\n\n"
+        "| 1. Child Doe (f. 1 JAN 1950) ||||\n"
+        "|:---:|:---:|:---:|:---:|\n"
+        "| 2. John Doe (f. 1 JAN 1920, d. 1 DEC 1990) || 3. Jane Smith (f. 1 FEB 1925) ||\n"
+        "|  |  |  |  |\n")
+    assert list(generator._page_templates) == [3]
+
+
+def test_grid_labels_are_shared_between_pages(cousins_ged):
+    # G1 and G2 are on the pages of C1, A1 and their own, but each label is formatted once
+    processor = GedcomProcessor("")
+    processor.individuals = processor.read_individuals(cousins_ged)
+    processor._read_family_relations(cousins_ged)
+    ahnentafel = Ahnentafel(processor, processor.individuals["@C1@"])
+    calls = []
+    person_details = processor.person_details
+    processor.person_details = lambda person: calls.append(person.id) or person_details(person)
+
+    pages = {number: ahnentafel.grid_labels(processor, number, 3) for number, _ in ahnentafel.ancestors()}
+
+    assert pages[1] == ["1. Person C1", "2. Person A1", "3. Person X1", "4. Person G1", "5. Person G2", "", ""]
+    assert pages[2] == ["2. Person A1", "4. Person G1", "5. Person G2", "", "", "", ""]
+    assert sorted(calls) == ["@A1@", "@C1@", "@G1@", "@G2@", "@X1@"]
+    assert MarkdownGenerator(None).render_page(7, ["A | B"], 1) == "# Anetavle for person 7\n\n| A \\| B |\n|:---:|\n"
+    assert MarkdownGenerator(None).render_page(7, ["A\nB\r\nC"], 1) == "# Anetavle for person 7\n\n| A<br>B<br>C |\n|:---:|\n"
@@ -0,0 +1,45 @@
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+from metrics import Metrics
+from tree_processor import TreeProcessor
+from tests.test_data import family_ged
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    lines = ["0 HEAD"]
+
+    with metrics.stage("parse"):
+        pass
+    metrics.count("lines", 3)
+    metrics.page(1, "1.md", 0.5, 0.5, 10)
+
+    assert metrics.counted(lines) is lines
+    assert metrics.report()["stages"] == {}
+    assert metrics.report()["counts"] == {}
+    assert metrics.report()["slowest_pages"] == []
+
+
+def test_enabled_metrics_cover_parse_and_render(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    metrics = Metrics(enabled=True, slowest=2)
+    processor = GedcomProcessor(str(gedcom_file))
+    processor.metrics = metrics
+    processor._parse_gedcom(str(gedcom_file))
+
+    TreeProcessor(processor, metrics=metrics).process_tree(processor.individuals["@I1@"], str(tmp_path / "out"))
+    metrics.write(str(tmp_path / "metrics.json"))
+
+    with open(tmp_path / "metrics.json", encoding="utf-8") as report_file:
+        report = json.load(report_file)
+    assert {"parse", "link_families", "traverse", "page_jobs", "render"} <= set(report["stages"])
+    assert report["counts"]["lines"] == len(family_ged.splitlines())
+    assert report["counts"]["individuals"] == 3
+    assert report["counts"]["pages_rendered"] == 3
+    assert report["counts"]["bytes_written"] > 0
+    assert len(report["slowest_pages"]) == 2
+    assert report["slowest_pages"][0]["seconds"] >= report["slowest_pages"][1]["seconds"]
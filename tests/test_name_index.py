@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+from name_index import normalize_name, phonetic_key
+
+
+def name_processor():
+    processor = GedcomProcessor("")
+    for xref, name in [("@I1@", "Hans Severin Rafn Jørgensen"), ("@I2@", "Ane Kirstine Christensen"),
+                       ("@I3@", "Ane Kirstine Kristensen"), ("@I4@", "Émile Nielsen")]:
+        processor.individuals.add(xref, name)
+    return processor
+
+
+def test_normalize_and_phonetic_keys():
+    assert normalize_name("  Émile  NIELSEN ") == "emile nielsen"
+    assert normalize_name("Søren Aagaard") == "soeren aagaard"
+    assert phonetic_key(normalize_name("Jørgensen")) == phonetic_key(normalize_name("Jorgensøn"))
+    assert phonetic_key("christensen") == phonetic_key("kristensen")
+
+
+def test_find_people_by_xref_name_words_and_sound():
+    processor = name_processor()
+    people = processor.individuals
+
+    assert processor.find_people("@I2@") == [people["@I2@"]]
+    assert processor.find_people("@I9@") == []
+    assert processor.find_people("hans severin rafn jorgensen") == [people["@I1@"]]
+    assert processor.find_people("emile") == [people["@I4@"]]
+    assert processor.find_people("Ane Kirstine") == [people["@I2@"], people["@I3@"]]
+    assert processor.find_people("Hans Jørgensen") == [people["@I1@"]]
+    assert processor.find_people("Hans Jorgensøn") == [people["@I1@"]]
+    assert processor.find_people("Karl Jensen") == []
+
+
+def test_ambiguous_default_root_lists_candidates(tmp_path, monkeypatch, capsys):
+    import gedcom_processor
+    gedcom_file = tmp_path / "two.ged"
+    gedcom_file.write_text("0 HEAD\n0 @I1@ INDI\n1 NAME Steen Thrane /Jacobsen/\n"
+                           "0 @I2@ INDI\n1 NAME Steen Thrane /Jacobsen/\n0 TRLR\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["gedcom_processor.py", str(gedcom_file), "--output-dir", str(tmp_path / "out")])
+
+    gedcom_processor.main()
+
+    output = capsys.readouterr().out
+    assert "'steen thrane jacobsen' matches 2 individuals" in output
+    assert "@I1@" in output and "@I2@" in output
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+from parallel_parser import parse_parallel, split_at_records
+from tests.test_data import family_ged, real_persons_ged
+
+
+def test_split_at_records_starts_on_level0_lines(tmp_path, real_persons_ged):
+    gedcom_file = tmp_path / "real.ged"
+    gedcom_file.write_bytes(real_persons_ged.encode("utf-8"))
+    data = gedcom_file.read_bytes()
+
+    ranges = split_at_records(str(gedcom_file), 4)
+
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        assert data[start:start + 2] == b"0 "
+
+
+def test_parse_parallel_matches_serial(tmp_path, family_ged, real_persons_ged):
+    gedcom_file = tmp_path / "combined.ged"
+    gedcom_file.write_bytes((real_persons_ged + "\n" + family_ged).encode("utf-8"))
+
+    serial = GedcomProcessor(str(gedcom_file))
+    serial._parse_gedcom(str(gedcom_file))
+    parallel = GedcomProcessor(str(gedcom_file))
+    parse_parallel(parallel, str(gedcom_file), 3)
+
+    assert len(parallel.individuals) == 6
+    assert parallel.individuals.__getstate__() == serial.individuals.__getstate__()
+    assert parallel.individuals["@I1@"].father_id == "@I2@"
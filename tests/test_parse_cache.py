@@ -0,0 +1,52 @@
+import sys
+import os
+import pickle
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+import parse_cache
+from parse_cache import parse_with_cache, cache_path
+from tests.test_data import family_ged
+
+
+def test_parse_cache_hit_and_invalidation(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    first = GedcomProcessor(str(gedcom_file))
+    assert not parse_with_cache(first, str(gedcom_file), str(cache_dir))
+    assert os.path.exists(cache_path(str(gedcom_file), str(cache_dir)))
+
+    second = GedcomProcessor(str(gedcom_file))
+    assert parse_with_cache(second, str(gedcom_file), str(cache_dir))
+    assert len(second.individuals) == 3
+    father, mother = second.find_parents(second.individuals["@I1@"])
+    assert father.name == "John Doe"
+    assert mother.birth_date == "1 FEB 1925"
+
+    gedcom_file.write_text(family_ged.replace("John /Doe/", "Johan /Doe/"), encoding="utf-8")
+    third = GedcomProcessor(str(gedcom_file))
+    assert not parse_with_cache(third, str(gedcom_file), str(cache_dir))
+    assert third.individuals["@I2@"].name == "Johan Doe"
+
+
+def test_touched_file_is_hashed_once(tmp_path, family_ged, monkeypatch):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    assert not parse_with_cache(GedcomProcessor(str(gedcom_file)), str(gedcom_file))
+
+    mtime_ns = os.stat(gedcom_file).st_mtime_ns + 10 ** 9
+    os.utime(gedcom_file, ns=(mtime_ns, mtime_ns))
+    hashed = []
+    file_fingerprint = parse_cache.file_fingerprint
+    monkeypatch.setattr(parse_cache, "file_fingerprint",
+                        lambda path, with_hash=True: hashed.append(with_hash) or file_fingerprint(path, with_hash))
+
+    # The content hash accepts the snapshot, which then records the new mtime
+    assert parse_with_cache(GedcomProcessor(str(gedcom_file)), str(gedcom_file))
+    assert hashed.count(True) == 1
+    with open(cache_path(str(gedcom_file)), 'rb') as snapshot:
+        assert pickle.load(snapshot)["mtime_ns"] == mtime_ns
+
+    assert parse_with_cache(GedcomProcessor(str(gedcom_file)), str(gedcom_file))
+    assert hashed.count(True) == 1
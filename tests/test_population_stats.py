@@ -0,0 +1,79 @@
+import csv
+import json
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_dates import ABOUT, AFTER, EXACT, RANGE, DateValue, parse_date
+from gedcom_processor import GedcomProcessor
+from population_stats import STATS_FIELDS, population_stats, write_stats
+from record_index import open_lazy
+from tests.test_data import cousins_ged, merged_ged
+
+def _processor(tmp_path, ged: str) -> GedcomProcessor:
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file), STATS_FIELDS)
+    processor._parse_gedcom(str(gedcom_file))
+    return processor
+
+def test_parse_date_keeps_partial_and_approximate_dates():
+    assert parse_date("12 MAR 1872") == DateValue(1872, 3, 12, EXACT, 1872)
+    assert parse_date("28.10.1916") == DateValue(1916, 10, 28, EXACT, 1916)
+    assert parse_date("JAN 1900") == DateValue(1900, 1, 0, EXACT, 1900)
+    assert parse_date("ABT 1850") == DateValue(1850, 0, 0, ABOUT, 1850)
+    assert parse_date("BET 1850 AND 1860") == DateValue(1850, 0, 0, RANGE, 1860)
+    assert parse_date("FROM 1850") == DateValue(1850, 0, 0, AFTER, 1850)
+    assert parse_date("1750/51") == DateValue(1750, 0, 0, EXACT, 1750)
+    assert parse_date("(unknown)") is None
+
+def test_stats_over_whole_file(tmp_path, merged_ged):
+    processor = _processor(tmp_path, merged_ged)
+
+    stats = population_stats(processor)
+
+    assert stats.individuals == 9
+    assert stats.births_per_decade == {1840: 1, 1870: 4, 1890: 1, 1900: 3}
+    assert stats.date_quality["birth"] == {"exact": 8, "approximate": 1, "range": 0, "bounded": 0, "missing": 0}
+    assert stats.lifespans == {"count": 1, "mean": 70.0, "median": 70.0, "min": 70, "max": 70}
+    assert stats.lifespan_by_birth_decade == {1870: (1, 70.0)}
+    assert stats.surnames == [("Hansen", 7), ("Nielsen", 2)]
+    # A double surname is one surname, not its last word
+    double = _processor(tmp_path, merged_ged.replace("Maren /Nielsen/", "Maren /Møller Nielsen/"))
+    assert population_stats(double).surnames == [("Hansen", 7), ("Møller Nielsen", 2)]
+
+    write_stats(stats, str(tmp_path / "stats.json"))
+    saved = json.loads((tmp_path / "stats.json").read_text(encoding="utf-8"))
+    assert saved["births_per_decade"]["1870"] == 4
+    write_stats(stats, str(tmp_path / "stats.csv"))
+    with open(tmp_path / "stats.csv", newline="", encoding="utf-8") as stats_file:
+        rows = list(csv.reader(stats_file))
+    assert rows[0] == ["section", "key", "value"]
+    assert ["surnames", "Nielsen", "2"] in rows
+
+def test_implex_of_cousin_marriage(tmp_path, cousins_ged):
+    # Z is the child of first cousins C1 and C2, so G1 and G2 appear twice
+    ged = cousins_ged.replace("0 TRLR\n", "0 @Z@ INDI\n1 NAME Person /Z/\n0 @F6@ FAM\n"
+                                          "1 HUSB @C1@\n1 WIFE @C2@\n1 CHIL @Z@\n0 TRLR\n")
+    processor = _processor(tmp_path, ged)
+    root = processor.individuals["@Z@"]
+
+    (stats,) = population_stats(processor, [root]).roots
+    assert (stats.generations, stats.ancestors, stats.positions, stats.implex_ratio) == (4, 8, 10, 0.2)
+    (limited,) = population_stats(processor, [root], generations=3).roots
+    assert (limited.generations, limited.ancestors, limited.positions) == (3, 6, 6)
+
+def test_cycle_and_lazy_store(tmp_path):
+    # I1 and I2 are each other's parent; the walk must still end
+    gedcom_file = tmp_path / "loop.ged"
+    gedcom_file.write_text("0 HEAD\n0 @I1@ INDI\n1 NAME Anna /Loop/\n0 @I2@ INDI\n1 NAME Bent /Loop/\n"
+                           "0 @F1@ FAM\n1 HUSB @I2@\n1 CHIL @I1@\n0 @F2@ FAM\n1 HUSB @I1@\n1 CHIL @I2@\n0 TRLR\n",
+                           encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file), STATS_FIELDS)
+    open_lazy(processor, str(gedcom_file))
+
+    stats = population_stats(processor, [processor.individuals["@I1@"]])
+
+    assert stats.individuals == 2 and stats.surnames == [("Loop", 2)]
+    # I1 is its own grandparent; the walk stops when a generation brings no one new
+    assert (stats.roots[0].generations, stats.roots[0].ancestors) == (3, 2)
+    processor.individuals.close()
@@ -0,0 +1,56 @@
+import sys
+import os
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+from record_index import build_record_index, open_lazy
+from tests.test_data import family_ged
+
+
+def test_record_index_spans_level0_records(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_bytes(family_ged.encode("utf-8"))
+
+    index = build_record_index(str(gedcom_file))
+
+    assert index.tags == ["HEAD", "INDI", "INDI", "INDI", "FAM", "TRLR"]
+    offset, length = index.span("@F1@")
+    record = gedcom_file.read_bytes()[offset:offset + length].decode("utf-8")
+    assert record.startswith("0 @F1@ FAM\n")
+    assert record.endswith("2 DATE 1948\n")
+
+
+@pytest.mark.parametrize("ending", ["\n", "\r\n", "\r"])
+def test_lazy_store_decodes_only_the_pedigree(tmp_path, family_ged, ending):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_bytes(family_ged.replace("\n", ending).encode("utf-8"))
+
+    processor = GedcomProcessor(str(gedcom_file))
+    store = open_lazy(processor, str(gedcom_file))
+    assert os.path.exists(str(gedcom_file) + ".idx")
+    assert len(store) == 3
+    assert store.records_loaded == 0
+
+    child = processor.individuals["@I1@"]
+    father, mother = processor.find_parents(child)
+    assert child.name == "Child Doe"
+    assert father.name == "John Doe"
+    assert mother.name == "Jane Smith"
+    assert store.records_loaded == 4
+    assert processor.find_people("jane smith") == [mother]
+    store.close()
+
+
+def test_lazy_name_lookup_uses_the_last_name_like_the_parser(tmp_path):
+    gedcom_file = tmp_path / "renamed.ged"
+    gedcom_file.write_bytes(b"0 HEAD\r\n0 @I1@ INDI\r\n1 NAME Maren /Hansdatter/\r\n1 NAME Maren /Jen\r\n2 CONC sen/\r\n0 TRLR\r\n")
+
+    parsed = GedcomProcessor(str(gedcom_file))
+    parsed._parse_gedcom(str(gedcom_file))
+    lazy = GedcomProcessor(str(gedcom_file))
+    store = open_lazy(lazy, str(gedcom_file))
+
+    assert [person.id for person in parsed.find_people("maren jensen")] == ["@I1@"]
+    assert [person.id for person in lazy.find_people("maren jensen")] == ["@I1@"]
+    assert lazy.find_people("hansdatter") == parsed.find_people("hansdatter") == []
+    store.close()
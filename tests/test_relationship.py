@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from gedcom_processor import GedcomProcessor
+from relationship import RelationshipCalculator, describe, relationships_csv
+from tests.test_data import cousins_ged
+
+
+@pytest.fixture
+def cousins_processor(tmp_path, cousins_ged):
+    gedcom_file = tmp_path / "cousins.ged"
+    gedcom_file.write_text(cousins_ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+    return processor
+
+
+@pytest.mark.parametrize("pair, description, degree, removal, half", [
+    (("@C1@", "@C2@"), "1st cousin", 1, 0, False),
+    (("@C1@", "@D2@"), "1st cousin 1x removed", 1, 1, False),
+    (("@A1@", "@A2@"), "sibling", 0, 0, False),
+    (("@A1@", "@H@"), "half sibling", 0, 0, True),
+    (("@A1@", "@C2@"), "aunt/uncle", 0, 1, False),
+    (("@D2@", "@A1@"), "great-niece/nephew", 0, 2, False),
+    (("@G1@", "@D2@"), "great-grandparent", None, 3, False),
+    (("@C1@", "@A1@"), "child", None, 1, False),
+])
+def test_relationships(cousins_processor, pair, description, degree, removal, half):
+    relationship = RelationshipCalculator(cousins_processor).relationship(*pair)
+
+    assert relationship.description == description
+    assert (relationship.degree, relationship.removal, relationship.half) == (degree, removal, half)
+
+
+def test_common_ancestors_and_unrelated(cousins_processor):
+    calculator = RelationshipCalculator(cousins_processor)
+
+    assert calculator.common_ancestors("@C1@", "@C2@") == (["@G1@", "@G2@"], 2, 2)
+    assert calculator.common_ancestors("@H@", "@C1@") == (["@G1@"], 1, 2)
+    assert calculator.relationship("@C1@", "@Y@") is None
+    assert describe(5, 3) == "2nd cousin 2x removed"
+
+
+def test_relationships_csv(tmp_path, cousins_processor):
+    pairs = tmp_path / "pairs.csv"
+    pairs.write_text("a,b\n@C1@,@C2@\n@C1@,@Y@\n@C1@,@NONE@\n", encoding="utf-8")
+    output = tmp_path / "relationships.csv"
+
+    assert relationships_csv(cousins_processor, str(pairs), str(output)) == 3
+    rows = output.read_text(encoding="utf-8").splitlines()
+    assert rows[0] == "person_a,person_b,relationship,generations_a,generations_b,degree,removal,half,common_ancestors"
+    assert rows[1] == "@C1@,@C2@,1st cousin,2,2,1,0,0,@G1@ @G2@"
+    assert rows[2] == "@C1@,@Y@,not related,,,,,,"
+    assert rows[3] == "@C1@,@NONE@,unknown person @NONE@,,,,,,"
+
+
+def test_unknown_other_parent_is_not_called_half(tmp_path, cousins_ged):
+    # U is G1's child in a family without a wife; G1 and G2 are A1's parents
+    gedcom_file = tmp_path / "cousins.ged"
+    gedcom_file.write_text(cousins_ged.replace("0 TRLR", "0 @U@ INDI\n1 NAME Person /U/\n"
+                                                         "0 @F6@ FAM\n1 HUSB @G1@\n1 CHIL @U@\n0 TRLR"),
+                           encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+    calculator = RelationshipCalculator(processor)
+
+    relationship = calculator.relationship("@A1@", "@U@")
+    assert (relationship.description, relationship.half) == ("sibling", None)
+    assert calculator.relationship("@C1@", "@U@").half is None
+    assert calculator.relationship("@H@", "@C2@").description == "half aunt/uncle"
+
+    pairs = tmp_path / "pairs.csv"
+    pairs.write_text("@A1@,@U@\n", encoding="utf-8")
+    relationships_csv(processor, str(pairs), str(tmp_path / "out.csv"))
+    assert (tmp_path / "out.csv").read_text(encoding="utf-8").splitlines()[1] == "@A1@,@U@,sibling,1,1,0,0,unknown,@G1@"
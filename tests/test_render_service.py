@@ -0,0 +1,111 @@
+import sys
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from gedcom_processor import GedcomProcessor
+from record_index import open_lazy
+from render_service import PageCache, RenderService, make_server
+from tests.test_data import family_ged
+
+
+def _loader(gedcom_file):
+    def load_processor():
+        processor = GedcomProcessor(gedcom_file)
+        processor._parse_gedcom(gedcom_file)
+        return processor
+    return load_processor
+
+
+def test_page_cache_evicts_least_recently_used_by_size():
+    cache = PageCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")  # Evicts b, the least recently used
+    cache.put("huge", b"x" * 11)  # Larger than the whole cache, not kept
+
+    assert cache.get("b") is None
+    assert cache.get("huge") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.size == 8
+
+
+def test_service_renders_caches_and_reloads(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    service = RenderService(str(gedcom_file), _loader(str(gedcom_file)))
+
+    root = service.find_roots("@I1@")[0]
+    page, cached = service.render(root.id, 2, "markdown")
+    assert not cached
+    assert "2. John Doe (f. 1 JAN 1920, d. 1 DEC 1990)" in page.decode("utf-8")
+    assert service.render(root.id, 2, "markdown") == (page, True)
+    assert service.render(root.id, 5, "markdown") == (None, False)
+    assert service.render("@NONE@", 1, "markdown") == (None, False)
+    assert not service.check_for_changes()
+
+    gedcom_file.write_text(family_ged.replace("John /Doe/", "Johan /Doe/"), encoding="utf-8")
+    os.utime(gedcom_file, ns=(0, os.stat(gedcom_file).st_mtime_ns + 1_000_000_000))
+    old_processor = service.processor
+    assert service.check_for_changes()
+
+    assert service.processor is not old_processor
+    assert len(service.cache) == 0
+    page, cached = service.render("@I1@", 2, "markdown")
+    assert not cached and "2. Johan Doe" in page.decode("utf-8")
+
+
+def test_http_api(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    service = RenderService(str(gedcom_file), _loader(str(gedcom_file)))
+    server = make_server(service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/page?root=Child%20Doe&number=1&format=word") as response:
+            assert response.headers["X-Cache"] == "miss"
+            assert response.read()[:2] == b"PK"
+        with urllib.request.urlopen(f"{base}/page?root=%40I1%40&number=1&format=word") as response:
+            assert response.headers["X-Cache"] == "hit"
+        try:
+            urllib.request.urlopen(f"{base}/page?root=Doe")
+            assert False, "expected an ambiguous root"
+        except urllib.error.HTTPError as error:
+            assert error.code == 409
+            assert len(json.load(error)["matches"]) == 2
+        with urllib.request.urlopen(f"{base}/status") as response:
+            assert json.load(response)["cache"]["hits"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_reload_closes_the_replaced_lazy_store(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+
+    def load_lazy():
+        processor = GedcomProcessor(str(gedcom_file))
+        open_lazy(processor, str(gedcom_file))
+        return processor
+    service = RenderService(str(gedcom_file), load_lazy)
+    old = service._snapshot
+    # A render holding the old snapshot delays the close until it has finished
+    old.lock.acquire()
+    gedcom_file.write_text(family_ged.replace("John /Doe/", "Johan /Doe/"), encoding="utf-8")
+    os.utime(gedcom_file, ns=(0, os.stat(gedcom_file).st_mtime_ns + 1_000_000_000))
+    reload = threading.Thread(target=service.check_for_changes)
+    reload.start()
+    reload.join(0.2)
+    assert reload.is_alive() and not old.closed
+    old.lock.release()
+    reload.join()
+
+    assert old.closed and old.processor.individuals._gedcom.closed
+    page, _ = service.render("@I1@", 2, "markdown")
+    assert "2. Johan Doe" in page.decode("utf-8")
+    service.processor.individuals.close()
@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ahnentafel import Ahnentafel
+from gedcom_processor import GedcomProcessor
+from sqlite_store import database_path, open_sqlite
+from tests.test_data import family_ged, real_persons_ged
+
+
+def test_sqlite_store_matches_in_memory_parse(tmp_path, real_persons_ged):
+    gedcom_file = tmp_path / "real.ged"
+    gedcom_file.write_text(real_persons_ged, encoding="utf-8")
+    memory = GedcomProcessor(str(gedcom_file))
+    memory._parse_gedcom(str(gedcom_file))
+
+    processor = GedcomProcessor(str(gedcom_file))
+    store = open_sqlite(processor, str(gedcom_file))
+
+    assert os.path.exists(database_path(str(gedcom_file)))
+    assert len(store) == len(memory.individuals)
+    assert store.records_loaded == 0
+    for xref in memory.individuals:
+        person = store[xref]
+        expected = memory.individuals[xref]
+        assert (person.name, person.birth_date, person.death_date) == (expected.name, expected.birth_date, expected.death_date)
+        assert (person.father_id, person.mother_id) == (expected.father_id, expected.mother_id)
+    for query in ["Erik Jacobsen", "jakobsen", "@73626234@", "nobody"]:
+        assert [person.id for person in processor.find_people(query)] == [person.id for person in memory.find_people(query)]
+
+
+def test_sqlite_store_prefetches_ancestors_and_is_reused(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    store = open_sqlite(processor, str(gedcom_file))
+
+    table = Ahnentafel(processor, store["@I1@"], generations=1)
+    assert store.records_loaded == 1
+    table = Ahnentafel(processor, store["@I1@"])
+    assert [person.id for _, person in table.ancestors()] == ["@I1@", "@I2@", "@I3@"]
+    assert store.records_loaded == 3
+    assert processor.get_person_info(table.get(2), 2) == "2. John Doe (f. 1 JAN 1920, d. 1 DEC 1990)"
+    store.close()
+
+    built = os.stat(database_path(str(gedcom_file))).st_mtime_ns
+    open_sqlite(GedcomProcessor(str(gedcom_file)), str(gedcom_file)).close()
+    assert os.stat(database_path(str(gedcom_file))).st_mtime_ns == built
+
+def test_empty_parent_lines_link_like_in_memory(tmp_path, family_ged):
+    # A later family with empty HUSB and WIFE lines must not clear the parents of the first
+    ged = family_ged.replace("0 TRLR", "0 @F9@ FAM\n1 HUSB\n1 WIFE\n1 CHIL @I1@\n0 TRLR")
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(ged, encoding="utf-8")
+    memory = GedcomProcessor(str(gedcom_file))
+    memory._parse_gedcom(str(gedcom_file))
+    store = open_sqlite(GedcomProcessor(str(gedcom_file)), str(gedcom_file))
+
+    for xref in memory.individuals:
+        expected = memory.individuals[xref]
+        assert (store[xref].father_id, store[xref].mother_id) == (expected.father_id, expected.mother_id)
+    assert (store["@I1@"].father_id, store["@I1@"].mother_id) == ("@I2@", "@I3@")
+    store.close()
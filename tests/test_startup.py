@@ -0,0 +1,52 @@
+import sys
+import os
+import json
+import subprocess
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from tests.test_data import family_ged
+
+PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Cumulative import time of the CLI modules, far above the ~0.1 s they take
+# without python-docx and well below the ~0.35 s they took with it
+IMPORT_BUDGET_SECONDS = 0.25
+
+MARKDOWN_RUN = """
+import json, sys
+sys.path.insert(0, {package!r})
+from gedcom_processor import GedcomProcessor
+from tree_processor import TreeProcessor
+processor = GedcomProcessor({gedcom!r})
+processor._parse_gedcom({gedcom!r})
+TreeProcessor(processor).process_tree(processor.individuals["@I1@"], {output!r}, "markdown")
+print(json.dumps(sorted(name for name in sys.modules if name.split(".")[0] in ("docx", "lxml"))))
+"""
+
+
+def _import_seconds(module_names):
+    # -X importtime reports each module's cumulative import time in microseconds
+    code = f"import sys; sys.path.insert(0, {PACKAGE_DIR!r}); import {', '.join(module_names)}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and fields[-1].strip() in module_names:
+            total += int(fields[1])
+    return total / 1e6
+
+
+def test_markdown_run_does_not_import_word_libraries(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    code = MARKDOWN_RUN.format(package=PACKAGE_DIR, gedcom=str(gedcom_file), output=str(tmp_path / "out"))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout.splitlines()[-1]) == []
+    assert (tmp_path / "out" / "2.md").exists()
+
+
+def test_cli_modules_import_within_budget():
+    # Best of three, to ride out a busy machine
+    seconds = min(_import_seconds(["gedcom_processor", "tree_processor"]) for _ in range(3))
+    assert seconds < IMPORT_BUDGET_SECONDS
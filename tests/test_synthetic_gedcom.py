@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+from ahnentafel import Ahnentafel
+from gedcom_processor import GedcomProcessor
+from synthetic_gedcom import generate_gedcom
+
+
+def test_generator_is_deterministic_per_seed(tmp_path):
+    first = generate_gedcom(str(tmp_path / "a.ged"), 300, generations=5, seed=7)
+    second = generate_gedcom(str(tmp_path / "b.ged"), 300, generations=5, seed=7)
+    other = generate_gedcom(str(tmp_path / "c.ged"), 300, generations=5, seed=8)
+
+    with open(first, 'rb') as a, open(second, 'rb') as b, open(other, 'rb') as c:
+        first_data, second_data, other_data = a.read(), b.read(), c.read()
+    assert first_data == second_data
+    assert first_data != other_data
+
+
+def test_generated_file_parses_into_pedigree(tmp_path):
+    path = generate_gedcom(str(tmp_path / "tree.ged"), 500, generations=5, implex_rate=0.0,
+                           heavy_blocks=2, line_ending="\r\n")
+    with open(path, 'rb') as gedcom:
+        assert b"\r\n2 SOUR @S" in gedcom.read()
+
+    processor = GedcomProcessor(path)
+    processor._parse_gedcom(path)
+
+    assert len(processor.individuals) == 500
+    # Without implex the root has a full pedigree over the five generations
+    assert len(Ahnentafel(processor, processor.individuals["@I1@"])) == 2 ** 5 - 1
+
+
+def test_head_declares_the_encoding_written(tmp_path):
+    path = generate_gedcom(str(tmp_path / "ansi.ged"), 100, generations=3, encoding="cp1252")
+    with open(path, 'rb') as gedcom:
+        assert b"\n1 CHAR ANSI\n" in gedcom.read()
+
+    processor = GedcomProcessor(path)
+    processor._parse_gedcom(path)
+    # Søren, Jørgen and the like survive the round trip through cp1252
+    assert any("ø" in person.name for person in processor.individuals.values())
+
+
+def test_husbands_are_men_and_wives_women(tmp_path):
+    path = generate_gedcom(str(tmp_path / "sex.ged"), 300, generations=5)
+    processor = GedcomProcessor(path, extra_fields={"sex": ("SEX",)})
+    processor.keep_families = True
+    processor._parse_gedcom(path)
+
+    assert processor.families
+    for husband_id, wife_id, _ in processor.families.values():
+        assert processor.individuals[husband_id].field("sex") == "M"
+        assert processor.individuals[wife_id].field("sex") == "F"
@@ -0,0 +1,147 @@
+import sys
+import os
+import zipfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from gedcom_processor import GedcomProcessor
+from tree_processor import TreeProcessor
+from tests.test_data import cousins_ged, family_ged, siblings_ged
+
+
+@pytest.fixture
+def family_processor(tmp_path, family_ged):
+    gedcom_file = tmp_path / "family.ged"
+    gedcom_file.write_text(family_ged, encoding="utf-8")
+    processor = GedcomProcessor(str(gedcom_file))
+    processor._parse_gedcom(str(gedcom_file))
+    return processor
+
+
+def read_pages(output_dir, member=None):
+    pages = {}
+    for name in sorted(os.listdir(output_dir)):
+        if name.startswith("."):
+            continue
+        path = os.path.join(output_dir, name)
+        if member:
+            with zipfile.ZipFile(path) as docx:
+                pages[name] = docx.read(member)
+        else:
+            with open(path, "rb") as page:
+                pages[name] = page.read()
+    return pages
+
+
+@pytest.mark.parametrize("format, member", [("markdown", None), ("word", "word/document.xml")])
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_parallel_rendering_matches_serial(tmp_path, family_processor, format, member, pool):
+    root = family_processor.individuals["@I1@"]
+    TreeProcessor(family_processor).process_tree(root, str(tmp_path / "serial"), format)
+    TreeProcessor(family_processor, workers=2, pool=pool).process_tree(root, str(tmp_path / "parallel"), format)
+
+    serial = read_pages(tmp_path / "serial", member)
+    assert len(serial) == 3
+    assert read_pages(tmp_path / "parallel", member) == serial
+
+
+def test_bundles_hold_every_page(tmp_path, family_processor):
+    from docx import Document
+    root = family_processor.individuals["@I1@"]
+    tree = TreeProcessor(family_processor)
+
+    tree.process_tree(root, str(tmp_path / "md"), "markdown", bundle="single")
+    assert os.listdir(tmp_path / "md") == ["anetavle.md"]
+    markdown = (tmp_path / "md" / "anetavle.md").read_text(encoding="utf-8")
+    assert markdown.count("# Anetavle for person") == 3
+    assert '<a id="person-3"></a>' in markdown
+
+    tree.process_tree(root, str(tmp_path / "word"), "word", bundle="single")
+    doc = Document(str(tmp_path / "word" / "anetavle.docx"))
+    assert len(doc.tables) == 3
+    assert doc.tables[2].rows[0].cells[0].text == "3. Jane Smith (f. 1 FEB 1925)"
+
+    tree.process_tree(root, str(tmp_path / "zip"), "markdown", bundle="zip")
+    with zipfile.ZipFile(tmp_path / "zip" / "anetavle.zip") as archive:
+        assert archive.namelist() == ["1.md", "2.md", "3.md"]
+        assert archive.read("2.md").decode("utf-8").startswith("# Anetavle for person 2")
+
+
+def test_incremental_run_rewrites_only_changed_pages(tmp_path, family_processor):
+    root = family_processor.individuals["@I1@"]
+    output_dir = tmp_path / "out"
+    tree = TreeProcessor(family_processor)
+
+    tree.process_tree(root, str(output_dir))
+    assert (tree.pages_written, tree.pages_skipped) == (3, 0)
+
+    tree.process_tree(root, str(output_dir))
+    assert (tree.pages_written, tree.pages_skipped) == (0, 3)
+
+    family_processor.individuals["@I3@"].birth_date = "2 FEB 1925"
+    tree.process_tree(root, str(output_dir))
+    # I3 is shown on her own page and in the grid of her child's page
+    assert (tree.pages_written, tree.pages_skipped) == (2, 1)
+    assert "2 FEB 1925" in (output_dir / "3.md").read_text(encoding="utf-8")
+    assert "2 FEB 1925" in (output_dir / "1.md").read_text(encoding="utf-8")
+
+    family_processor.individuals["@I1@"].mother_id = None
+    tree.process_tree(root, str(output_dir))
+    assert tree.pages_removed == 1
+    assert not (output_dir / "3.md").exists()
+
+
+def test_batch_roots_copy_shared_pages(tmp_path, siblings_ged):
+    processor = GedcomProcessor("")
+    processor.individuals = processor.read_individuals(siblings_ged)
+    processor._read_family_relations(siblings_ged)
+    tree = TreeProcessor(processor)
+
+    with tree.batch():
+        tree.process_tree(processor.individuals["@S1@"], str(tmp_path / "S1"), "word")
+        assert (tree.pages_written, tree.pages_copied) == (3, 0)
+        tree.process_tree(processor.individuals["@S2@"], str(tmp_path / "S2"), "word")
+        assert (tree.pages_written, tree.pages_copied) == (3, 2)
+    assert tree.rendered_pages == {}
+
+    assert (tmp_path / "S2" / "2.docx").read_bytes() == (tmp_path / "S1" / "2.docx").read_bytes()
+    assert read_pages(tmp_path / "S2", "word/document.xml")["1.docx"] != \
+        read_pages(tmp_path / "S1", "word/document.xml")["1.docx"]
+
+    # Outside a batch the pages are rendered afresh, as the data may have changed in between
+    tree.process_tree(processor.individuals["@S2@"], str(tmp_path / "S3"), "word")
+    assert (tree.pages_written, tree.pages_copied) == (3, 0)
+    assert tree.rendered_pages == {}
+
+
+def test_incremental_batch_copies_pages_already_on_disk(tmp_path, siblings_ged):
+    processor = GedcomProcessor("")
+    processor.individuals = processor.read_individuals(siblings_ged)
+    processor._read_family_relations(siblings_ged)
+    TreeProcessor(processor).process_tree(processor.individuals["@S1@"], str(tmp_path / "S1"))
+
+    # A later run finds S1's pages current; S2 still copies the shared ones
+    tree = TreeProcessor(processor)
+    with tree.batch():
+        tree.process_tree(processor.individuals["@S1@"], str(tmp_path / "S1"))
+        assert (tree.pages_written, tree.pages_skipped) == (0, 3)
+        tree.process_tree(processor.individuals["@S2@"], str(tmp_path / "S2"))
+    assert (tree.pages_written, tree.pages_copied) == (3, 2)
+
+
+def test_batch_formats_shared_ancestors_once(tmp_path, cousins_ged):
+    # C1 and C2 are cousins, so G1 and G2 are under different numbers in their trees
+    processor = GedcomProcessor("")
+    processor.individuals = processor.read_individuals(cousins_ged)
+    processor._read_family_relations(cousins_ged)
+    calls = []
+    person_details = processor.person_details
+    processor.person_details = lambda person: calls.append(person.id) or person_details(person)
+    tree = TreeProcessor(processor)
+
+    with tree.batch():
+        tree.process_tree(processor.individuals["@C1@"], str(tmp_path / "C1"))
+        tree.process_tree(processor.individuals["@C2@"], str(tmp_path / "C2"))
+
+    assert sorted(calls) == ["@A1@", "@A2@", "@C1@", "@C2@", "@G1@", "@G2@", "@X1@", "@X2@"]
+    assert "6. Person G1" in (tmp_path / "C2" / "3.md").read_text(encoding="utf-8")
+    assert tree.person_details == {}
@@ -0,0 +1,29 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from docx import Document
+from gedcom_processor import GedcomProcessor
+from word_document_generator import WordDocumentGenerator
+from tests.test_data import family_ged
+
+
+def test_word_grid_fills_cloned_template(family_ged):
+    processor = GedcomProcessor("")
+    processor.individuals = processor.read_individuals(family_ged)
+    processor._read_family_relations(family_ged)
+    generator = WordDocumentGenerator(processor)
+
+    docs = []
+    for _ in range(2):
+        doc = Document()
+        generator.generate_word_grid(doc, processor.individuals["@I1@"], depth=3)
+        docs.append(doc)
+
+    assert list(generator._grid_templates) == [3]
+    for doc in docs:
+        rows = doc.tables[0].rows
+        assert rows[0].cells[0].text == "1. Child Doe (f. 1 JAN 1950)"
+        assert rows[1].cells[0].text == "2. John Doe (f. 1 JAN 1920, d. 1 DEC 1990)"
+        assert rows[1].cells[2].text == "3. Jane Smith (f. 1 FEB 1925)"
+        assert [cell.text for cell in rows[2].cells] == [""] * 4
+        assert doc.sections[0].page_width > doc.sections[0].page_height
@@ -1,38 +1,195 @@
-from markdown_generator import MarkdownGenerator
-from word_document_generator import WordDocumentGenerator
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from ahnentafel import Ahnentafel
+from metrics import Metrics
+from output_formats import generator_class, get_format
+from page_manifest import PageManifest, page_fingerprint
+
+# Generators used by pool worker processes, created per format on first use
+_worker_generators: Dict[str, object] = {}
+
+def _generator_for(format: str, generator=None):
+    if generator is None:
+        generator = _worker_generators.get(format)
+        if generator is None:
+            # Rendering from page payloads does not need the GEDCOM data
+            generator = _worker_generators[format] = generator_class(format)(None)
+    return generator
+
+def _save_page(job: Tuple, generator=None) -> Tuple[float, float, int]:
+    """Render and save one page job; runs in a pool worker or inline.
+
+    Returns the render and save times in seconds and the bytes written.
+    """
+    format, filename, number, payload, depth = job
+    generator = _generator_for(format, generator)
+    start = time.perf_counter()
+    page = generator.render_page(number, payload, depth)
+    rendered = time.perf_counter()
+    size = generator.save_page(page, filename)
+    return rendered - start, time.perf_counter() - rendered, size
+
+def _render_page(job: Tuple, generator=None) -> bytes:
+    """Render one page job to the bytes of its file, for bundling."""
+    format, filename, number, payload, depth = job
+    generator = _generator_for(format, generator)
+    return generator.page_bytes(generator.render_page(number, payload, depth))
 
 class TreeProcessor:
-    def __init__(self, gedcom_processor):
+    def __init__(self, gedcom_processor, depth: int = 4, generations: Optional[int] = None,
+                 workers: int = 1, pool: str = "process", incremental: bool = True,
+                 metrics: Optional[Metrics] = None):
         self.gedcom_processor = gedcom_processor
-        self.word_generator = WordDocumentGenerator(gedcom_processor)  # Initialize WordDocumentGenerator
-        self.markdown_generator = MarkdownGenerator(gedcom_processor)  # Initialize MarkdownGenerator
+        self.depth = depth  # Generations shown on each page
+        self.generations = generations  # Generations walked from the root, None for all
+        self.workers = workers  # Pages rendered in parallel, 1 renders inline
+        self.pool = pool  # "process" or "thread"
+        self.incremental = incremental  # Skip pages whose fingerprint is unchanged
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.pages_written = 0
+        self.pages_skipped = 0
+        self.pages_removed = 0
+        self.pages_copied = 0
+        # Fingerprint -> page file already rendered in the current batch.
+        # Roots that share ancestors (siblings share every page but the
+        # first) copy those pages instead of rendering them again.
+        self.rendered_pages: Dict[str, str] = {}
+        # Xref -> name and dates shown in the grid cells, shared by the roots
+        # of a batch, so cousins' common ancestors are formatted once even
+        # though they appear under different ancestor numbers
+        self.person_details: Dict[str, str] = {}
+        self._in_batch = False
+        # Format -> generator, imported and created when the format is first used
+        self._generators: Dict[str, object] = {}
+
+    def generator(self, format: str):
+        """Return this processor's generator for ``format`` (see output_formats)."""
+        generator = self._generators.get(format)
+        if generator is None:
+            generator = self._generators[format] = generator_class(format)(self.gedcom_processor)
+        return generator
+
+    @contextmanager
+    def batch(self):
+        """Process several roots over unchanged data, sharing person details and rendered pages.
+
+        Outside a batch each ``process_tree`` starts afresh, so edits to
+        the data between calls show up on the pages.
+        """
+        self._in_batch = True
+        try:
+            yield self
+        finally:
+            self._in_batch = False
+            self.person_details.clear()
+            self.rendered_pages.clear()
 
-    def process_tree(self, root_person, output_dir: str = "output", format: str = "markdown"):
-        import os
-        from docx import Document
+    def page_jobs(self, ahnentafel: Ahnentafel, output_dir: str, format: str) -> List[Tuple]:
+        """Return one render job per distinct ancestor, with all numbering done.
+
+        Jobs carry the finished page payload, such as the cell texts (Word)
+        or page text (Markdown), so rendering them needs no access to the
+        GEDCOM data.
+        """
+        return [self.page_job(ahnentafel, number, person, output_dir, format)
+                for number, person in ahnentafel.ancestors()]
+
+    def page_job(self, ahnentafel: Ahnentafel, number: int, person, output_dir: str, format: str) -> Tuple:
+        """Return the render job for the page of ``person`` at ``number``."""
+        extension = get_format(format).extension
+        payload = self.generator(format).page_payload(ahnentafel, number, person, self.depth)
+        return (format, f"{output_dir}/{number}.{extension}", number, payload, self.depth)
+
+    def _run_jobs(self, function, jobs: List[Tuple], format: str):
+        """Apply ``function`` to every job in order, using the configured pool."""
+        if self.workers <= 1:
+            generator = self.generator(format)
+            for job in jobs:
+                yield function(job, generator)
+        elif self.pool == "thread":
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                yield from executor.map(partial(function, generator=self.generator(format)), jobs)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                yield from executor.map(function, jobs, chunksize=max(1, len(jobs) // (self.workers * 4)))
+
+    def process_tree(self, root_person, output_dir: str = "output", format: str = "markdown",
+                     bundle: Optional[str] = None):
+        """Write one page per ancestor of ``root_person`` to ``output_dir``.
+
+        With ``bundle="single"`` all pages go into one anetavle.md or
+        anetavle.docx, and with ``bundle="zip"`` into one anetavle.zip of
+        the page files. Bundles are written page by page as they render.
+
+        Page files are written incrementally: a manifest in ``output_dir``
+        records each page's fingerprint, unchanged pages are skipped and
+        pages that are no longer produced are deleted.
+        """
         os.makedirs(output_dir, exist_ok=True)
 
-        stack = [(root_person, 1)]
-        processed = set()
+        # One ahnentafel per root; every page reads its ancestors from it.
+        # Each distinct ancestor gets one page, under its lowest number.
+        with self.metrics.stage("traverse"):
+            if not self._in_batch:
+                self.person_details.clear()
+            ahnentafel = Ahnentafel(self.gedcom_processor, root_person, self.generations, self.person_details)
+        with self.metrics.stage("page_jobs"):
+            jobs = self.page_jobs(ahnentafel, output_dir, format)
+        self.metrics.count("ancestors", len(ahnentafel))
+        self.metrics.count("pages", len(jobs))
+
+        with self.metrics.stage("render"):
+            self._write_output(jobs, output_dir, format, bundle)
+        return ahnentafel
 
-        while stack:
-            person, number = stack.pop(0)
-            if not person or person.id in processed:
+    def _write_output(self, jobs: List[Tuple], output_dir: str, format: str, bundle: Optional[str]):
+        if bundle == "single":
+            path = f"{output_dir}/anetavle.{get_format(format).extension}"
+            with self.generator(format).open_bundle(path) as single_bundle:
+                for _, _, number, payload, depth in jobs:
+                    single_bundle.add_page(number, payload, depth)
+        elif bundle == "zip":
+            from bundle_writer import ZipBundle
+            with ZipBundle(f"{output_dir}/anetavle.zip") as zip_bundle:
+                for job, data in zip(jobs, self._run_jobs(_render_page, jobs, format)):
+                    zip_bundle.add_page(os.path.basename(job[1]), data)
+                    self.metrics.count("bytes_rendered", len(data))
+        else:
+            self._write_pages(jobs, output_dir, format)
+
+    def _write_pages(self, jobs: List[Tuple], output_dir: str, format: str):
+        manifest = PageManifest(output_dir)
+        rendered_pages = self.rendered_pages if self._in_batch else {}
+        fingerprints = {}
+        pending = []
+        copies = []
+        for job in jobs:
+            fingerprint = page_fingerprint(job)
+            fingerprints[os.path.basename(job[1])] = fingerprint
+            if self.incremental and manifest.is_current(job[1], fingerprint):
+                # Already on disk, so later roots of a batch can copy it too
+                rendered_pages.setdefault(fingerprint, job[1])
                 continue
+            rendered = rendered_pages.get(fingerprint)
+            if rendered and rendered != job[1] and os.path.exists(rendered):
+                copies.append((rendered, job[1]))
+            else:
+                pending.append(job)
+                rendered_pages[fingerprint] = job[1]
+
+        for job, (render_seconds, save_seconds, size) in zip(pending, self._run_jobs(_save_page, pending, format)):
+            self.metrics.page(job[2], job[1], render_seconds, save_seconds, size)
+        for source, filename in copies:
+            shutil.copyfile(source, filename)
 
-            processed.add(person.id)
-
-            if format == "word":
-                doc = Document()
-                doc.add_heading(f'Anetavle for person {number}', 0)
-                self.word_generator.generate_word_grid(doc, person)
-                filename = f"{output_dir}/{number}.docx"
-                doc.save(filename)
-            elif format == "markdown":
-                self.markdown_generator.generate_markdown(person, number, output_dir)
-
-            father, mother = self.gedcom_processor.find_parents(person)
-            if father:
-                stack.append((father, number * 2))
-            if mother:
-                stack.append((mother, number * 2 + 1))
\ No newline at end of file
+        self.pages_written = len(pending) + len(copies)
+        self.pages_copied = len(copies)
+        self.pages_skipped = len(jobs) - self.pages_written
+        self.pages_removed = len(manifest.remove_stale(fingerprints))
+        manifest.save(fingerprints)
@@ -1,13 +1,20 @@
+import io
+import os
+import zipfile
+from copy import deepcopy
 from docx import Document
 from docx.shared import Inches, Pt, Cm
 from docx.enum.section import WD_ORIENTATION
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
+from lxml import etree
+from ahnentafel import Ahnentafel
 
 class WordDocumentGenerator:
     def __init__(self, gedcom_processor):
         self.gedcom_processor = gedcom_processor
+        self._grid_templates = {}  # depth -> prebuilt w:tbl element
 
     def set_cell_vertical_text(self, cell):
         tc = cell._tc
@@ -16,37 +23,26 @@ class WordDocumentGenerator:
         textDirection.set(qn('w:val'), 'btLr')
         tcPr.append(textDirection)
 
-    def generate_word_grid(self, doc: Document, root_person, depth: int = 4):
+    def _set_landscape(self, section):
         # Set landscape orientation
-        section = doc.sections[0]
         section.orientation = WD_ORIENTATION.LANDSCAPE
         section.page_width = Cm(29.7)  # A4 height
         section.page_height = Cm(21.0)  # A4 width
 
-        table = doc.add_table(rows=depth, cols=2 ** (depth - 1))
+    def _build_grid_template(self, depth: int):
+        # Build the merged, formatted table once; pages only copy it and fill in text
+        scratch = Document()
+        # Column widths follow the page width, so lay out on a landscape page
+        self._set_landscape(scratch.sections[0])
+        table = scratch.add_table(rows=depth, cols=2 ** (depth - 1))
         table.style = 'Table Grid'
         table.allow_autofit = True
         table.width = Inches(11)
 
         for generation in range(depth):
-            cells = [""] * (2 ** generation)
-            stack = [(root_person, 0)]
-            cell_index = 0
-
-            while stack and cell_index < len(cells):
-                person, gen = stack.pop(0)
-                if gen == generation:
-                    if person:
-                        cells[cell_index] = self.gedcom_processor.get_person_info(person)
-                    cell_index += 1
-                elif person:
-                    father, mother = self.gedcom_processor.find_parents(person)
-                    stack.append((mother, gen + 1))
-                    stack.append((father, gen + 1))
-
             row = table.rows[generation]
             cells_per_column = (2 ** (depth - 1)) // (2 ** generation)
-            for i, cell_text in enumerate(cells):
+            for i in range(2 ** generation):
                 start_col = i * cells_per_column
                 end_col = (i + 1) * cells_per_column
                 if start_col < end_col:
@@ -56,7 +52,7 @@ class WordDocumentGenerator:
                             cell.merge(row.cells[col])
 
                     cell = row.cells[start_col]
-                    cell.text = cell_text
+                    cell.text = ""
 
                     if generation == depth - 1:
                         self.set_cell_vertical_text(cell)
@@ -70,4 +66,125 @@ class WordDocumentGenerator:
                     font_size = 12 - generation
                     run.font.size = Pt(max(8, font_size))
 
-        doc.add_paragraph('')
\ No newline at end of file
+        return table._tbl
+
+    def _grid_template(self, depth: int):
+        template = self._grid_templates.get(depth)
+        if template is None:
+            template = self._build_grid_template(depth)
+            self._grid_templates[depth] = template
+        return template
+
+    def grid_texts(self, ahnentafel: Ahnentafel, number: int, depth: int):
+        """Return the cell texts of a grid, row by row from the root down."""
+        return ahnentafel.grid_labels(self.gedcom_processor, number, depth)
+
+    def generate_word_grid(self, doc: Document, root_person, depth: int = 4, ahnentafel: Ahnentafel = None, number: int = 1):
+        # Ancestors are read from a precomputed ahnentafel; build one for
+        # this grid only when the caller does not share its own.
+        if ahnentafel is None:
+            ahnentafel = Ahnentafel(self.gedcom_processor, root_person, depth)
+            number = 1
+
+        self.append_grid(doc, self.grid_texts(ahnentafel, number, depth), depth)
+
+    def append_grid(self, doc: Document, texts, depth: int = 4):
+        """Append a grid with the given cell texts (as from grid_texts) to ``doc``."""
+        self._set_landscape(doc.sections[0])
+        doc.element.body._insert_tbl(self.grid_element(texts, depth))
+        doc.add_paragraph('')
+
+    def grid_element(self, texts, depth: int = 4):
+        """Return a filled copy of the grid template as a w:tbl element."""
+        tbl = deepcopy(self._grid_template(depth))
+        # The template has exactly one run per cell, in row order
+        for run, cell_text in zip(tbl.iter(qn('w:r')), texts):
+            run.text = cell_text
+        return tbl
+
+    def render_page(self, number: int, texts, depth: int = 4) -> Document:
+        """Build the complete page document for ancestor ``number``."""
+        doc = Document()
+        doc.add_heading(f'Anetavle for person {number}', 0)
+        self.append_grid(doc, texts, depth)
+        return doc
+
+    def page_payload(self, ahnentafel: Ahnentafel, number: int, person, depth: int):
+        return self.grid_texts(ahnentafel, number, depth)
+
+    def save_page(self, document: Document, filename: str) -> int:
+        document.save(filename)
+        return os.path.getsize(filename)
+
+    def page_bytes(self, document: Document) -> bytes:
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+    def open_bundle(self, path: str) -> "WordBundle":
+        return WordBundle(path, self)
+
+class WordBundle:
+    """One Word document with a page per ancestor, streamed to disk.
+
+    The package parts (styles, settings, ...) are copied from a template
+    document. Only ``word/document.xml`` is written page by page through
+    a streaming zip member, so memory does not grow with the page count.
+    """
+
+    def __init__(self, path: str, word_generator):
+        self.word_generator = word_generator
+
+        template = Document()
+        word_generator._set_landscape(template.sections[0])
+        template.add_heading('Anetavle', 0)
+        body = template.element.body
+        self._heading = body[0]
+        body.remove(self._heading)
+
+        page_break = OxmlElement('w:p')
+        page_break.append(OxmlElement('w:r'))
+        page_break[0].append(OxmlElement('w:br'))
+        page_break[0][0].set(qn('w:type'), 'page')
+        self._page_break = etree.tostring(page_break)
+        self._empty_paragraph = etree.tostring(OxmlElement('w:p'))
+
+        # Split the now empty document.xml around the body content
+        body.insert(len(body) - 1, etree.Comment('pages'))
+        document_xml = etree.tostring(template.element, encoding='UTF-8', standalone=True)
+        head, tail = document_xml.split(b'<!--pages-->', 1)
+
+        package = io.BytesIO()
+        template.save(package)
+
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(package) as template_zip:
+            for info in template_zip.infolist():
+                if info.filename != 'word/document.xml':
+                    self._zip.writestr(info, template_zip.read(info.filename))
+        self._document = self._zip.open('word/document.xml', 'w', force_zip64=True)
+        self._document.write(head)
+        self._tail = tail
+        self._first = True
+
+    def add_page(self, number: int, texts, depth: int = 4):
+        if not self._first:
+            self._document.write(self._page_break)
+        self._first = False
+
+        heading = deepcopy(self._heading)
+        heading.xpath('./w:r')[0].text = f'Anetavle for person {number}'
+        self._document.write(etree.tostring(heading))
+        self._document.write(etree.tostring(self.word_generator.grid_element(texts, depth)))
+        self._document.write(self._empty_paragraph)
+
+    def close(self):
+        self._document.write(self._tail)
+        self._document.close()
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()